@@ -0,0 +1,376 @@
+'''
+Triton Server Support for building model repository.
+----
+Benchmark of model repository build.
+Generate synthetic model repositories, then measure time and memory of
+configuration loading, `BuildProtoBufTxt.build()` and `dictionary_to_string`.
+Results are stored in `benchmarks/results`, and compared with the previous run.
+
+Usage:
+    python benchmarks/build_benchmark.py [--scale 1] [--repeat 3] [--threshold 0.2] [--min-delta 5]
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+import multiprocessing
+from queue import Empty
+from typing import Callable
+
+# Benchmark the working tree, not the installed package
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "libs"))
+
+import yaml  # noqa: E402
+from onnx import helper, TensorProto  # noqa: E402
+from trsp import __version__  # noqa: E402
+from trsp.build._file_config import FileConfig  # noqa: E402
+from trsp.build._build_pbtxt import BuildProtoBufTxt  # noqa: E402
+from trsp.utils._abstract import TritonEnum  # noqa: E402
+from trsp.utils._constants import BUILD_DIR, CACHE_FILE  # noqa: E402
+from trsp.utils._utils import dictionary_to_string  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "results")
+
+
+# Synthetic models -------------------------------------------------------------
+
+def write_onnx_model(path: str, size: int, external: bool = False):
+    '''
+    Write an ONNX model `y = x @ W` with a `size` x `size` float weight.
+    If `external` is True, weight is written to an external data file without holding it in memory.
+    '''
+    x = helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, size])
+    y = helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, size])
+    weight_bytes = size * size * 4
+
+    if external:
+        location = os.path.basename(path) + ".data"
+        with open(os.path.join(os.path.dirname(path), location), "wb") as f:
+            f.truncate(weight_bytes)
+        weight = TensorProto(name="W", dims=[size, size],
+                             data_type=TensorProto.FLOAT, data_location=TensorProto.EXTERNAL)
+        for key, value in (("location", location), ("offset", "0"), ("length", str(weight_bytes))):
+            entry = weight.external_data.add()
+            entry.key = key
+            entry.value = value
+    else:
+        weight = helper.make_tensor("W", TensorProto.FLOAT, [
+                                    size, size], os.urandom(weight_bytes), raw=True)
+
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["x", "W"], ["y"])], "graph", [x], [y], [weight])
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 13)])
+    with open(path, "wb") as f:
+        f.write(model.SerializeToString())
+
+
+def write_python_module(path: str):
+    '''
+    Write a python module for python engine.
+    '''
+    with open(path, "w") as f:
+        f.write("def execute(params, inputs):\n    return (inputs[0],)\n")
+
+
+def generate_repository(directory: str, name: str, scale: int) -> str:
+    '''
+    Generate a synthetic repository in `directory` and return its configuration file path.
+    - small: many small ONNX models with dynamic batching.
+    - large: a few large ONNX models with external data.
+    - ensemble: deep chain of ensemble models over small ONNX models.
+    - python: python models with many versions.
+    '''
+    os.makedirs(directory, exist_ok=True)
+    models = {}
+
+    if name == "small":
+        for i in range(50 * scale):
+            path = os.path.join(directory, f"small_{i}.onnx")
+            write_onnx_model(path, 32)
+            models[f"small_{i}"] = {
+                "engine": "onnx", "max_batch_size": 8, "dynamic_batching": True,
+                "versions": [{"version": 1, "path": path}]
+            }
+
+    elif name == "large":
+        for i in range(2 * scale):
+            path = os.path.join(directory, f"large_{i}.onnx")
+            write_onnx_model(path, 4096, external=True)
+            models[f"large_{i}"] = {
+                "engine": "onnx", "max_batch_size": 8, "dynamic_batching": True,
+                "versions": [{"version": 1, "path": path}]
+            }
+
+    elif name == "ensemble":
+        path = os.path.join(directory, "step.onnx")
+        write_onnx_model(path, 32)
+        for i in range(10 * scale):
+            models[f"step_{i}"] = {
+                "engine": "onnx", "max_batch_size": 0,
+                "versions": [{"version": 1, "path": path}]
+            }
+        previous = "step_0"
+        for i in range(1, 10 * scale):
+            models[f"ensemble_{i}"] = {
+                "engine": "ensemble", "max_batch_size": 0,
+                "steps": [{"model": previous, "version": "latest"}, {"model": f"step_{i}", "version": "latest"}]
+            }
+            previous = f"ensemble_{i}"
+
+    elif name == "python":
+        for i in range(10 * scale):
+            path = os.path.join(directory, f"module_{i}.py")
+            write_python_module(path)
+            models[f"python_{i}"] = {
+                "engine": "python", "max_batch_size": 0,
+                "versions": [{"version": v + 1, "module": {"path": path, "execute": "execute"}} for v in range(10)],
+                "tensor": {
+                    "input": [{"dims": [1, 32], "dtype": "float32"}],
+                    "output": [{"dims": [1, 32], "dtype": "float32"}]
+                }
+            }
+
+    config_path = os.path.join(directory, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.safe_dump({"model_repository": name, "models": models}, f)
+    return config_path
+
+
+def get_large_pbtxt_config(size: int) -> dict:
+    '''
+    Get a formatted Triton config with many inputs, outputs and ensemble steps.
+    '''
+    config = {"name": "model", "platform": "ensemble", "max_batch_size": 8}
+    for i in range(size):
+        config[f"input_{i+1}"] = [{"name": f"input_{i}", "data_type": TritonEnum(
+            "TYPE_FP32"), "dims": TritonEnum([-1, 3, 224, 224])}]
+        config[f"output_{i+1}"] = [{"name": f"output_{i}", "data_type": TritonEnum(
+            "TYPE_FP32"), "dims": TritonEnum([-1, 1000])}]
+    config["ensemble_scheduling"] = {"step": [
+        {"model_name": f"step_{i}", "model_version": -1,
+         "input_map_1": {"key": "x", "value": f"input_{i}"},
+         "output_map_1": {"key": "y", "value": f"output_{i}"}} for i in range(size)
+    ]}
+    return config
+
+
+# Measurement ------------------------------------------------------------------
+
+def get_cases(workspace: str, scale: int) -> dict[str, Callable[[], Callable[[], None]]]:
+    '''
+    Get benchmark cases. Each case prepares its inputs and returns the measured function.
+    '''
+    cases = {}
+
+    for repository in ("small", "large", "ensemble", "python"):
+        directory = os.path.join(workspace, repository)
+
+        def __prepare_cold(directory=directory, repository=repository):
+            config_path = generate_repository(directory, repository, scale)
+            # Builds run in workspace, remove built repository with its manifest, and metadata cache
+            shutil.rmtree(os.path.join(workspace, BUILD_DIR,
+                          repository), ignore_errors=True)
+            try:
+                os.remove(os.path.join(workspace, BUILD_DIR, CACHE_FILE))
+            except FileNotFoundError:
+                pass
+
+            def __build_cold(config_path=config_path):
+                models = FileConfig(config_path).get_config()["models"]
+                built_models = BuildProtoBufTxt(
+                    FileConfig(config_path).get_config()).build()
+                if len(built_models) != len(models):
+                    raise ValueError(
+                        f"Cold build skipped {len(models) - len(built_models)} of {len(models)} models.")
+            return __build_cold
+
+        def __prepare_warm(directory=directory, repository=repository):
+            config_path = generate_repository(directory, repository, scale)
+            BuildProtoBufTxt(FileConfig(config_path).get_config()).build()
+            return lambda: BuildProtoBufTxt(FileConfig(config_path).get_config()).build()
+
+        def __prepare_config(directory=directory, repository=repository):
+            config_path = generate_repository(directory, repository, scale)
+            return lambda: FileConfig(config_path).get_config()
+
+        cases[f"build_cold/{repository}"] = __prepare_cold
+        cases[f"build_warm/{repository}"] = __prepare_warm
+        cases[f"file_config/{repository}"] = __prepare_config
+
+    def __prepare_pbtxt():
+        config = get_large_pbtxt_config(200 * scale)
+        return lambda: dictionary_to_string(config)
+
+    cases["dictionary_to_string"] = __prepare_pbtxt
+    return cases
+
+
+def run_case(workspace: str, scale: int, name: str, repeat: int, queue: multiprocessing.Queue):
+    '''
+    Run a case in its own process, so peak RSS belongs to the case only.
+    Case is prepared again before each run, cold builds always start from an empty build directory.
+    '''
+    os.chdir(workspace)
+    prepare = get_cases(workspace, scale)[name]
+    sys.stdout = open(os.devnull, "w")
+
+    # Time without tracemalloc, which slows down allocations
+    times = []
+    for _ in range(repeat):
+        function = prepare()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # Peak of python allocations
+    function = prepare()
+    tracemalloc.start()
+    function()
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    queue.put({
+        "min_seconds": min(times),
+        "median_seconds": statistics.median(times),
+        "peak_traced_bytes": peak_traced,
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else 0
+    })
+
+
+def load_previous_results() -> dict:
+    '''
+    Load results of the latest previous run. Return empty results if not found.
+    '''
+    if not os.path.isdir(RESULTS_DIR):
+        return {}
+    files = sorted(file for file in os.listdir(
+        RESULTS_DIR) if file.endswith(".json"))
+    if not files:
+        return {}
+    with open(os.path.join(RESULTS_DIR, files[-1]), "r") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of model repository build.')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='Scale of synthetic repositories.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of timed runs of each case.')
+    parser.add_argument('--filter', type=str, default="",
+                        help='Run only cases whose name contains this string.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown reported as regression. Eg: 0.2 is 20%%.')
+    parser.add_argument('--min-delta', type=float, default=5.0,
+                        help='Slowdown in milliseconds below which a case is never reported as regression.')
+    parser.add_argument('--timeout', type=float, default=3600.0,
+                        help='Seconds after which a case is stopped and reported as failed.')
+    args = parser.parse_args()
+
+    previous = load_previous_results()
+    results = {
+        "version": __version__,
+        "python": sys.version.split()[0],
+        "scale": args.scale,
+        "cases": {}
+    }
+    regressions = []
+    failures = []
+
+    with tempfile.TemporaryDirectory() as workspace:
+        for name in get_cases(workspace, args.scale):
+            if args.filter not in name:
+                continue
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=run_case, args=(
+                workspace, args.scale, name, args.repeat, queue))
+            process.start()
+
+            # Result is small, so case process exits without waiting for it to be read
+            process.join(args.timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            try:
+                result = queue.get(
+                    timeout=1) if process.exitcode == 0 else None
+            except Empty:
+                result = None
+            if result is None:
+                failures.append(name)
+                print(f"{name:28s} FAILED (exit code {process.exitcode})")
+                continue
+            results["cases"][name] = result
+
+            # Compare with previous run of the same scale
+            line = f"{name:28s} {result['median_seconds']*1000:10.2f} ms  rss {result['peak_rss_bytes']/2**20:8.1f} MiB  traced {result['peak_traced_bytes']/2**20:8.1f} MiB"
+            old = previous.get("cases", {}).get(
+                name) if previous.get("scale") == args.scale else None
+            if old:
+                change = result["median_seconds"] / \
+                    old["median_seconds"] - 1
+                line += f"  {change*100:+6.1f}%"
+                delta = result["median_seconds"] - old["median_seconds"]
+                if change > args.threshold and delta * 1000 > args.min_delta:
+                    regressions.append(name)
+                    line += "  REGRESSION"
+            print(line)
+
+    # Store results for next run
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    result_path = os.path.join(
+        RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(result_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results: {result_path}")
+
+    if failures:
+        print(f"Failures: {', '.join(failures)}")
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+    if failures or regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -27,13 +27,35 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
+import os
 import argparse
 import shutil
 from ._file_config import FileConfig
 from ._build_pbtxt import BuildProtoBufTxt
+from ._watch import watch_build
+from ._profiler import BuildProfiler
+from ._bundle import write_bundle
+from ._publish import S3Publisher
+from ._oci import write_oci_layout
+from ._cache import MetadataCache
+from ._plan import print_plan
 from ..utils._abstract import TritonConfig
-from ..utils._utils import get_absolute_path
-from ..utils._constants import ERROR_PREFIX, WARNING_PREFIX, BUILD_DIR
+from ..utils._utils import get_absolute_path, get_size_bytes, get_size_string
+from ..utils._constants import (
+    ERROR_PREFIX,
+    WARNING_PREFIX,
+    INFO_PREFIX,
+    SUCCESS_PREFIX,
+    BUILD_DIR,
+    CAS_DIR,
+    PLACEMENT_MODES,
+    PROFILE_REPORT_FILE,
+    PROFILE_TRACE_FILE,
+    BUNDLE_SUFFIX,
+    OCI_SUFFIX,
+    CACHE_FILE,
+    S3_KEEP_VERSIONS
+)
 from ..utils._docker import get_docker_template
 
 
@@ -79,8 +101,76 @@ def main():
     parser.add_argument('--rebuild', action='store_true',
                         help='Rebuild model repository. If provided, model repository will be rebuilt.')
 
+    # Number of parallel build jobs. Eg: 4 (default: 1, 0 for all CPU cores)
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of models built in parallel. Use 0 for all CPU cores.')
+
+    # Memory budget of parallel build jobs. Eg: 8G (default: no limit)
+    parser.add_argument('--max-memory', type=get_size_bytes,
+                        help='Memory budget of models built in parallel. Eg: 512M, 8G. Models are started only while their estimated memory fits.')
+
+    # Placement of unmodified model files. Eg: symlink (default: auto)
+    parser.add_argument('--placement', type=str, choices=PLACEMENT_MODES,
+                        help='Placement of unmodified model files. `auto` uses reflink when supported and hardlinks stored files with `--cas`, `copy` always creates new files, `symlink` links to source files.')
+
+    # Store model files in content-addressed store. Eg: False (default: False)
+    parser.add_argument('--cas', action='store_true',
+                        help=f'Store model files once in `{BUILD_DIR}/{CAS_DIR}` and link version directories to them.')
+
+    # Watch configuration and model files. Eg: False (default: False)
+    parser.add_argument('--watch', action='store_true',
+                        help='Watch configuration file and model files, rebuild changed models. Require -f.')
+
+    # Triton server url to reload changed models in watch mode. Eg: localhost:8000
+    parser.add_argument('--server-url', type=str,
+                        help='Triton server HTTP url. In watch mode, changed models are reloaded with model repository API.')
+
+    # Profile build phases of each model. Eg: False (default: False)
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Record time, I/O and memory of each build phase. Write `{BUILD_DIR}/{PROFILE_REPORT_FILE}` and Chrome trace `{BUILD_DIR}/{PROFILE_TRACE_FILE}`.')
+
+    # Bundle model repository. Eg: False (default: False)
+    parser.add_argument('--bundle', action='store_true',
+                        help=f'Write model repository to a zstd compressed bundle `{BUILD_DIR}/<model_repository>{BUNDLE_SUFFIX}`. Extract it with trsp-unbundle.')
+
+    # Write model repository to OCI image layout. Eg: latest (default: no layout)
+    parser.add_argument('--oci', type=str, nargs='?', const='latest', metavar='TAG',
+                        help=f'Write model repository to OCI image layout `{BUILD_DIR}/<model_repository>{OCI_SUFFIX}`, with a layer for each model version, tagged TAG (default: latest).')
+
+    # Publish model repository to S3 compatible storage. Eg: s3://bucket/path
+    parser.add_argument('--publish', type=str,
+                        help='Publish model repository to S3 compatible storage. Eg: s3://bucket/path/to/repository')
+
+    # Number of published versions kept in storage. Eg: 2 (default: 2)
+    parser.add_argument('--publish-keep', type=int, default=S3_KEEP_VERSIONS,
+                        help='Number of published versions kept in storage, including the new version. Servers must be restarted with a kept version.')
+
+    # Endpoint of S3 compatible storage. Eg: http://localhost:9000
+    parser.add_argument('--endpoint-url', type=str,
+                        help='Endpoint url of S3 compatible storage, eg: MinIO. Default is AWS S3.')
+
+    # Plan build without writing files. Eg: False (default: False)
+    parser.add_argument('--plan', action='store_true',
+                        help='Show models and versions which would be created, rewritten or removed, config.pbtxt diffs and bytes to be written, without building.')
+
     # Parse arguments --------------------------------------------------------
     args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count()
+
+    def __apply_overrides(config: TritonConfig) -> TritonConfig:
+        '''
+        Override configuration with provided arguments.
+        '''
+        if args.placement:
+            config["placement"] = args.placement
+        if args.cas:
+            config["cas"] = True
+        return config
+
+    # Watch mode requires configuration file
+    if args.watch and not args.f:
+        print(ERROR_PREFIX + "Configuration file is required in watch mode. Use -f to specify.")
+        return
 
     # Load configuration file if provided ------------------------------------
     if args.f:
@@ -120,7 +210,6 @@ def main():
         # Add models configuration
         config["models"][args.model_name] = {
             "engine": "onnx",
-            "dtype": "float32",
             "max_batch_size": args.max_batch_size,
             "dynamic_batching": args.dynamic_batching,
             "versions": [
@@ -131,26 +220,91 @@ def main():
             ]
         }
 
+    # Override placement and content-addressed store if provided
+    config = __apply_overrides(config)
+
+    # Plan build without writing files if provided ----------------------------
+    if args.plan:
+        try:
+            print_plan(BuildProtoBufTxt(config).plan(rebuild=args.rebuild))
+        except Exception as e:
+            print(ERROR_PREFIX + str(e))
+        return
+
     # Rebuild model repository if provided ------------------------------------
     if args.rebuild:
         shutil.rmtree(get_absolute_path(
             f"{BUILD_DIR}/{config['model_repository']}"))
 
     # Write to model repository
+    profiler = BuildProfiler(enabled=args.profile)
+    model_repository_url = "/models"
     try:
-        BuildProtoBufTxt(config).build()
+        BuildProtoBufTxt(config, jobs=jobs, profiler=profiler,
+                         max_memory=args.max_memory).build()
+
+        # Bundle model repository if provided
+        if args.bundle:
+            bundle_path = get_absolute_path(
+                f"{BUILD_DIR}/{config['model_repository']}{BUNDLE_SUFFIX}")
+            print(INFO_PREFIX + "Bundling model repository...")
+            size = write_bundle(get_absolute_path(
+                f"{BUILD_DIR}/{config['model_repository']}"), bundle_path)
+            print(SUCCESS_PREFIX +
+                  f"Bundle completed ({get_size_string(size)}). Bundle: {bundle_path}")
+
+        # Write OCI image layout if provided
+        if args.oci:
+            layout_path = get_absolute_path(
+                f"{BUILD_DIR}/{config['model_repository']}{OCI_SUFFIX}")
+            print(INFO_PREFIX + "Writing OCI image layout...")
+            result = write_oci_layout(get_absolute_path(
+                f"{BUILD_DIR}/{config['model_repository']}"), layout_path, args.oci)
+            print(SUCCESS_PREFIX +
+                  f"OCI image layout completed. Wrote {result['written_layers']} of {result['layers']} layers ({get_size_string(result['written_bytes'])}). Layout: {layout_path}:{args.oci}")
+
+        # Publish model repository if provided
+        if args.publish:
+            print(INFO_PREFIX + "Publishing model repository...")
+            publisher = S3Publisher(args.publish, args.endpoint_url, cache=MetadataCache(
+                get_absolute_path(f"{BUILD_DIR}/{CACHE_FILE}")), keep=args.publish_keep)
+            result = publisher.publish(get_absolute_path(
+                f"{BUILD_DIR}/{config['model_repository']}"))
+            model_repository_url = result["url"]
+            if result["unchanged"]:
+                print(INFO_PREFIX +
+                      f"Model repository is up to date. Version: {result['version']}")
+            else:
+                print(SUCCESS_PREFIX +
+                      f"Published version {result['version']}. Uploaded {get_size_string(result['uploaded_bytes'])}, copied {get_size_string(result['copied_bytes'])}, skipped {get_size_string(result['skipped_bytes'])}, deleted {result['deleted_objects']} objects.")
+            print(INFO_PREFIX +
+                  f"Run Triton with --model-repository={model_repository_url}")
     except Exception as e:
         print(ERROR_PREFIX + str(e))
 
+    # Write profile report if enabled
+    if profiler.is_enabled():
+        report_path = get_absolute_path(
+            f"{BUILD_DIR}/{PROFILE_REPORT_FILE}")
+        profiler.write(report_path, get_absolute_path(
+            f"{BUILD_DIR}/{PROFILE_TRACE_FILE}"))
+        print(INFO_PREFIX + f"Profile report: {report_path}")
+
     # Create docker file
     if "requirements" not in config:
         config["requirements"] = []
     try:
         with open(get_absolute_path(BUILD_DIR + "/Dockerfile"), "w") as f:
-            f.write(get_docker_template(config["requirements"]))
+            f.write(get_docker_template(
+                config["requirements"], model_repository_url))
     except Exception as e:
         print(ERROR_PREFIX + str(e))
 
+    # Watch configuration and model files if provided -------------------------
+    if args.watch:
+        watch_build(args.f, lambda: __apply_overrides(
+            FileConfig(args.f).get_config()), jobs=jobs, server_url=args.server_url, max_memory=args.max_memory)
+
 
 # Run main function if module is run directly
 if __name__ == '__main__':
@@ -30,7 +30,35 @@ SOFTWARE.
 import os
 import copy
 import shutil
-import onnx
+import tempfile
+from typing import Callable, Optional
+from ._manifest import BuildManifest
+from ._scheduler import BuildScheduler, get_model_dependencies
+from ._onnx_stream import (
+    GRAPH_INITIALIZER,
+    GRAPH_INPUT,
+    GRAPH_OUTPUT,
+    GraphFieldHandler,
+    ExternalDataConsolidator,
+    get_external_data_locations,
+    patch_batch_axis,
+    rewrite_onnx_graph
+)
+from ._placement import place_file, remove_file, link_tree, publish_directory
+from ._cas import ArtifactStore
+from ._plan import get_changed_fields, get_config_diff
+from ._cache import MetadataCache
+from ._checksums import write_checksums
+from ._onnx_runtime import (
+    get_onnxruntime_version,
+    get_onnx_latency,
+    convert_precision_model,
+    convert_ort_model,
+    optimize_onnx_model,
+    quantize_dynamic_model,
+    quantize_static_model
+)
+from ._profiler import BuildProfiler
 from ..utils._abstract import (
     TritonEnum,
     TritonConfig,
@@ -39,7 +67,11 @@ from ..utils._abstract import (
     FormatedTensors,
     FormatedTritonConfig,
     EnsembleSchedulingConfig,
-    EnsembleSchedulingStep
+    EnsembleSchedulingStep,
+    VersionConfig,
+    BuildResult,
+    QuantizationReport,
+    PlanEntry
 )
 from ..utils._utils import (
     get_absolute_path,
@@ -48,12 +80,24 @@ from ..utils._utils import (
     get_dtype_string,
     get_kind_instance,
     get_file_instruction_string,
-    get_triton_python_model_config_string
+    get_triton_python_model_config_string,
+    get_size_string
 )
 from ..utils._constants import (
     INFO_PREFIX,
     SUCCESS_PREFIX,
-    BUILD_DIR
+    BUILD_DIR,
+    CAS_DIR,
+    CACHE_FILE,
+    STAGING_DIR,
+    EXTERNAL_DATA_FILE,
+    MEMORY_JOB_OVERHEAD,
+    CHECKSUM_FILE,
+    QUANTIZED_MODEL_SUFFIX,
+    CALIBRATION_WINDOW,
+    ONNX_DTYPES,
+    ORT_MODEL_FILE,
+    ORT_SESSION_PARAMETERS
 )
 
 
@@ -63,19 +107,186 @@ class BuildProtoBufTxt:
     Use to build Triton Server model repository and its configuration files.
     '''
 
-    def __init__(self, data: TritonConfig):
+    def __init__(self, data: TritonConfig, jobs: int = 1, profiler: Optional[BuildProfiler] = None, max_memory: Optional[int] = None):
         self.__data = data
+        self.__jobs = jobs
+        self.__max_memory = max_memory
+        self.__profiler = profiler or BuildProfiler()
+        self.__placement = self.__data.get("placement", "auto")
+        self.__store = ArtifactStore(get_absolute_path(
+            f"{BUILD_DIR}/{CAS_DIR}")) if self.__data.get("cas", False) else None
         self.__file_name = "config"
         self.__model_repository = get_absolute_path(
             f"{BUILD_DIR}/{self.__data['model_repository']}")
+        self.__staging_directory = get_absolute_path(
+            f"{BUILD_DIR}/{STAGING_DIR}/{self.__data['model_repository']}")
+        self.__cache = MetadataCache(
+            get_absolute_path(f"{BUILD_DIR}/{CACHE_FILE}"))
+
+        # Add quantized sibling models, built from the same source files
+        for name, model_config in list(self.__data["models"].items()):
+            if "quantize" in model_config and "quantized_from" not in model_config:
+                quantized_config = copy.deepcopy(model_config)
+                quantized_config["quantized_from"] = name
+                quantized_config.pop("precision", None)
+                self.__data["models"][name +
+                                      QUANTIZED_MODEL_SUFFIX] = quantized_config
+
+    def __get_file_hash(self, path: str) -> str:
+        '''
+        Get hash of a source file. Hashes are cached by file size and modified time.
+        '''
+        return self.__cache.get_file_hash(get_absolute_path(path))
+
+    def __get_build_options(self) -> dict:
+        '''
+        Get build options which change built files, so models are rebuilt when they change.
+        '''
+        return {
+            "placement": self.__placement,
+            "cas": self.__store is not None,
+            "unlinked_placement": self.__get_unlinked_placement(),
+            "model_placement": "copy" if self.__store is None and self.__placement == "auto" else self.__placement,
+            "tensor_types": "onnx"
+        }
+
+    def __get_fingerprint(self, name: str, dependencies: list[str], fingerprints: dict[str, str]) -> str:
+        '''
+        Get fingerprint of a model from its config and source files.
+        Ensemble fingerprint also depends on fingerprints of its step models.
+        '''
+        model_config = self.__data["models"][name]
+        artifact_hashes = []
+
+        # Hash source files of each version
+        if model_config["engine"] == "onnx":
+            for version in model_config["versions"]:
+                model_path = get_absolute_path(version["path"])
+                artifact_hashes.append(self.__get_file_hash(model_path))
+
+                # Hash external data files of model
+                for location in get_external_data_locations(self.__cache.get_onnx_metadata(model_path)["external_data"]):
+                    artifact_hashes.append(self.__get_file_hash(
+                        os.path.join(os.path.dirname(model_path), location)))
+            # Output of ONNX Runtime stages depends on its version
+            if self.__get_onnx_stages(model_config):
+                artifact_hashes.append(
+                    f"onnxruntime=={get_onnxruntime_version()}")
+
+            # Hash calibration files of static quantization
+            if "quantized_from" in model_config and model_config["quantize"] == "static":
+                calibration_path = get_absolute_path(
+                    model_config["calibration"]["path"])
+                for file in sorted(os.listdir(calibration_path)):
+                    if file.endswith((".npy", ".npz")):
+                        artifact_hashes.append(
+                            file + self.__get_file_hash(os.path.join(calibration_path, file)))
+        elif model_config["engine"] == "python":
+            for version in model_config["versions"]:
+                artifact_hashes.append(
+                    self.__get_file_hash(version["module"]["path"]))
+
+        return BuildManifest.get_fingerprint(
+            model_config, artifact_hashes, [fingerprints[dependency] for dependency in dependencies], self.__get_build_options())
+
+    def __get_onnx_size(self, model_path: str) -> int:
+        '''
+        Get size of ONNX model file and its external data files.
+        '''
+        size = os.path.getsize(model_path)
+        for location in get_external_data_locations(self.__cache.get_onnx_metadata(model_path)["external_data"]):
+            size += os.path.getsize(os.path.join(
+                os.path.dirname(model_path), location))
+        return size
+
+    def __get_memory_factor(self, model_config: ModelConfig) -> float:
+        '''
+        Get ratio of peak memory to model size while formatting ONNX model.
+        Graph rewrite and external data consolidation stream model files through fixed size buffers,
+        so model size is not held in memory.
+        ONNX Runtime stages load the whole model, and hold the transformed model while saving it.
+        Static quantization also holds the calibration model, with outputs added to it, and its session.
+        '''
+        if "quantized_from" in model_config and model_config["quantize"] == "static":
+            return 3.0
+        if self.__get_onnx_stages(model_config):
+            return 2.0
+        return 0.0
+
+    def __get_memory_estimate(self, name: str) -> int:
+        '''
+        Get estimated memory of building a model in worker process.
+        Versions are built one by one, so the largest version is counted.
+        '''
+        model_config = self.__data["models"][name]
+        if model_config["engine"] != "onnx":
+            return MEMORY_JOB_OVERHEAD
+        size = max(self.__get_onnx_size(get_absolute_path(version["path"]))
+                   for version in model_config["versions"])
+        return MEMORY_JOB_OVERHEAD + int(size * self.__get_memory_factor(model_config))
+
+    def __place_artifact(self, source: str, destination: str, placement: str):
+        '''
+        Place an unmodified source file.
+        If artifact store is enabled, source file is stored once and destination links to it.
+        Files placed with `copy` never share inode with a stored file, so they are placed from source directly.
+        Without artifact store, `auto` never hardlinks source files: editors may write them in place,
+        which would change the served model without going through staging.
+        '''
+        if self.__store is None or placement == "copy":
+            place_file(source, destination,
+                       "copy" if placement == "auto" else placement)
+            return
+        digest = self.__get_file_hash(source)
+        self.__store.add_file(source, digest)
+        self.__store.link(digest, destination, placement)
+
+    def __store_generated(self, path: str, placement: Optional[str] = None):
+        '''
+        Move a generated file into artifact store and link it back, if artifact store is enabled.
+        Files placed with `copy` are kept as they are, eg: external data files.
+        '''
+        placement = placement or self.__placement
+        if self.__store is None or placement == "copy":
+            return
+        digest = self.__store.add_generated(path)
+        self.__store.link(digest, path, placement)
+
+    def __get_unlinked_placement(self) -> str:
+        '''
+        Get placement of files which must not share inode with source files.
+        - External data files: ONNX refuses external data files with multiple hard links.
+        - Python modules: editors may write source files in place, which would change the served model
+          without going through staging. Modules are small, so copying them is cheap.
+        '''
+        return "copy" if self.__placement == "auto" else self.__placement
+
+    def __get_retained_versions(self, name: str, model_config: ModelConfig) -> list[int]:
+        '''
+        Get previously built versions which are kept, although they are no longer declared.
+        With `retention: N`, the latest built versions are kept until the model has N versions.
+        With `retention: declared` (default), only declared versions are built.
+        '''
+        retention = model_config.get("retention", "declared")
+        model_path = os.path.join(self.__model_repository, name)
+        if retention == "declared" or not os.path.isdir(model_path):
+            return []
+
+        declared_versions = {version["version"]
+                             for version in model_config["versions"]}
+        built_versions = sorted((int(directory) for directory in os.listdir(model_path)
+                                 if directory.isdigit() and int(directory) not in declared_versions), reverse=True)
+        return sorted(built_versions[:max(retention - len(declared_versions), 0)])
 
     def __create_folders(self, name: str, model_config: ModelConfig) -> str:
         '''
-        Create model folders and subfolders for each version.
+        Create model folders and subfolders for each version, in staging directory.
+        Previous staging directory of the model is removed.
         '''
         # Create model directory
         model_path = os.path.join(
-            self.__model_repository, name)
+            self.__staging_directory, name)
+        shutil.rmtree(model_path, ignore_errors=True)
         os.makedirs(model_path, exist_ok=True)
 
         # Create version directories. Ignore if engine is ensemble
@@ -84,6 +295,14 @@ class BuildProtoBufTxt:
                 version_path = os.path.join(
                     model_path, str(version["version"]))
                 os.makedirs(version_path, exist_ok=True)
+
+            # Keep previously built versions which are no longer declared, if retention allows
+            retained_versions = self.__get_retained_versions(
+                name, model_config)
+            for version in retained_versions:
+                link_tree(os.path.join(self.__model_repository, name, str(version)),
+                          os.path.join(model_path, str(version)))
+            model_config[f"{name}_retained_versions"] = retained_versions
         # Create at least ensemble version directory
         else:
             version_path = os.path.join(model_path, "1")
@@ -107,6 +326,10 @@ class BuildProtoBufTxt:
         else:
             config["backend"] = get_backend_string(model_config["engine"])
 
+        # Add model file name of ORT format models
+        if model_config.get("format") == "ort":
+            config["default_model_filename"] = ORT_MODEL_FILE
+
         # Add max_batch_size
         config["max_batch_size"] = model_config["max_batch_size"]
 
@@ -127,6 +350,11 @@ class BuildProtoBufTxt:
                 if "max_queue_delay_microseconds" in model_config:
                     config["dynamic_batching"]["max_queue_delay_microseconds"] = model_config["max_queue_delay_microseconds"]
 
+        # Serve declared versions only, if previous versions are kept
+        if model_config.get(f"{name}_retained_versions"):
+            config["version_policy"] = {"specific": {"versions": TritonEnum(
+                sorted(version["version"] for version in model_config["versions"]))}}
+
         # Add instance_group if enabled
         if "instance_group" in model_config:
             config["instance_group"] = []
@@ -141,11 +369,18 @@ class BuildProtoBufTxt:
                     instance_group["gpus"] = TritonEnum(group["gpus"])
                 config["instance_group"].append(instance_group)
 
+        # Let ONNX Runtime use bytes of ORT format model as initializers, without copying them
+        if model_config.get("format") == "ort":
+            config["parameters"] = [{"key": key, "value": {"string_value": value}}
+                                    for key, value in ORT_SESSION_PARAMETERS.items()]
+
         return config
 
-    def __format_onnx(self, path: str, model_config: ModelConfig) -> FormatedInputOutputTensors:
+    def __get_onnx_tensors(self, model_config: ModelConfig) -> FormatedInputOutputTensors:
         '''
-        Process ONNX model and generate input and output configs.
+        Read ONNX model signature and generate input and output configs.
+        All versions of a model share the same configs, so the first version is read.
+        Data types are read from the model, unless `dtype` is provided.
         '''
         def __get_onnx_shape(input_layer) -> list[int]:
             '''
@@ -169,63 +404,219 @@ class BuildProtoBufTxt:
             "output": []
         }
 
-        # Process each version -------------------------------------------------
-        for version in model_config["versions"]:
-            # Load ONNX model
-            model_path = get_absolute_path(version["path"])
-            onnx_model = onnx.load(model_path)
+        # Read inputs and outputs without loading model weights
+        signature = self.__cache.get_onnx_metadata(
+            get_absolute_path(model_config["versions"][0]["path"]))
 
-            # Modify input shape and output if dynamic batching is enabled
-            if "dynamic_batching" in model_config:
-                if model_config["dynamic_batching"]:
-                    # Modify input dimensions param of ONNX model
-                    for i, input_layer in enumerate(onnx_model.graph.input):
-                        input_layer.type.tensor_type.shape.dim[
-                            0].dim_param = f"{input_layer.name}_dynamic_axes_{i+1}"
-
-                    # Modify output dimensions param of ONNX model
-                    for i, output_layer in enumerate(onnx_model.graph.output):
-                        output_layer.type.tensor_type.shape.dim[
-                            0].dim_param = f"{output_layer.name}_dynamic_axes_{i+1}"
-
-            # Get model data type
-            model_data_type = model_config["dtype"] if "dtype" in model_config else "float32"
-
-            # Define mapping values for TritonEnum
-            # If input or output of the model is a string, replace 0 with -1
-            mapping_values = {
-                "0": "-1"
+        def __get_onnx_dtype(layer) -> str:
+            '''
+            Get data type of ONNX tensor, after precision conversion. `dtype` of model config overrides it.
+            '''
+            if "dtype" in model_config:
+                return model_config["dtype"]
+            elem_type = layer.type.tensor_type.elem_type
+            if elem_type not in ONNX_DTYPES:
+                raise ValueError(
+                    f"Data type {elem_type} of ONNX tensor {layer.name} is not supported. Use `dtype` to specify.")
+            if ONNX_DTYPES[elem_type] == "float32" and model_config.get("precision") == "fp16":
+                return "float16"
+            return ONNX_DTYPES[elem_type]
+
+        # Define mapping values for TritonEnum
+        # If input or output of the model is a string, replace 0 with -1
+        mapping_values = {
+            "0": "-1"
+        }
+
+        # Add input configs
+        for input_layer in signature["input"]:
+            input_config: FormatedTensors = {
+                "name": input_layer.name,
+                "data_type": get_dtype_string(__get_onnx_dtype(input_layer)),
+                "dims": TritonEnum(__get_onnx_shape(input_layer), mapping_values=mapping_values)
+            }
+            configs["input"].append(input_config)
+        # Add output configs
+        for output_layer in signature["output"]:
+            output_config: FormatedTensors = {
+                "name": output_layer.name,
+                "data_type": get_dtype_string(__get_onnx_dtype(output_layer)),
+                "dims": TritonEnum(__get_onnx_shape(output_layer), mapping_values=mapping_values)
             }
+            configs["output"].append(output_config)
 
-            # Add input configs
-            for input_layer in onnx_model.graph.input:
-                input_config: FormatedTensors = {
-                    "name": input_layer.name,
-                    "data_type": get_dtype_string(model_data_type),
-                    "dims": TritonEnum(__get_onnx_shape(input_layer), mapping_values=mapping_values)
-                }
-                configs["input"].append(input_config)
-            # Add output configs
-            for output_layer in onnx_model.graph.output:
-                output_config: FormatedTensors = {
-                    "name": output_layer.name,
-                    "data_type": get_dtype_string(model_data_type),
-                    "dims": TritonEnum(__get_onnx_shape(output_layer), mapping_values=mapping_values)
-                }
-                configs["output"].append(output_config)
+        return configs
 
-            # Save ONNX model
-            model_save_path = os.path.join(
-                path, str(version["version"]), "model.onnx"
-            )
-            onnx.save(onnx_model, model_save_path)
+    def __get_onnx_stages(self, model_config: ModelConfig) -> list[tuple[str, Callable[[str, str, bool], None]]]:
+        '''
+        Get stages which transform the whole ONNX model, in order: (profile phase, stage).
+        Each stage reads a model and writes a new model. If its last argument is True,
+        the model has external data, and initializers are written to `<save_path>.data`.
+        '''
+        stages: list[tuple[str, Callable[[str, str, bool], None]]] = []
+        if "quantized_from" in model_config and model_config["quantize"] == "dynamic":
+            stages.append(("onnx_quantize", quantize_dynamic_model))
+        elif "quantized_from" in model_config and model_config["quantize"] == "static":
+            calibration = model_config["calibration"]
+            stages.append(("onnx_quantize", lambda model_path, save_path, external_data: quantize_static_model(
+                model_path, save_path, external_data, get_absolute_path(calibration["path"]),
+                calibration.get("method", "minmax"), calibration.get("window", CALIBRATION_WINDOW))))
+        if "precision" in model_config:
+            stages.append(("onnx_precision", lambda model_path, save_path, external_data: convert_precision_model(
+                model_path, save_path, external_data, model_config["precision"], model_config.get("precision_block_list"))))
+        # ORT format conversion applies optimizations itself
+        if model_config.get("format") == "ort":
+            stages.append(("onnx_ort_format", lambda model_path, save_path, external_data: convert_ort_model(
+                model_path, save_path, model_config.get("optimize", "basic"))))
+        elif "optimize" in model_config:
+            stages.append(("onnx_optimize", lambda model_path, save_path, external_data: optimize_onnx_model(
+                model_path, save_path, model_config["optimize"], external_data)))
+        return stages
+
+    def __get_model_filename(self, model_config: ModelConfig) -> str:
+        '''
+        Get file name of built ONNX model in version directory.
+        '''
+        return ORT_MODEL_FILE if model_config.get("format") == "ort" else "model.onnx"
+
+    def __run_onnx_stages(self, name: str, model_path: str, version_path: str, handlers: dict[int, GraphFieldHandler], external_data: bool):
+        '''
+        Run ONNX stages of a model version. Intermediate models are written in a temporary directory
+        of version directory. Source model is rewritten first if needed, eg: dynamic batch axis,
+        and its external data files are placed next to it. ONNX Runtime resolves symbolic links
+        and refuses external data outside of model directory, and ONNX refuses external data files
+        with multiple hard links, so they are reflinked or copied.
+        '''
+        model_save_path = os.path.join(
+            version_path, self.__get_model_filename(self.__data["models"][name]))
+        data_save_path = model_save_path + ".data"
+        remove_file(model_save_path)
+        remove_file(data_save_path)
+        stages = self.__get_onnx_stages(self.__data["models"][name])
+
+        with tempfile.TemporaryDirectory(prefix=".", dir=version_path) as temp_directory:
+            source_path = model_path
+            if handlers:
+                source_path = os.path.join(temp_directory, "source.onnx")
+                with self.__profiler.phase(name, "onnx_patch"):
+                    rewrite_onnx_graph(model_path, source_path, handlers)
+                for location in get_external_data_locations(self.__cache.get_onnx_metadata(model_path)["external_data"]):
+                    location_path = os.path.join(temp_directory, location)
+                    os.makedirs(os.path.dirname(location_path), exist_ok=True)
+                    place_file(os.path.join(os.path.dirname(
+                        model_path), location), location_path, "copy")
+
+            for i, (phase, stage) in enumerate(stages):
+                save_path = model_save_path if i == len(
+                    stages) - 1 else os.path.join(temp_directory, f"stage_{i}.onnx")
+                with self.__profiler.phase(name, phase):
+                    stage(source_path, save_path, external_data)
+                external_data = os.path.exists(save_path + ".data")
+                source_path = save_path
+
+        with self.__profiler.phase(name, "onnx_save"):
+            self.__store_generated(model_save_path)
+            if os.path.exists(data_save_path):
+                self.__store_generated(
+                    data_save_path, self.__get_unlinked_placement())
+
+    def __get_quantization_report(self, name: str, model_path: str, version_path: str, version: int) -> QuantizationReport:
+        '''
+        Compare size and CPU latency of quantized model version with its source model.
+        '''
+        model_save_path = os.path.join(
+            version_path, self.__get_model_filename(self.__data["models"][name]))
+        data_save_path = model_save_path + ".data"
+        with self.__profiler.phase(name, "onnx_latency"):
+            return {
+                "version": version,
+                "source_bytes": self.__get_onnx_size(model_path),
+                "quantized_bytes": os.path.getsize(model_save_path) + (os.path.getsize(data_save_path) if os.path.exists(data_save_path) else 0),
+                "source_latency_ms": get_onnx_latency(model_path),
+                "quantized_latency_ms": get_onnx_latency(model_save_path)
+            }
+
+    def __format_onnx(self, path: str, name: str, model_config: ModelConfig) -> FormatedInputOutputTensors:
+        '''
+        Process ONNX model and generate input and output configs.
+        '''
+        # Process each version -------------------------------------------------
+        for version in model_config["versions"]:
+            model_path = get_absolute_path(version["path"])
+            model_directory = os.path.dirname(model_path)
+            version_path = os.path.join(path, str(version["version"]))
+            model_save_path = os.path.join(version_path, "model.onnx")
+
+            # Get rewrite handlers of graph fields
+            handlers: dict[int, GraphFieldHandler] = {}
+            if model_config.get("dynamic_batching", False):
+                handlers[GRAPH_INPUT] = patch_batch_axis
+                handlers[GRAPH_OUTPUT] = patch_batch_axis
+
+            # Read external data references without reading tensor data
+            with self.__profiler.phase(name, "onnx_load"):
+                external_tensors = self.__cache.get_onnx_metadata(model_path)[
+                    "external_data"]
+            consolidate = model_config.get(
+                "external_data", "keep") == "consolidate" and len(external_tensors) > 0
+
+            # Transform whole model with ONNX stages, initializers are written to one data file
+            if self.__get_onnx_stages(model_config):
+                self.__run_onnx_stages(
+                    name, model_path, version_path, handlers, len(external_tensors) > 0)
+                if "quantized_from" in model_config:
+                    model_config.setdefault(f"{name}_quantization", []).append(
+                        self.__get_quantization_report(name, model_path, version_path, version["version"]))
+                continue
+
+            # Place ONNX model without rewrite if nothing changes
+            if not handlers and not consolidate:
+                with self.__profiler.phase(name, "onnx_save"):
+                    self.__place_artifact(
+                        model_path, model_save_path, self.__placement)
+
+            # Write ONNX model with external data consolidated into one aligned file.
+            # Remove previous files first, they may be linked to source files.
+            elif consolidate:
+                data_save_path = os.path.join(
+                    version_path, EXTERNAL_DATA_FILE)
+                remove_file(model_save_path)
+                remove_file(data_save_path)
+                with self.__profiler.phase(name, "onnx_patch"), ExternalDataConsolidator(model_directory, data_save_path) as consolidator:
+                    handlers[GRAPH_INITIALIZER] = consolidator.rewrite_tensor
+                    rewrite_onnx_graph(
+                        model_path, model_save_path, handlers)
+                with self.__profiler.phase(name, "onnx_save"):
+                    self.__store_generated(model_save_path)
+                    self.__store_generated(
+                        data_save_path, self.__get_unlinked_placement())
+                continue
+
+            # Write ONNX model with dynamic batch axis
+            else:
+                remove_file(model_save_path)
+                with self.__profiler.phase(name, "onnx_patch"):
+                    rewrite_onnx_graph(
+                        model_path, model_save_path, handlers)
+                with self.__profiler.phase(name, "onnx_save"):
+                    self.__store_generated(model_save_path)
+
+            # Place external data files next to the model
+            for location in get_external_data_locations(external_tensors):
+                location_save_path = os.path.join(version_path, location)
+                os.makedirs(os.path.dirname(
+                    location_save_path), exist_ok=True)
+                with self.__profiler.phase(name, "onnx_save"):
+                    self.__place_artifact(os.path.join(model_directory, location),
+                                          location_save_path, self.__get_unlinked_placement())
 
         # Return input and output configs
-        return configs
+        with self.__profiler.phase(name, "onnx_load"):
+            return self.__get_onnx_tensors(model_config)
 
-    def __format_python(self, path: str, model_name: str, model_config: ModelConfig) -> FormatedInputOutputTensors:
+    def __get_python_tensors(self, model_name: str, model_config: ModelConfig) -> FormatedInputOutputTensors:
         '''
-        Process Python model and generate input and output configs.
+        Generate input and output configs of Python model from its tensor config.
         '''
         # Initialize configs ---------------------------------------------------
         configs: FormatedInputOutputTensors = {
@@ -250,6 +641,14 @@ class BuildProtoBufTxt:
             }
             configs["output"].append(output_config)
 
+        return configs
+
+    def __format_python(self, path: str, model_name: str, model_config: ModelConfig) -> FormatedInputOutputTensors:
+        '''
+        Process Python model and generate input and output configs.
+        '''
+        configs = self.__get_python_tensors(model_name, model_config)
+
         # Write python model file ----------------------------------------------
 
         # Process each version
@@ -260,8 +659,10 @@ class BuildProtoBufTxt:
                 path, str(version["version"])
             )
 
-            # Copy python model file to model directory
-            shutil.copy(model_path, model_directory)
+            # Place python model file to model directory
+            with self.__profiler.phase(model_name, "python_copy"):
+                self.__place_artifact(model_path, os.path.join(
+                    model_directory, os.path.basename(model_path)), self.__get_unlinked_placement())
 
             # Create model.py file
             model_save_path = os.path.join(
@@ -269,7 +670,8 @@ class BuildProtoBufTxt:
             )
 
             # Write model.py file
-            with open(model_save_path, "w") as f:
+            remove_file(model_save_path)
+            with self.__profiler.phase(model_name, "python_template"), open(model_save_path, "w") as f:
                 f.write(get_triton_python_model_config_string(
                     model_name, version["module"], configs))
 
@@ -295,10 +697,10 @@ class BuildProtoBufTxt:
         first_model_name = models[model_name]["steps"][0]["model"]
 
         # Raise error if first model input is not found.
-        # Which mean the ensemble model is placed before the step model.
+        # Which mean the step model is not built before the ensemble model.
         if f"{first_model_name}_input" not in models[first_model_name]:
             raise ValueError(
-                f"Model {first_model_name} input not found. Ensemble model {model_name} must be placed after the {first_model_name} model.")
+                f"Model {first_model_name} input not found. Model {first_model_name} must be built before ensemble model {model_name}.")
 
         configs["input"] = copy.deepcopy(models[
             first_model_name][f"{first_model_name}_input"])
@@ -414,12 +816,82 @@ class BuildProtoBufTxt:
         Write config.pbtxt file to model directory.
         '''
         file_path = os.path.join(path, f"{self.__file_name}.pbtxt")
+        remove_file(file_path)
         with open(file_path, "w") as f:
             f.write(file_string)
 
-    def build(self):
+    def build_model(self, name: str) -> BuildResult:
+        '''
+        Build model directory and its config.pbtxt file.
+        Model is built in staging directory, then published to model repository at once,
+        so Triton never sees a half-written model.
+        Onnx and python models are built in worker processes.
+        '''
+        model_config = self.__data["models"][name]
+        profile_mark = self.__profiler.mark()
+
+        # Create model directory
+        with self.__profiler.phase(name, "create_folders"):
+            model_path = self.__create_folders(name, model_config)
+
+        # Create ONNX model file, if engine is onnx
+        if model_config["engine"] == "onnx":
+            input_output_configs = self.__format_onnx(
+                model_path, name, model_config)
+
+        # Create Python model file, if engine is python
+        elif model_config["engine"] == "python":
+            input_output_configs = self.__format_python(
+                model_path, name, model_config)
+
+        # Create Ensemble model file, if engine is ensemble
+        elif model_config["engine"] == "ensemble":
+            with self.__profiler.phase(name, "ensemble_scheduling"):
+                input_output_configs, scheduling_configs = self.__format_ensemble(
+                    name, self.__data)
+
+        # Raise error if engine is not supported
+        else:
+            raise ValueError(
+                f"Engine {model_config['engine']} is not supported.")
+
+        # Add input and output configs to model config
+        model_config[f"{name}_input"] = input_output_configs["input"]
+        model_config[f"{name}_output"] = input_output_configs["output"]
+
+        # If model is ensemble, add scheduling config
+        if model_config["engine"] == "ensemble":
+            model_config[f"{name}_ensemble_scheduling"] = scheduling_configs
+
+        # Create main config data
+        config = self.__format_config(name, model_config)
+
+        # Generate and write config.pbtxt file
+        with self.__profiler.phase(name, "pbtxt_write"):
+            proto_string = self.__generate_pbtxt_string(config)
+            self.__write_pbtxt(model_path, proto_string)
+
+        # Write checksums of model files, reuse checksums of unchanged files
+        with self.__profiler.phase(name, "checksums"):
+            write_checksums(model_path, os.path.join(
+                self.__model_repository, name))
+
+        # Replace model directory in repository with the staged one
+        with self.__profiler.phase(name, "publish"):
+            publish_directory(model_path, os.path.join(
+                self.__model_repository, name))
+
+        # Events are returned, so events recorded in worker processes reach main process
+        return {
+            "tensors": input_output_configs,
+            "profile": self.__profiler.take_events(profile_mark),
+            "quantization": model_config.get(f"{name}_quantization")
+        }
+
+    def build(self) -> list[str]:
         '''
         Build model repository and its configuration files.
+        Return names of built models, in build order. Skipped models are not included.
         '''
         # Print info -----------------------------------------------------------
         print(INFO_PREFIX + "Building model repository...")
@@ -427,46 +899,254 @@ class BuildProtoBufTxt:
         # Create model_repository directory if not exists
         os.makedirs(self.__model_repository, exist_ok=True)
 
+        # Load manifest of previous build
+        manifest = BuildManifest(self.__model_repository)
+
+        # Create dependency graph of models
+        dependencies = get_model_dependencies(self.__data["models"])
+        # Estimate memory of worker jobs if memory budget is provided
+        memory = {
+            name: self.__get_memory_estimate(name)
+            for name in self.__data["models"] if self.__data["models"][name]["engine"] != "ensemble"
+        } if self.__max_memory is not None else {}
+        scheduler = BuildScheduler(
+            dependencies, self.__jobs, memory, self.__max_memory)
+
+        # Compute fingerprints before model configs are modified by build
+        fingerprints: dict[str, str] = {}
+        for name in scheduler.get_order():
+            with self.__profiler.phase(name, "fingerprint"):
+                fingerprints[name] = self.__get_fingerprint(
+                    name, dependencies[name], fingerprints)
+
+        # Skip models whose config and source files are unchanged
+        skipped_models = [
+            name for name in self.__data["models"]
+            if manifest.is_unchanged(name, fingerprints[name], os.path.join(self.__model_repository, name))
+        ]
+        built_models: list[str] = []
+
+        def __is_local(name: str) -> bool:
+            '''
+            Skipped and ensemble models are processed in main process.
+            '''
+            return name in skipped_models or self.__data["models"][name]["engine"] == "ensemble"
+
+        def __local_build(name: str) -> BuildResult:
+            '''
+            Get recorded configs of skipped model, or build ensemble model.
+            '''
+            if name in skipped_models:
+                # Models built before checksums were added
+                model_path = os.path.join(self.__model_repository, name)
+                if not os.path.isfile(os.path.join(model_path, CHECKSUM_FILE)):
+                    write_checksums(model_path, model_path)
+                return {"tensors": manifest.get_tensors(name), "profile": []}
+            return self.build_model(name)
+
+        def __on_complete(name: str, result: BuildResult):
+            '''
+            Add input and output configs to model config, so ensemble models can use them.
+            '''
+            self.__profiler.add_events(result["profile"])
+            input_output_configs = result["tensors"]
+            model_config = self.__data["models"][name]
+            model_config[f"{name}_input"] = input_output_configs["input"]
+            model_config[f"{name}_output"] = input_output_configs["output"]
+
+            if name in skipped_models:
+                print(INFO_PREFIX + f"Model {name} is up to date. Skipped.")
+            else:
+                # Record built model to manifest
+                manifest.update(
+                    name, fingerprints[name], input_output_configs, result.get("quantization"))
+                built_models.append(name)
+
+                # Print size and latency of quantized versions
+                for report in result.get("quantization") or []:
+                    line = f"Model {name} version {report['version']} quantized: {get_size_string(report['source_bytes'])} to {get_size_string(report['quantized_bytes'])} ({report['quantized_bytes'] / report['source_bytes'] - 1:+.1%})."
+                    if report["source_latency_ms"] is not None and report["quantized_latency_ms"] is not None:
+                        line += f" CPU latency: {report['source_latency_ms']:.2f} ms to {report['quantized_latency_ms']:.2f} ms."
+                    print(INFO_PREFIX + line)
+
         # Process each model ---------------------------------------------------
-        for name, model_config in self.__data["models"].items():
-            # Create model directory
-            model_path = self.__create_folders(name, model_config)
+        # Staging directory is removed even if build fails, published models are kept as they are
+        try:
+            scheduler.run(self.build_model, __is_local,
+                          __local_build, __on_complete)
+        finally:
+            shutil.rmtree(self.__staging_directory, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(self.__staging_directory))
+            except OSError:
+                pass
+
+        # Remove models which are built before, but no longer in configuration
+        for name in manifest.get_models():
+            if name in self.__data["models"]:
+                continue
+            shutil.rmtree(os.path.join(
+                self.__model_repository, name), ignore_errors=True)
+            manifest.remove(name)
+            print(INFO_PREFIX + f"Model {name} is removed from configuration. Pruned.")
+
+        # Remove stored files which are no longer linked
+        if self.__store is not None:
+            removed_count, removed_bytes = self.__store.collect_garbage(
+                get_absolute_path(BUILD_DIR))
+            if removed_count:
+                print(INFO_PREFIX +
+                      f"Removed {removed_count} unused files ({get_size_string(removed_bytes)}) from content-addressed store.")
 
-            # Create ONNX model file, if engine is onnx
-            if model_config["engine"] == "onnx":
-                input_output_configs = self.__format_onnx(
-                    model_path, model_config)
+        # Print success --------------------------------------------------------
+        print(SUCCESS_PREFIX +
+              f"Build completed. Model repository: {self.__model_repository}")
+        return built_models
+
+    def __get_placement_bytes(self, source: str, placement: str) -> tuple[int, int]:
+        '''
+        Get bytes written and linked when an unmodified source file is placed.
+        '''
+        size = os.path.getsize(source)
+        if self.__store is not None and placement != "copy":
+            stored = os.path.exists(self.__store.get_path(
+                self.__get_file_hash(source)))
+            return (0, size) if stored else (size, 0)
+        if placement == "symlink":
+            return 0, size
 
-            # Create Python model file, if engine is python
-            elif model_config["engine"] == "python":
-                input_output_configs = self.__format_python(
-                    model_path, name, model_config)
 
-            # Create Ensemble model file, if engine is ensemble
+        # Source files are reflinked or copied. Reflink support is not known before placing,
+        # so bytes are counted as written.
+        return size, 0
+
+    def __get_version_bytes(self, name: str, model_config: ModelConfig, version: VersionConfig, tensors: FormatedInputOutputTensors) -> tuple[int, int]:
+        '''
+        Get bytes written and linked when a model version is built.
+        '''
+        if model_config["engine"] == "python":
+            written, linked = self.__get_placement_bytes(
+                get_absolute_path(version["module"]["path"]), self.__get_unlinked_placement())
+            written += len(get_triton_python_model_config_string(
+                name, version["module"], tensors).encode())
+            return written, linked
+
+        model_path = get_absolute_path(version["path"])
+        external_tensors = self.__cache.get_onnx_metadata(model_path)[
+            "external_data"]
+        data_paths = [os.path.join(os.path.dirname(model_path), location)
+                      for location in get_external_data_locations(external_tensors)]
+
+        # Consolidated or transformed model and data are written
+        if (model_config.get("external_data", "keep") == "consolidate" and external_tensors) or self.__get_onnx_stages(model_config):
+            return os.path.getsize(model_path) + sum(os.path.getsize(path) for path in data_paths), 0
+
+        # Rewritten model is written, unmodified model is placed
+        if model_config.get("dynamic_batching", False):
+            written, linked = os.path.getsize(model_path), 0
+        else:
+            written, linked = self.__get_placement_bytes(
+                model_path, self.__placement)
+        for path in data_paths:
+            data_written, data_linked = self.__get_placement_bytes(
+                path, self.__get_unlinked_placement())
+            written += data_written
+            linked += data_linked
+        return written, linked
+
+    def plan(self, rebuild: bool = False) -> list[PlanEntry]:
+        '''
+        Plan build without writing any file in build directory.
+        ONNX models are read by headers only, source files are hashed to compare with manifest.
+        If `rebuild` is True, unchanged models are planned to be rewritten.
+        '''
+        self.__cache = MetadataCache(get_absolute_path(
+            f"{BUILD_DIR}/{CACHE_FILE}"), read_only=True)
+        manifest = BuildManifest(self.__model_repository)
+        dependencies = get_model_dependencies(self.__data["models"])
+        order = BuildScheduler(dependencies).get_order()
+
+        fingerprints: dict[str, str] = {}
+        for name in order:
+            fingerprints[name] = self.__get_fingerprint(
+                name, dependencies[name], fingerprints)
+
+        entries: list[PlanEntry] = []
+        for name in order:
+            model_config = self.__data["models"][name]
+            model_path = os.path.join(self.__model_repository, name)
+
+            # Unchanged models use recorded input and output configs
+            if not rebuild and manifest.is_unchanged(name, fingerprints[name], model_path):
+                input_output_configs = manifest.get_tensors(name)
+                model_config[f"{name}_input"] = input_output_configs["input"]
+                model_config[f"{name}_output"] = input_output_configs["output"]
+                entries.append({"model": name, "action": "unchanged", "versions": {}, "changed_fields": [],
+                                "diff": "", "written_bytes": 0, "linked_bytes": 0})
+                continue
+
+            # Generate config.pbtxt without writing model files
+            if model_config["engine"] == "onnx":
+                input_output_configs = self.__get_onnx_tensors(model_config)
+            elif model_config["engine"] == "python":
+                input_output_configs = self.__get_python_tensors(
+                    name, model_config)
             elif model_config["engine"] == "ensemble":
                 input_output_configs, scheduling_configs = self.__format_ensemble(
                     name, self.__data)
-
-            # Raise error if engine is not supported
+                model_config[f"{name}_ensemble_scheduling"] = scheduling_configs
             else:
                 raise ValueError(
                     f"Engine {model_config['engine']} is not supported.")
-
-            # Add input and output configs to model config
             model_config[f"{name}_input"] = input_output_configs["input"]
             model_config[f"{name}_output"] = input_output_configs["output"]
-
-            # If model is ensemble, add scheduling config
-            if model_config["engine"] == "ensemble":
-                model_config[f"{name}_ensemble_scheduling"] = scheduling_configs
-
-            # Create main config data
-            config = self.__format_config(name, model_config)
-
-            # Generate and write config.pbtxt file
-            proto_string = self.__generate_pbtxt_string(config)
-            self.__write_pbtxt(model_path, proto_string)
-
-        # Print success --------------------------------------------------------
-        print(SUCCESS_PREFIX +
-              f"Build completed. Model repository: {self.__model_repository}")
+            retained_versions = self.__get_retained_versions(
+                name, model_config) if model_config["engine"] != "ensemble" else []
+            model_config[f"{name}_retained_versions"] = retained_versions
+            new_config = self.__generate_pbtxt_string(
+                self.__format_config(name, model_config))
+
+            # Read current config.pbtxt
+            config_path = os.path.join(model_path, f"{self.__file_name}.pbtxt")
+            old_config = ""
+            if os.path.exists(config_path):
+                with open(config_path, "r") as f:
+                    old_config = f.read()
+
+            # Plan versions
+            built_versions = {directory for directory in os.listdir(
+                model_path) if directory.isdigit()} if os.path.isdir(model_path) else set()
+            versions: dict[str, str] = {}
+            written_bytes, linked_bytes = len(new_config.encode()), 0
+            for version in model_config.get("versions", []) if model_config["engine"] != "ensemble" else [{"version": 1}]:
+                version_name = str(version["version"])
+                versions[version_name] = "rewrite" if version_name in built_versions else "create"
+                if model_config["engine"] != "ensemble":
+                    version_written, version_linked = self.__get_version_bytes(
+                        name, model_config, version, input_output_configs)
+                    written_bytes += version_written
+                    linked_bytes += version_linked
+            for version in retained_versions:
+                versions[str(version)] = "retain"
+                for root, _, files in os.walk(os.path.join(model_path, str(version))):
+                    linked_bytes += sum(os.path.getsize(os.path.join(root, file))
+                                        for file in files)
+            for version_name in sorted(built_versions - set(versions), key=int):
+                versions[version_name] = "remove"
+
+            entries.append({
+                "model": name,
+                "action": "rewrite" if os.path.isdir(model_path) else "create",
+                "versions": versions,
+                "changed_fields": get_changed_fields(old_config, new_config) if old_config else [],
+                "diff": get_config_diff(old_config, new_config, name) if old_config else "",
+                "written_bytes": written_bytes,
+                "linked_bytes": linked_bytes
+            })
+
+        # Models removed from configuration
+        for name in manifest.get_models():
+            if name not in self.__data["models"]:
+                entries.append({"model": name, "action": "remove", "versions": {}, "changed_fields": [],
+                                "diff": "", "written_bytes": 0, "linked_bytes": 0})
+        return entries
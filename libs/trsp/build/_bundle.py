@@ -0,0 +1,322 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import json
+import stat
+import shutil
+import struct
+import hashlib
+import threading
+from collections import deque
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, Future
+from ._placement import publish_directory
+from ..utils._abstract import BundleEntry
+from ..utils._utils import get_file_hash, get_repository_files, get_empty_directories
+from ..utils._constants import (
+    STAGING_DIR,
+    BUNDLE_MAGIC,
+    BUNDLE_CHUNK_SIZE,
+    BUNDLE_LEVEL
+)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Bundle layout:
+#   magic | zstd frames of file chunks | zstd compressed JSON index | footer
+# Index holds file entries, and empty directories, Eg: versions of ensemble models.
+# Each chunk is an independent zstd frame, so chunks are compressed and extracted in parallel,
+# and files of one model are extracted without reading other models.
+FOOTER = struct.Struct("<QQ8s")  # index offset, index length, magic
+
+
+def _require_zstandard():
+    '''
+    Raise error if zstandard package is not installed.
+    '''
+    if zstandard is None:
+        raise ImportError(
+            "Package `zstandard` is required for bundles. Install it with `pip install zstandard`.")
+
+
+def write_bundle(model_repository: str, bundle_path: str, threads: Optional[int] = None, level: int = BUNDLE_LEVEL) -> int:
+    '''
+    Write model repository to a bundle. Chunks are compressed in parallel threads.
+    Hard linked files, eg: from content-addressed store, are stored once.
+    Return size of bundle in bytes.
+    '''
+    _require_zstandard()
+    threads = threads or os.cpu_count() or 1
+    local = threading.local()
+
+    def __compress(data: bytes) -> bytes:
+        if not hasattr(local, "compressor"):
+            local.compressor = zstandard.ZstdCompressor(
+                level=level, write_checksum=True)
+        return local.compressor.compress(data)
+
+    entries: list[BundleEntry] = []
+    linked: dict[tuple[int, int], BundleEntry] = {}
+    pending: deque[tuple[BundleEntry, Future]] = deque()
+    temp_path = bundle_path + ".tmp"
+
+    with open(temp_path, "wb") as f, ThreadPoolExecutor(max_workers=threads) as pool:
+        f.write(BUNDLE_MAGIC)
+
+        def __write_next():
+            '''
+            Write the oldest compressed chunk, so chunks of a file are written in order.
+            '''
+            entry, future = pending.popleft()
+            data = future.result()
+            entry["chunks"].append([f.tell(), len(data)])
+            f.write(data)
+
+        for path in get_repository_files(model_repository):
+            file_path = os.path.join(model_repository, path)
+            info = os.stat(file_path)
+
+            # Share chunks of hard linked files
+            key = (info.st_dev, info.st_ino)
+            if key in linked:
+                entries.append({**linked[key], "path": path})
+                continue
+
+            entry: BundleEntry = {
+                "path": path,
+                "size": info.st_size,
+                "mode": stat.S_IMODE(info.st_mode),
+                "sha256": "",
+                "chunks": []
+            }
+            file_hash = hashlib.sha256()
+            with open(file_path, "rb") as source:
+                for chunk in iter(lambda: source.read(BUNDLE_CHUNK_SIZE), b""):
+                    file_hash.update(chunk)
+                    pending.append((entry, pool.submit(__compress, chunk)))
+                    # Bound number of chunks held in memory
+                    while len(pending) > threads * 2:
+                        __write_next()
+            entry["sha256"] = file_hash.hexdigest()
+            entries.append(entry)
+            linked[key] = entry
+
+        while pending:
+            __write_next()
+
+        # Write index and footer
+        index = zstandard.ZstdCompressor(level=level).compress(json.dumps(
+            {"chunk_size": BUNDLE_CHUNK_SIZE, "files": entries,
+             "directories": [path for path in get_empty_directories(model_repository) if "/" in path]}).encode())
+        index_offset = f.tell()
+        f.write(index)
+        f.write(FOOTER.pack(index_offset, len(index), BUNDLE_MAGIC))
+        size = f.tell()
+
+    os.replace(temp_path, bundle_path)
+    return size
+
+
+class BundleReader:
+    '''
+    Bundle Reader Class.
+    Read index of a bundle, then verify or extract selected models in parallel threads.
+    '''
+
+    def __init__(self, path: str):
+        _require_zstandard()
+        self.__path = path
+        self.__local = threading.local()
+        self.__chunk_size, self.__entries, self.__directories = self.__read_index()
+
+    def __read_index(self) -> tuple[int, list[BundleEntry], list[str]]:
+        '''
+        Read index from footer of bundle. Raise error if bundle is invalid.
+        '''
+        with open(self.__path, "rb") as f:
+            if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                raise ValueError(
+                    f"{self.__path} is not a model repository bundle.")
+            f.seek(0, os.SEEK_END)
+            if f.tell() < len(BUNDLE_MAGIC) + FOOTER.size:
+                raise ValueError(f"Bundle {self.__path} is truncated.")
+            f.seek(-FOOTER.size, os.SEEK_END)
+            index_offset, index_length, magic = FOOTER.unpack(
+                f.read(FOOTER.size))
+            if magic != BUNDLE_MAGIC:
+                raise ValueError(f"Bundle {self.__path} is truncated.")
+            f.seek(index_offset)
+            index = json.loads(zstandard.ZstdDecompressor().decompress(
+                f.read(index_length)))
+
+        # Reject paths outside of destination directory
+        directories = index.get("directories", [])
+        for path in [entry["path"] for entry in index["files"]] + directories:
+            if path.startswith("/") or ".." in path.split("/"):
+                raise ValueError(
+                    f"Bundle {self.__path} has invalid path: {path}.")
+        return index["chunk_size"], index["files"], directories
+
+    def __read_chunk(self, fd: int, offset: int, length: int) -> bytes:
+        '''
+        Read and decompress a chunk. Frame checksum is verified by zstd.
+        '''
+        if not hasattr(self.__local, "decompressor"):
+            self.__local.decompressor = zstandard.ZstdDecompressor()
+        return self.__local.decompressor.decompress(os.pread(fd, length, offset))
+
+    def get_models(self) -> list[str]:
+        '''
+        Get names of models in bundle.
+        '''
+        return sorted({entry["path"].split("/")[0] for entry in self.__entries}
+                      | {path.split("/")[0] for path in self.__directories})
+
+    def get_entries(self, models: Optional[list[str]] = None) -> list[BundleEntry]:
+        '''
+        Get file entries of selected models, or all files. Raise error if a model is not in bundle.
+        '''
+        if models is None:
+            return list(self.__entries)
+        for model in models:
+            if model not in self.get_models():
+                raise ValueError(f"Model {model} not found in bundle.")
+        return [entry for entry in self.__entries if entry["path"].split("/")[0] in models]
+
+    def verify(self, models: Optional[list[str]] = None, threads: Optional[int] = None) -> list[str]:
+        '''
+        Verify checksums of files in bundle without extracting them.
+        Return paths of corrupted files.
+        '''
+        fd = os.open(self.__path, os.O_RDONLY)
+
+        def __is_valid(entry: BundleEntry) -> bool:
+            file_hash = hashlib.sha256()
+            try:
+                for offset, length in entry["chunks"]:
+                    file_hash.update(self.__read_chunk(fd, offset, length))
+            except zstandard.ZstdError:
+                return False
+            return file_hash.hexdigest() == entry["sha256"]
+
+        try:
+            entries = self.get_entries(models)
+            with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as pool:
+                return [entry["path"] for entry, valid in zip(entries, pool.map(__is_valid, entries)) if not valid]
+        finally:
+            os.close(fd)
+
+    def extract(self, destination: str, models: Optional[list[str]] = None, threads: Optional[int] = None) -> list[str]:
+        '''
+        Extract selected models, or all models, to destination directory.
+        Chunks are extracted in parallel threads, then checksums of extracted files are verified.
+        Each model is extracted to a staging directory and replaces the existing model directory at once.
+        Return names of extracted models.
+        '''
+        entries = self.get_entries(models)
+        extracted_models = sorted(models or self.get_models())
+        staging_directory = os.path.join(destination, STAGING_DIR)
+        for model in extracted_models:
+            shutil.rmtree(os.path.join(staging_directory, model),
+                          ignore_errors=True)
+        for path in self.__directories:
+            if path.split("/")[0] in extracted_models:
+                os.makedirs(os.path.join(
+                    staging_directory, path), exist_ok=True)
+
+        # Create files with their final size, so chunks are written at their offsets in any order
+        for entry in entries:
+            file_path = os.path.join(staging_directory, entry["path"])
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as f:
+                f.truncate(entry["size"])
+
+        def __extract_chunk(file_path: str, offset: int, length: int, position: int):
+            try:
+                data = self.__read_chunk(fd, offset, length)
+            except zstandard.ZstdError as e:
+                raise ValueError(
+                    f"Corrupted chunk of {os.path.relpath(file_path, staging_directory)}: {e}.")
+            output = os.open(file_path, os.O_WRONLY)
+            try:
+                os.pwrite(output, data, position)
+            finally:
+                os.close(output)
+
+        def __is_valid(entry: BundleEntry) -> bool:
+            return get_file_hash(os.path.join(staging_directory, entry["path"])) == entry["sha256"]
+
+        fd = os.open(self.__path, os.O_RDONLY)
+        try:
+            with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as pool:
+                futures = [
+                    pool.submit(__extract_chunk, os.path.join(staging_directory, entry["path"]),
+                                offset, length, index * self.__chunk_size)
+                    for entry in entries
+                    for index, (offset, length) in enumerate(entry["chunks"])
+                ]
+                for future in futures:
+                    future.result()
+
+                # Verify extracted files
+                corrupted = [entry["path"] for entry, valid in zip(
+                    entries, pool.map(__is_valid, entries)) if not valid]
+            if corrupted:
+                raise ValueError(
+                    f"Checksum mismatch of extracted files: {', '.join(corrupted)}.")
+        except BaseException:
+            # Existing models are kept if extraction failed
+            for model in extracted_models:
+                shutil.rmtree(os.path.join(staging_directory, model),
+                              ignore_errors=True)
+            try:
+                os.rmdir(staging_directory)
+            except OSError:
+                pass
+            raise
+        finally:
+            os.close(fd)
+
+        # Restore file modes and publish models
+        for entry in entries:
+            os.chmod(os.path.join(staging_directory,
+                     entry["path"]), entry["mode"])
+        for model in extracted_models:
+            publish_directory(os.path.join(staging_directory, model),
+                              os.path.join(destination, model))
+        try:
+            os.rmdir(staging_directory)
+        except OSError:
+            pass
+        return extracted_models
@@ -0,0 +1,150 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import json
+import sqlite3
+from typing import Optional
+import onnx
+from ._onnx_stream import read_onnx_metadata
+from ..utils._abstract import OnnxMetadata
+from ..utils._utils import get_file_hash
+
+
+class MetadataCache:
+    '''
+    Metadata Cache Class.
+    SQLite cache of source file hashes and ONNX model metadata.
+    File hashes are keyed by path, size and modified time, ONNX metadata is keyed by file hash,
+    so unchanged files are neither hashed nor parsed again.
+    If `read_only` is True, cache file is never created or written, new entries are kept in memory.
+    '''
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.__path = path
+        self.__read_only = read_only
+        self.__connection: Optional[sqlite3.Connection] = None
+        self.__file_hashes: dict[tuple[str, int, int], str] = {}
+        self.__metadata: dict[str, OnnxMetadata] = {}
+
+    def __getstate__(self) -> dict:
+        '''
+        Connection is not sent to worker processes. Each process opens its own connection.
+        '''
+        state = self.__dict__.copy()
+        state["_MetadataCache__connection"] = None
+        return state
+
+    def __get_connection(self) -> Optional[sqlite3.Connection]:
+        '''
+        Open cache database and create tables if not exist.
+        In read-only mode, return None if cache database can not be opened.
+        Database is opened as immutable, so even its shared memory file is not touched.
+        Entries not checkpointed from write-ahead log are missed, and computed again.
+        '''
+        if self.__connection is None and self.__read_only:
+            try:
+                self.__connection = sqlite3.connect(
+                    f"file:{self.__path}?mode=ro&immutable=1", uri=True, timeout=30)
+                self.__connection.execute(
+                    "SELECT 1 FROM files, onnx_metadata LIMIT 1")
+            except sqlite3.Error:
+                self.__connection = None
+            return self.__connection
+        if self.__connection is None:
+            os.makedirs(os.path.dirname(self.__path), exist_ok=True)
+            self.__connection = sqlite3.connect(self.__path, timeout=30)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)")
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS onnx_metadata (sha256 TEXT PRIMARY KEY, signature BLOB, opset TEXT, external_data TEXT, initializer_bytes INTEGER)")
+            self.__connection.commit()
+        return self.__connection
+
+    def get_file_hash(self, path: str) -> str:
+        '''
+        Get sha256 hash of a file. File is hashed again only if its size or modified time changed.
+        '''
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key in self.__file_hashes:
+            return self.__file_hashes[key]
+
+        connection = self.__get_connection()
+        row = connection.execute(
+            "SELECT sha256 FROM files WHERE path = ? AND size = ? AND mtime_ns = ?", key).fetchone() if connection else None
+        if row is not None:
+            digest = row[0]
+        else:
+            digest = get_file_hash(path)
+            if not self.__read_only:
+                connection.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", key + (digest,))
+                connection.commit()
+
+        self.__file_hashes[key] = digest
+        return digest
+
+    def get_onnx_metadata(self, path: str) -> OnnxMetadata:
+        '''
+        Get ONNX model metadata. Model is parsed only if its hash is not cached.
+        '''
+        digest = self.get_file_hash(path)
+        if digest in self.__metadata:
+            return self.__metadata[digest]
+
+        connection = self.__get_connection()
+        row = connection.execute(
+            "SELECT signature, opset, external_data, initializer_bytes FROM onnx_metadata WHERE sha256 = ?", (digest,)).fetchone() if connection else None
+        if row is not None:
+            signature = onnx.GraphProto.FromString(row[0])
+            metadata: OnnxMetadata = {
+                "input": list(signature.input),
+                "output": list(signature.output),
+                "opset": json.loads(row[1]),
+                "external_data": json.loads(row[2]),
+                "initializer_bytes": row[3]
+            }
+        else:
+            metadata = read_onnx_metadata(path)
+            signature = onnx.GraphProto(
+                input=metadata["input"], output=metadata["output"])
+            if not self.__read_only:
+                connection.execute("INSERT OR REPLACE INTO onnx_metadata VALUES (?, ?, ?, ?, ?)", (
+                    digest,
+                    signature.SerializeToString(),
+                    json.dumps(metadata["opset"]),
+                    json.dumps(metadata["external_data"]),
+                    metadata["initializer_bytes"]
+                ))
+                connection.commit()
+
+        self.__metadata[digest] = metadata
+        return metadata
@@ -0,0 +1,154 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import stat
+import shutil
+import tempfile
+from ._placement import place_file, remove_file
+from ..utils._utils import get_file_hash
+
+
+class ArtifactStore:
+    '''
+    Artifact Store Class.
+    Content-addressed store of model files, keyed by sha256 hash.
+    Model version directories link to stored files, so the same file is stored once.
+    '''
+
+    def __init__(self, root: str):
+        self.__root = root
+        self.__temp_directory = os.path.join(self.__root, "tmp")
+
+    def get_path(self, digest: str) -> str:
+        '''
+        Get path of a stored file from its hash.
+        '''
+        return os.path.join(self.__root, "sha256", digest[:2], digest)
+
+    def __get_temp_path(self) -> str:
+        '''
+        Create an empty temporary file inside store, so it can be moved into store atomically.
+        '''
+        os.makedirs(self.__temp_directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.__temp_directory)
+        os.close(fd)
+        return temp_path
+
+    def __add(self, temp_path: str, digest: str) -> str:
+        '''
+        Move a temporary file into store. Stored files are read-only.
+        '''
+        object_path = self.get_path(digest)
+        if os.path.exists(object_path):
+            os.unlink(temp_path)
+            return object_path
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        os.chmod(temp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(temp_path, object_path)
+        return object_path
+
+    def add_file(self, source: str, digest: str) -> str:
+        '''
+        Add a source file to store if not stored yet. Source file is copied, never linked,
+        so later changes of source file do not change stored file.
+        '''
+        object_path = self.get_path(digest)
+        if os.path.exists(object_path):
+            return object_path
+        temp_path = self.__get_temp_path()
+        place_file(source, temp_path, "copy")
+        return self.__add(temp_path, digest)
+
+    def add_generated(self, path: str) -> str:
+        '''
+        Move a generated file into store, and return its hash.
+        '''
+        digest = get_file_hash(path)
+        temp_path = self.__get_temp_path()
+        os.replace(path, temp_path)
+        self.__add(temp_path, digest)
+        return digest
+
+    def link(self, digest: str, destination: str, placement: str = "auto"):
+        '''
+        Link destination to a stored file.
+        Hardlink is used to keep the model repository self-contained,
+        relative symbolic link is used if placement is `symlink`,
+        stored file is reflinked or copied if placement is `copy`.
+        '''
+        object_path = self.get_path(digest)
+        remove_file(destination)
+        if placement == "symlink":
+            os.symlink(os.path.relpath(object_path,
+                       os.path.dirname(destination)), destination)
+            return
+        if placement == "copy":
+            place_file(object_path, destination, "copy")
+            return
+        try:
+            os.link(object_path, destination)
+        except OSError:
+            place_file(object_path, destination, "copy")
+
+    def collect_garbage(self, build_directory: str) -> tuple[int, int]:
+        '''
+        Remove stored files which are not linked from any model repository in build directory.
+        A stored file is in use if it has other hard links, or a symbolic link in build directory points to it.
+        Return number and total size of removed files.
+        '''
+        objects_directory = os.path.join(self.__root, "sha256")
+        if not os.path.isdir(objects_directory):
+            return 0, 0
+
+        # Find stored files referenced by symbolic links
+        referenced: set[str] = set()
+        for root, directories, files in os.walk(build_directory):
+            directories[:] = [directory for directory in directories
+                              if os.path.join(root, directory) != self.__root]
+            for file in files:
+                path = os.path.join(root, file)
+                if os.path.islink(path):
+                    referenced.add(os.path.realpath(path))
+
+        # Remove stored files without other links
+        removed_count, removed_bytes = 0, 0
+        for root, _, files in os.walk(objects_directory):
+            for file in files:
+                path = os.path.join(root, file)
+                info = os.stat(path)
+                if info.st_nlink > 1 or os.path.realpath(path) in referenced:
+                    continue
+                os.unlink(path)
+                removed_count += 1
+                removed_bytes += info.st_size
+
+        # Remove temporary files left by interrupted builds
+        shutil.rmtree(self.__temp_directory, ignore_errors=True)
+        return removed_count, removed_bytes
@@ -0,0 +1,231 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from ..utils._abstract import ChecksumEntry, ChecksumManifest, VerifyIssue
+from ..utils._constants import CHECKSUM_FILE, CHECKSUM_CHUNK_SIZE, HASH_CHUNK_SIZE
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+def get_checksum_algorithm() -> str:
+    '''
+    Get fastest available checksum algorithm.
+    '''
+    return "xxh3_128" if xxhash is not None else "blake2b"
+
+
+def get_chunk_hash(path: str, algorithm: str, offset: int, length: int) -> str:
+    '''
+    Get hash of a chunk of file.
+    '''
+    if algorithm == "xxh3_128":
+        if xxhash is None:
+            raise ImportError(
+                "Package `xxhash` is required for checksums. Install it with `pip install xxhash`.")
+        chunk_hash = xxhash.xxh3_128()
+    elif algorithm == "blake2b":
+        chunk_hash = hashlib.blake2b(digest_size=16)
+    else:
+        raise ValueError(f"Checksum algorithm {algorithm} is not supported.")
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while length > 0:
+            data = f.read(min(HASH_CHUNK_SIZE, length))
+            if not data:
+                break
+            chunk_hash.update(data)
+            length -= len(data)
+    return chunk_hash.hexdigest()
+
+
+def get_chunk_ranges(size: int, chunk_size: int) -> list[tuple[int, int]]:
+    '''
+    Get offset and length of each chunk of a file. Empty file has one empty chunk.
+    '''
+    return [(offset, min(chunk_size, size - offset)) for offset in range(0, size, chunk_size)] or [(0, 0)]
+
+
+def get_file_checksum(path: str, algorithm: str, chunk_size: int = CHECKSUM_CHUNK_SIZE) -> ChecksumEntry:
+    '''
+    Get size and chunk hashes of a file.
+    '''
+    info = os.stat(path)
+    return {
+        "size": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "chunks": [get_chunk_hash(path, algorithm, offset, length)
+                   for offset, length in get_chunk_ranges(info.st_size, chunk_size)]
+    }
+
+
+def load_checksums(model_path: str) -> Optional[ChecksumManifest]:
+    '''
+    Load checksum manifest of a model directory. Return None if not found or invalid.
+    '''
+    try:
+        with open(os.path.join(model_path, CHECKSUM_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_checksums(model_path: str, previous_path: Optional[str] = None):
+    '''
+    Write checksum manifest of all files in a model directory.
+    Entries of previous manifest are reused for files with the same size and modified time,
+    Eg: linked model files and kept versions.
+    '''
+    algorithm = get_checksum_algorithm()
+    previous = load_checksums(previous_path) if previous_path else None
+    previous_files = previous["files"] if previous and previous["algorithm"] == algorithm \
+        and previous["chunk_size"] == CHECKSUM_CHUNK_SIZE else {}
+
+    files: dict[str, ChecksumEntry] = {}
+    for root, _, file_names in os.walk(model_path):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            path = os.path.relpath(file_path, model_path).replace(os.sep, "/")
+            if path in (CHECKSUM_FILE, CHECKSUM_FILE + ".tmp"):
+                continue
+            info = os.stat(file_path)
+            entry = previous_files.get(path)
+            if entry is not None and entry["size"] == info.st_size and entry["mtime_ns"] == info.st_mtime_ns:
+                files[path] = entry
+            else:
+                files[path] = get_file_checksum(
+                    file_path, algorithm, CHECKSUM_CHUNK_SIZE)
+
+    # Written to a temporary file first, then replaced
+    manifest: ChecksumManifest = {"algorithm": algorithm,
+                                  "chunk_size": CHECKSUM_CHUNK_SIZE, "files": dict(sorted(files.items()))}
+    temp_path = os.path.join(model_path, CHECKSUM_FILE + ".tmp")
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, os.path.join(model_path, CHECKSUM_FILE))
+
+
+def _verify_chunk(task: tuple[str, str, int, int, str]) -> bool:
+    '''
+    Check hash of a file chunk. Run in worker process.
+    '''
+    path, algorithm, offset, length, expected = task
+    return get_chunk_hash(path, algorithm, offset, length) == expected
+
+
+def verify_repository(repository: str, models: Optional[list[str]] = None, jobs: Optional[int] = None) -> list[VerifyIssue]:
+    '''
+    Verify files of a deployed model repository against checksum manifests of its models.
+    Sizes are checked first, then chunks of all files are hashed in parallel processes,
+    so a single large file is also verified on all cores.
+    Return mismatched files. Paths are relative to repository.
+    '''
+    if models is None:
+        models = sorted(model for model in os.listdir(repository)
+                        if not model.startswith(".") and os.path.isdir(os.path.join(repository, model)))
+
+    issues: list[VerifyIssue] = []
+    tasks: list[tuple[str, str, int, int, str]] = []
+    task_paths: list[str] = []
+    for model in models:
+        model_path = os.path.join(repository, model)
+        manifest = load_checksums(model_path)
+        if manifest is None:
+            issues.append({"path": model, "reason": "no_checksums"})
+            continue
+        for path, entry in manifest["files"].items():
+            file_path = os.path.join(model_path, path)
+            if not os.path.isfile(file_path):
+                issues.append(
+                    {"path": f"{model}/{path}", "reason": "missing"})
+                continue
+            if os.path.getsize(file_path) != entry["size"]:
+                issues.append({"path": f"{model}/{path}", "reason": "size"})
+                continue
+            for (offset, length), expected in zip(get_chunk_ranges(entry["size"], manifest["chunk_size"]), entry["chunks"]):
+                tasks.append(
+                    (file_path, manifest["algorithm"], offset, length, expected))
+                task_paths.append(f"{model}/{path}")
+
+    # Hash chunks in parallel
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        results = pool.map(_verify_chunk, tasks,
+                           chunksize=max(len(tasks) // ((jobs or os.cpu_count()) * 4), 1))
+        mismatched = sorted({path for path, valid in zip(
+            task_paths, results) if not valid})
+    issues.extend({"path": path, "reason": "hash"} for path in mismatched)
+    return issues
+
+
+def repair_files(repository: str, source: str, issues: list[VerifyIssue]) -> list[str]:
+    '''
+    Replace mismatched files with files from source repository, Eg: the build directory.
+    Source file is checked against checksum manifest of deployed model first.
+    Files are replaced at once, so readers never see a partially written file.
+    Return paths of repaired files.
+    '''
+    repaired: list[str] = []
+    manifests: dict[str, Optional[ChecksumManifest]] = {}
+    for issue in issues:
+        if issue["reason"] == "no_checksums":
+            continue
+        model, path = issue["path"].split("/", 1)
+        if model not in manifests:
+            manifests[model] = load_checksums(os.path.join(repository, model))
+        manifest = manifests[model]
+        source_path = os.path.join(source, issue["path"])
+        if manifest is None or not os.path.isfile(source_path):
+            continue
+
+        # Skip source file if it does not match either
+        expected = manifest["files"][path]
+        checksum = get_file_checksum(
+            source_path, manifest["algorithm"], manifest["chunk_size"])
+        if checksum["size"] != expected["size"] or checksum["chunks"] != expected["chunks"]:
+            continue
+
+        destination = os.path.join(repository, issue["path"])
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(destination))
+        os.close(fd)
+        shutil.copyfile(source_path, temp_path)
+        shutil.copymode(source_path, temp_path)
+        os.replace(temp_path, destination)
+        repaired.append(issue["path"])
+    return repaired
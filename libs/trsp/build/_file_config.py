@@ -29,6 +29,7 @@ SOFTWARE.
 
 import yaml
 from ..utils._abstract import TritonConfig
+from ..utils._constants import PLACEMENT_MODES, EXTERNAL_DATA_MODES, OPTIMIZE_LEVELS, QUANTIZE_MODES, QUANTIZED_MODEL_SUFFIX, CALIBRATION_METHODS, PRECISION_MODES, MODEL_FORMATS
 
 
 class FileConfig:
@@ -82,6 +83,47 @@ class FileConfig:
                         assert "execute" in version[
                             "module"], f"Model `execute` not found in configuration module: {model}."
 
+            # If external_data is present, check if it is valid
+            if "external_data" in model_config:
+                assert model_config["external_data"] in EXTERNAL_DATA_MODES, f"Model `external_data` must be one of {EXTERNAL_DATA_MODES}: {model}."
+
+            # If optimize is present, check if it is valid
+            if "optimize" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `optimize` is only supported for onnx engine: {model}."
+                assert model_config["optimize"] in OPTIMIZE_LEVELS, f"Model `optimize` must be one of {OPTIMIZE_LEVELS}: {model}."
+
+            # If quantize is present, check if it is valid
+            if "quantize" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `quantize` is only supported for onnx engine: {model}."
+                assert model_config["quantize"] in QUANTIZE_MODES, f"Model `quantize` must be one of {QUANTIZE_MODES}: {model}."
+                assert model + QUANTIZED_MODEL_SUFFIX not in configs["models"], f"Model `{model}{QUANTIZED_MODEL_SUFFIX}` is created by `quantize`, and can not be defined: {model}."
+
+                # Static quantization requires calibration data
+                if model_config["quantize"] == "static":
+                    assert "calibration" in model_config, f"Model `calibration` not found in configuration models: {model}."
+                    assert "path" in model_config["calibration"], f"Model `path` not found in configuration calibration: {model}."
+                    assert model_config["calibration"].get("method", "minmax") in CALIBRATION_METHODS, f"Model calibration `method` must be one of {CALIBRATION_METHODS}: {model}."
+                    window = model_config["calibration"].get("window", 1)
+                    assert isinstance(window, int) and not isinstance(window, bool) and window > 0, f"Model calibration `window` must be a positive number of samples: {model}."
+
+            # If precision is present, check if it is valid
+            if "precision" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `precision` is only supported for onnx engine: {model}."
+                assert model_config["precision"] in PRECISION_MODES, f"Model `precision` must be one of {PRECISION_MODES}: {model}."
+            if "precision_block_list" in model_config:
+                assert isinstance(model_config["precision_block_list"], list), f"Model `precision_block_list` must be a list of operator types: {model}."
+
+            # If format is present, check if it is valid
+            if "format" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `format` is only supported for onnx engine: {model}."
+                assert model_config["format"] in MODEL_FORMATS, f"Model `format` must be one of {MODEL_FORMATS}: {model}."
+
+            # If retention is present, check if it is valid
+            if "retention" in model_config:
+                retention = model_config["retention"]
+                assert retention == "declared" or (isinstance(retention, int) and not isinstance(retention, bool) and retention > 0), \
+                    f"Model `retention` must be `declared` or a positive number of kept versions: {model}."
+
             # If engine is ensemble, check if ensemble field is valid
             if model_config["engine"] == "ensemble":
                 assert "steps" in model_config, f"Model `steps` not found in configuration models: {model}."
@@ -113,6 +155,14 @@ class FileConfig:
                     assert "dims" in out, f"Model `dims` not found in configuration output: {model}."
                     assert "dtype" in out, f"Model `dtype` not found in configuration output: {model}."
 
+        # Check for placement field
+        if "placement" in configs:
+            assert configs["placement"] in PLACEMENT_MODES, f"Placement `{configs['placement']}` is not supported. Supported placements: {PLACEMENT_MODES}."
+
+        # Check for cas field
+        if "cas" in configs:
+            assert isinstance(configs["cas"], bool), "Field `cas` must be true or false."
+
         # Check for application field
         if "app" in configs:
             assert "path" in configs["app"], "Application `path` not found in configuration file."
@@ -0,0 +1,162 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import json
+import hashlib
+from typing import Optional
+from .. import __version__
+from ..utils._abstract import (
+    TritonEnum,
+    ModelConfig,
+    FormatedInputOutputTensors,
+    ManifestModelEntry,
+    QuantizationReport
+)
+from ..utils._constants import MANIFEST_FILE
+
+
+class BuildManifest:
+    '''
+    Build Manifest Class.
+    Used to record fingerprints of built models, so unchanged models can be skipped on next build.
+    '''
+
+    def __init__(self, model_repository: str):
+        self.__file_path = os.path.join(model_repository, MANIFEST_FILE)
+        self.__models = self.__load_manifest()
+
+    def __load_manifest(self) -> dict[str, ManifestModelEntry]:
+        '''
+        Load manifest file. Return empty manifest if file not found or invalid.
+        '''
+        if not os.path.exists(self.__file_path):
+            return {}
+        try:
+            with open(self.__file_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        # Manifest of other trsp version is ignored.
+        if manifest.get("version") != __version__:
+            return {}
+        return manifest.get("models", {})
+
+    def __serialize_tensors(self, tensors: FormatedInputOutputTensors) -> dict:
+        '''
+        Convert input and output configs to json serializable dictionary.
+        '''
+        return {
+            key: [{name: str(value) for name, value in tensor.items()} for tensor in tensors[key]]
+            for key in ("input", "output")
+        }
+
+    def __deserialize_tensors(self, tensors: dict) -> FormatedInputOutputTensors:
+        '''
+        Convert json dictionary back to input and output configs.
+        '''
+        return {
+            key: [
+                {
+                    "name": tensor["name"],
+                    "data_type": TritonEnum(tensor["data_type"]),
+                    "dims": TritonEnum(tensor["dims"])
+                } for tensor in tensors[key]
+            ]
+            for key in ("input", "output")
+        }
+
+    @staticmethod
+    def get_fingerprint(model_config: ModelConfig, artifact_hashes: list[str], dependencies: list[str], options: dict) -> str:
+        '''
+        Get fingerprint of a model from its normalized config, build options,
+        source artifacts hashes and fingerprints of models it depends on.
+        '''
+        fingerprint = hashlib.sha256()
+        fingerprint.update(__version__.encode())
+        fingerprint.update(json.dumps(
+            model_config, sort_keys=True, default=str).encode())
+        fingerprint.update(json.dumps(options, sort_keys=True).encode())
+        for value in artifact_hashes + dependencies:
+            fingerprint.update(value.encode())
+        return fingerprint.hexdigest()
+
+    def is_unchanged(self, name: str, fingerprint: str, model_path: str) -> bool:
+        '''
+        Check if model is built with the same fingerprint and its files still exist.
+        '''
+        if name not in self.__models:
+            return False
+        if self.__models[name]["fingerprint"] != fingerprint:
+            return False
+        return os.path.exists(os.path.join(model_path, "config.pbtxt"))
+
+    def get_tensors(self, name: str) -> FormatedInputOutputTensors:
+        '''
+        Get recorded input and output configs of a model.
+        '''
+        return self.__deserialize_tensors(self.__models[name]["tensors"])
+
+    def get_models(self) -> list[str]:
+        '''
+        Get names of recorded models.
+        '''
+        return list(self.__models)
+
+    def remove(self, name: str):
+        '''
+        Remove a model from manifest and write manifest file.
+        '''
+        self.__models.pop(name, None)
+        self.save()
+
+    def update(self, name: str, fingerprint: str, tensors: FormatedInputOutputTensors, quantization: Optional[list[QuantizationReport]] = None):
+        '''
+        Record a built model and write manifest file.
+        '''
+        self.__models[name] = {
+            "fingerprint": fingerprint,
+            "tensors": self.__serialize_tensors(tensors)
+        }
+        if quantization:
+            self.__models[name]["quantization"] = quantization
+        self.save()
+
+    def save(self):
+        '''
+        Write manifest file. Written to a temporary file first, then replaced.
+        '''
+        temp_path = self.__file_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({
+                "version": __version__,
+                "models": self.__models
+            }, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.__file_path)
@@ -0,0 +1,286 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import json
+import hashlib
+import tarfile
+import tempfile
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from ._checksums import load_checksums
+from ..utils._abstract import OciResult
+from ..utils._utils import get_file_hash
+from ..utils._constants import OCI_MODELS_DIR, OCI_LAYER_CACHE_FILE
+
+MEDIA_TYPE_INDEX = "application/vnd.oci.image.index.v1+json"
+MEDIA_TYPE_MANIFEST = "application/vnd.oci.image.manifest.v1+json"
+MEDIA_TYPE_CONFIG = "application/vnd.oci.image.config.v1+json"
+MEDIA_TYPE_LAYER = "application/vnd.oci.image.layer.v1.tar"
+# Increase when tar format of layers changes, so cached layer digests are not reused
+LAYER_FORMAT = 1
+
+
+class HashingWriter:
+    '''
+    File writer which computes sha256 and size of written data.
+    '''
+
+    def __init__(self, file):
+        self.file = file
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.hash.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+
+def get_layer_groups(model_repository: str) -> list[tuple[str, str, list[str]]]:
+    '''
+    Get layers of model repository: (model, group, relative paths of files).
+    Each version directory of a model is a layer, even if empty, eg: ensemble models.
+    Other files of the model, eg: config.pbtxt, are its last layer.
+    '''
+    groups: list[tuple[str, str, list[str]]] = []
+    for model in sorted(os.listdir(model_repository)):
+        model_path = os.path.join(model_repository, model)
+        if model.startswith(".") or not os.path.isdir(model_path):
+            continue
+        files: dict[str, list[str]] = {
+            version: [] for version in os.listdir(model_path)
+            if version.isdigit() and os.path.isdir(os.path.join(model_path, version))
+        }
+        for root, directories, file_names in os.walk(model_path, followlinks=True):
+            directories.sort()
+            for file_name in file_names:
+                path = os.path.relpath(os.path.join(
+                    root, file_name), model_path).replace(os.sep, "/")
+                group = path.split("/")[0]
+                group = group if "/" in path and group in files else "config"
+                files.setdefault(group, []).append(path)
+        versions = sorted((group for group in files if group != "config"), key=int)
+        for group in versions + (["config"] if "config" in files else []):
+            groups.append((model, group, sorted(files[group])))
+    return groups
+
+
+def get_layer_key(model_repository: str, model: str, group: str, paths: list[str]) -> Optional[str]:
+    '''
+    Get key of a layer from checksum manifest of its model, so unchanged layers are not packed again.
+    Files of config layer without checksum, eg: the checksum manifest itself, are small and hashed directly.
+    Return None if any file of a version layer has no checksum.
+    '''
+    model_path = os.path.join(model_repository, model)
+    checksums = load_checksums(model_path)
+    if checksums is None:
+        return None
+    entries = []
+    for path in paths:
+        file_path = os.path.join(model_path, path)
+        entry = checksums["files"].get(path)
+        if entry is None and group == "config":
+            entry = {"size": os.path.getsize(file_path),
+                     "chunks": [get_file_hash(file_path)]}
+        if entry is None:
+            return None
+        if os.path.getsize(file_path) != entry["size"]:
+            return None
+        entries.append((path, entry["size"], entry["chunks"],
+                       os.access(file_path, os.X_OK)))
+    return hashlib.sha256(json.dumps([LAYER_FORMAT, model, group, checksums["algorithm"], entries]).encode()).hexdigest()
+
+
+def write_layer(model_repository: str, model: str, group: str, paths: list[str], blobs_path: str) -> tuple[str, int, bool]:
+    '''
+    Write a layer of files as a reproducible tar to blobs directory.
+    Entries are sorted, with zero timestamps and owners and normalized modes,
+    so the same files always give the same digest. Symbolic links are followed.
+    Return digest, size and whether the blob is new.
+    '''
+    model_path = os.path.join(model_repository, model)
+    fd, temp_path = tempfile.mkstemp(dir=blobs_path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer = HashingWriter(f)
+            with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                directories: set[str] = set()
+
+                def __add_directories(parts: list[str]):
+                    '''
+                    Add directory entries of a path and its parents.
+                    '''
+                    for i in range(1, len(parts) + 1):
+                        directory = "/".join(parts[:i])
+                        if directory not in directories:
+                            directories.add(directory)
+                            info = tarfile.TarInfo(directory)
+                            info.type = tarfile.DIRTYPE
+                            info.mode = 0o755
+                            tar.addfile(info)
+
+                # Version directory is added even if empty
+                __add_directories(
+                    [OCI_MODELS_DIR, model] + ([group] if group.isdigit() else []))
+                for path in paths:
+                    parts = f"{OCI_MODELS_DIR}/{model}/{path}".split("/")
+                    __add_directories(parts[:-1])
+                    file_path = os.path.join(model_path, path)
+                    info = tarfile.TarInfo("/".join(parts))
+                    info.size = os.path.getsize(file_path)
+                    info.mode = 0o755 if os.access(
+                        file_path, os.X_OK) else 0o644
+                    with open(file_path, "rb") as source:
+                        tar.addfile(info, source)
+
+        digest = writer.hash.hexdigest()
+        blob_path = os.path.join(blobs_path, digest)
+        if os.path.exists(blob_path):
+            os.remove(temp_path)
+            return digest, writer.size, False
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, blob_path)
+        return digest, writer.size, True
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_blob(blobs_path: str, data: bytes) -> tuple[str, int]:
+    '''
+    Write a blob to blobs directory. Return digest and size.
+    '''
+    digest = hashlib.sha256(data).hexdigest()
+    blob_path = os.path.join(blobs_path, digest)
+    if not os.path.exists(blob_path):
+        with open(blob_path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(blob_path + ".tmp", blob_path)
+    return digest, len(data)
+
+
+def write_oci_layout(model_repository: str, layout_path: str, tag: str = "latest", threads: Optional[int] = None) -> OciResult:
+    '''
+    Write model repository to an OCI image layout directory.
+    Each model version and the config files of each model are separate layers,
+    under `/models` in the image. Layers are content addressed, so unchanged layers
+    keep their digests, are not uploaded again and are shared between images.
+    Unchanged layers are found with checksum manifests of models, and not packed again.
+    Layers are packed in parallel threads. Blobs no longer referenced are removed.
+    '''
+    blobs_path = os.path.join(layout_path, "blobs", "sha256")
+    os.makedirs(blobs_path, exist_ok=True)
+
+    # Load digests of layers packed before
+    cache_path = os.path.join(layout_path, OCI_LAYER_CACHE_FILE)
+    try:
+        with open(cache_path, "r") as f:
+            cache: dict[str, list] = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    def __get_layer(group: tuple[str, str, list[str]]) -> tuple[str, str, int, bool]:
+        '''
+        Get key, digest and size of a layer, and whether it is written.
+        '''
+        model, name, paths = group
+        key = get_layer_key(model_repository, model, name, paths)
+        if key in cache and os.path.exists(os.path.join(blobs_path, cache[key][0])):
+            return key, cache[key][0], cache[key][1], False
+        digest, size, written = write_layer(
+            model_repository, model, name, paths, blobs_path)
+        return key, digest, size, written
+
+    groups = get_layer_groups(model_repository)
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as pool:
+        layers = list(pool.map(__get_layer, groups))
+
+    # Image config, layers are uncompressed so diff ids are digests
+    config = {
+        "architecture": "amd64",
+        "os": "linux",
+        "config": {},
+        "rootfs": {"type": "layers", "diff_ids": [f"sha256:{digest}" for _, digest, _, _ in layers]}
+    }
+    config_digest, config_size = write_blob(
+        blobs_path, json.dumps(config, sort_keys=True, separators=(",", ":")).encode())
+
+    manifest = {
+        "schemaVersion": 2,
+        "mediaType": MEDIA_TYPE_MANIFEST,
+        "config": {"mediaType": MEDIA_TYPE_CONFIG, "digest": f"sha256:{config_digest}", "size": config_size},
+        "layers": [
+            {
+                "mediaType": MEDIA_TYPE_LAYER,
+                "digest": f"sha256:{digest}",
+                "size": size,
+                "annotations": {"org.opencontainers.image.title": f"{OCI_MODELS_DIR}/{model}/{group}"}
+            } for (model, group, _), (_, digest, size, _) in zip(groups, layers)
+        ]
+    }
+    manifest_digest, manifest_size = write_blob(
+        blobs_path, json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode())
+
+    # Index is written last, so layout always points to complete blobs
+    index = {
+        "schemaVersion": 2,
+        "mediaType": MEDIA_TYPE_INDEX,
+        "manifests": [{
+            "mediaType": MEDIA_TYPE_MANIFEST,
+            "digest": f"sha256:{manifest_digest}",
+            "size": manifest_size,
+            "annotations": {"org.opencontainers.image.ref.name": tag}
+        }]
+    }
+    with open(os.path.join(layout_path, "oci-layout"), "w") as f:
+        json.dump({"imageLayoutVersion": "1.0.0"}, f)
+    with open(os.path.join(layout_path, "index.json.tmp"), "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(os.path.join(layout_path, "index.json.tmp"),
+               os.path.join(layout_path, "index.json"))
+
+    # Remove blobs and cached layers no longer referenced
+    used = {config_digest, manifest_digest} | {
+        digest for _, digest, _, _ in layers}
+    for blob in os.listdir(blobs_path):
+        if blob not in used:
+            os.remove(os.path.join(blobs_path, blob))
+    cache = {key: [digest, size]
+             for key, digest, size, _ in layers if key is not None}
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=2)
+
+    return {
+        "digest": f"sha256:{manifest_digest}",
+        "layers": len(layers),
+        "written_layers": sum(written for _, _, _, written in layers),
+        "written_bytes": sum(size for _, _, size, written in layers if written)
+    }
@@ -0,0 +1,257 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import math
+import time
+import tempfile
+from typing import Optional
+import numpy
+import onnx
+from ..utils._constants import LATENCY_RUNS, CALIBRATION_WINDOW
+
+try:
+    import onnxruntime
+    from onnxruntime.quantization import CalibrationDataReader
+except ImportError:
+    onnxruntime = None
+    CalibrationDataReader = object
+
+
+def _require_onnxruntime():
+    '''
+    Raise error if onnxruntime package is not installed.
+    '''
+    if onnxruntime is None:
+        raise ImportError(
+            "Package `onnxruntime` is required for ONNX Runtime build stages. Install it with `pip install onnxruntime`.")
+
+
+def get_onnxruntime_version() -> Optional[str]:
+    '''
+    Get version of installed onnxruntime package. Return None if not installed.
+    '''
+    return onnxruntime.__version__ if onnxruntime is not None else None
+
+
+def get_session_options(level: str = "basic", save_path: Optional[str] = None, external_data: bool = False):
+    '''
+    Get session options of ONNX Runtime. If `save_path` is provided, optimized model is saved to it when session is created.
+    If `external_data` is True, initializers of saved model are written to `<save_path>.data`.
+    '''
+    _require_onnxruntime()
+    levels = {
+        "disable": onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    }
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = levels[level]
+    options.log_severity_level = 3
+    if save_path is not None:
+        options.optimized_model_filepath = save_path
+        if external_data:
+            options.add_session_config_entry(
+                "session.optimized_model_external_initializers_file_name", os.path.basename(save_path) + ".data")
+    return options
+
+
+def optimize_onnx_model(model_path: str, save_path: str, level: str, external_data: bool = False):
+    '''
+    Apply ONNX Runtime graph optimizations offline, eg: constant folding and node fusions, on CPU.
+    Model is loaded in memory by ONNX Runtime.
+    '''
+    options = get_session_options(level, save_path, external_data)
+    onnxruntime.InferenceSession(
+        model_path, options, providers=["CPUExecutionProvider"])
+
+
+def convert_ort_model(model_path: str, save_path: str, level: str = "basic"):
+    '''
+    Convert ONNX model to ORT format, with graph optimizations of `level` applied.
+    All initializers are written into the ORT format model.
+    '''
+    options = get_session_options(level, save_path)
+    options.add_session_config_entry("session.save_model_format", "ORT")
+    onnxruntime.InferenceSession(
+        model_path, options, providers=["CPUExecutionProvider"])
+
+
+def preprocess_quantization(model_path: str, save_path: str, external_data: bool = False):
+    '''
+    Prepare ONNX model for quantization with shape inference and basic graph optimizations.
+    '''
+    _require_onnxruntime()
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    quant_pre_process(model_path, save_path, save_as_external_data=external_data, all_tensors_to_one_file=True,
+                      external_data_location=os.path.basename(save_path) + ".data")
+
+
+def convert_precision_model(model_path: str, save_path: str, external_data: bool, precision: str, block_list: Optional[list[str]] = None):
+    '''
+    Convert float32 tensors of ONNX model to float16. Operators of `block_list`, and operators
+    not supported in float16 by ONNX Runtime, are kept in float32 with casts around them.
+    - fp16: inputs and outputs are converted too.
+    - mixed: inputs and outputs are kept in float32.
+    '''
+    _require_onnxruntime()
+    from onnxruntime.transformers.float16 import DEFAULT_OP_BLOCK_LIST, convert_float_to_float16
+    model = convert_float_to_float16(onnx.load(model_path), keep_io_types=precision == "mixed", disable_shape_infer=external_data,
+                                     op_block_list=DEFAULT_OP_BLOCK_LIST + list(block_list or []))
+    onnx.save(model, save_path, save_as_external_data=external_data, all_tensors_to_one_file=True,
+              location=os.path.basename(save_path) + ".data")
+
+
+def quantize_dynamic_model(model_path: str, save_path: str, external_data: bool = False):
+    '''
+    Quantize weights of ONNX model to INT8. Activations are quantized at runtime.
+    Model is prepared in a temporary directory next to `save_path`.
+    '''
+    _require_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    with tempfile.TemporaryDirectory(prefix=".", dir=os.path.dirname(save_path)) as temp_directory:
+        prepared_path = os.path.join(temp_directory, "prepared.onnx")
+        preprocess_quantization(model_path, prepared_path, external_data)
+        quantize_dynamic(prepared_path, save_path, weight_type=QuantType.QInt8,
+                         use_external_data_format=external_data)
+
+
+class NumpyCalibrationReader(CalibrationDataReader):
+    '''
+    Numpy Calibration Reader Class.
+    Read calibration samples from `.npy` and `.npz` files of a directory, in order of file names.
+    Each file is one set of model inputs: a `.npz` file has an array for each input name,
+    a `.npy` file is the array of a model with one input.
+    Files are loaded one at a time. Calibration reads samples in ranges of `window` files,
+    and merges results of each range, so at most `window` samples and their intermediate outputs are held in memory.
+    '''
+
+    def __init__(self, directory: str, input_names: list[str], window: int = CALIBRATION_WINDOW):
+        self.__paths = sorted(os.path.join(directory, file) for file in os.listdir(
+            directory) if file.endswith((".npy", ".npz")))
+        if not self.__paths:
+            raise ValueError(
+                f"No .npy or .npz calibration files found in {directory}.")
+        self.__input_names = input_names
+        self.__window = window
+        self.set_range(0, len(self.__paths))
+
+    def __len__(self) -> int:
+        '''
+        Number of samples, rounded up to a multiple of window. Last range has fewer samples.
+        '''
+        return math.ceil(len(self.__paths) / self.__window) * self.__window
+
+    def set_range(self, start_index: int, end_index: int):
+        '''
+        Read samples from `start_index` to `end_index` only.
+        '''
+        self.__iterator = iter(self.__paths[start_index:end_index])
+
+    def get_next(self) -> Optional[dict]:
+        '''
+        Load next sample. Return None at end of range.
+        '''
+        path = next(self.__iterator, None)
+        if path is None:
+            return None
+        if path.endswith(".npz"):
+            with numpy.load(path) as data:
+                missing = [
+                    name for name in self.__input_names if name not in data.files]
+                if missing:
+                    raise ValueError(
+                        f"Calibration file {path} has no arrays of inputs: {', '.join(missing)}.")
+                return {name: data[name] for name in self.__input_names}
+        if len(self.__input_names) != 1:
+            raise ValueError(
+                f"Calibration file {path} is .npy, but model has {len(self.__input_names)} inputs. Use .npz files with an array for each input.")
+        return {self.__input_names[0]: numpy.load(path)}
+
+
+def get_onnx_input_names(model_path: str) -> list[str]:
+    '''
+    Get names of ONNX model inputs which are not initializers. External data is not loaded.
+    '''
+    graph = onnx.load(model_path, load_external_data=False).graph
+    initializers = {initializer.name for initializer in graph.initializer}
+    return [layer.name for layer in graph.input if layer.name not in initializers]
+
+
+def quantize_static_model(model_path: str, save_path: str, external_data: bool, calibration_path: str, method: str = "minmax", window: int = CALIBRATION_WINDOW):
+    '''
+    Quantize ONNX model to INT8 with QuantizeLinear and DequantizeLinear nodes.
+    Activation ranges are calibrated with samples of `calibration_path`, read in ranges of `window` samples.
+    Model is prepared in a temporary directory next to `save_path`.
+    '''
+    _require_onnxruntime()
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    methods = {
+        "minmax": CalibrationMethod.MinMax,
+        "entropy": CalibrationMethod.Entropy,
+        "percentile": CalibrationMethod.Percentile,
+        "distribution": CalibrationMethod.Distribution
+    }
+    with tempfile.TemporaryDirectory(prefix=".", dir=os.path.dirname(save_path)) as temp_directory:
+        prepared_path = os.path.join(temp_directory, "prepared.onnx")
+        preprocess_quantization(model_path, prepared_path, external_data)
+        reader = NumpyCalibrationReader(
+            calibration_path, get_onnx_input_names(prepared_path), window)
+        quantize_static(prepared_path, save_path, reader, quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                        calibrate_method=methods[method], use_external_data_format=external_data,
+                        extra_options={"CalibStridedMinMax": window})
+
+
+def get_onnx_latency(model_path: str, runs: int = LATENCY_RUNS) -> Optional[float]:
+    '''
+    Get mean latency of ONNX model in milliseconds on CPU, with random inputs.
+    Dynamic dimensions are set to 1. Return None if model can not run with such inputs.
+    '''
+    _require_onnxruntime()
+    try:
+        session = onnxruntime.InferenceSession(
+            model_path, get_session_options(), providers=["CPUExecutionProvider"])
+        inputs = {}
+        for layer in session.get_inputs():
+            # Eg: tensor(float) -> float32
+            dtype = numpy.dtype({"float": "float32", "double": "float64"}.get(
+                layer.type[7:-1], layer.type[7:-1]))
+            shape = [dim if isinstance(dim, int) and dim > 0 else 1 for dim in layer.shape]
+            inputs[layer.name] = numpy.random.rand(*shape).astype(dtype)
+
+        # Warm up, then measure
+        session.run(None, inputs)
+        start = time.perf_counter()
+        for _ in range(runs):
+            session.run(None, inputs)
+        return (time.perf_counter() - start) / runs * 1000
+    except Exception:
+        return None
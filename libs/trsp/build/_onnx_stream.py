@@ -0,0 +1,406 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+from typing import BinaryIO, Callable, Iterator, Optional, Union
+import onnx
+from ..utils._abstract import OnnxExternalTensor, OnnxMetadata
+from ..utils._constants import EXTERNAL_DATA_ALIGNMENT
+
+# Protobuf wire types
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH_DELIMITED = 2
+WIRE_FIXED32 = 5
+
+# ModelProto fields
+MODEL_GRAPH = 7
+MODEL_OPSET_IMPORT = 8
+
+# GraphProto fields
+GRAPH_INITIALIZER = 5
+GRAPH_INPUT = 11
+GRAPH_OUTPUT = 12
+
+# TensorProto fields
+TENSOR_NAME = 8
+TENSOR_EXTERNAL_DATA = 13
+TENSOR_DATA_LOCATION = 14
+
+# Size of chunk when bytes are copied by user space
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def read_varint(f: BinaryIO) -> int:
+    '''
+    Read a protobuf varint from file.
+    '''
+    result = 0
+    shift = 0
+    while True:
+        byte = f.read(1)
+        if not byte:
+            raise EOFError("Unexpected end of ONNX file.")
+        result |= (byte[0] & 0x7f) << shift
+        if byte[0] < 0x80:
+            return result
+        shift += 7
+
+
+def encode_varint(value: int) -> bytes:
+    '''
+    Encode a protobuf varint.
+    '''
+    result = bytearray()
+    while value > 0x7f:
+        result.append((value & 0x7f) | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+
+def encode_length_delimited(field_number: int, data: Union[bytes, int]) -> bytes:
+    '''
+    Encode key and length of a length delimited field.
+    If `data` is bytes, it is appended after the length.
+    '''
+    length = data if isinstance(data, int) else len(data)
+    header = encode_varint(field_number << 3 | WIRE_LENGTH_DELIMITED) + \
+        encode_varint(length)
+    return header if isinstance(data, int) else header + data
+
+
+def copy_range(src_fd: int, dst_fd: int, offset: int, length: int):
+    '''
+    Copy `length` bytes from `offset` of source file to current position of destination file.
+    Bytes are copied inside kernel if supported.
+    '''
+    end = offset + length
+    copy_file_range = getattr(os, "copy_file_range", None)
+    while offset < end:
+        copied = 0
+        if copy_file_range is not None:
+            try:
+                copied = copy_file_range(src_fd, dst_fd, end - offset, offset)
+            except OSError:
+                copy_file_range = None
+        if copied == 0:
+            chunk = os.pread(src_fd, min(COPY_CHUNK_SIZE, end - offset), offset)
+            if not chunk:
+                raise EOFError("Unexpected end of ONNX file.")
+            os.write(dst_fd, chunk)
+            copied = len(chunk)
+        offset += copied
+
+
+def iter_fields(f: BinaryIO, start: int, end: int) -> Iterator[tuple[int, int, int, int, int]]:
+    '''
+    Iterate over protobuf fields of a message stored between `start` and `end` of file.
+    Yield (field number, wire type, field offset, value offset, value length).
+    For varint fields, value length is the varint value itself.
+    Values are not read, so large fields (Eg: initializers) are skipped by seeking.
+    '''
+    position = start
+    while position < end:
+        f.seek(position)
+        key = read_varint(f)
+        field_number, wire_type = key >> 3, key & 0x7
+        if wire_type == WIRE_VARINT:
+            value = read_varint(f)
+            value_offset = f.tell()
+            next_position = value_offset
+        elif wire_type == WIRE_FIXED64:
+            value_offset = f.tell()
+            value = 8
+            next_position = value_offset + 8
+        elif wire_type == WIRE_LENGTH_DELIMITED:
+            value = read_varint(f)
+            value_offset = f.tell()
+            next_position = value_offset + value
+        elif wire_type == WIRE_FIXED32:
+            value_offset = f.tell()
+            value = 4
+            next_position = value_offset + 4
+        else:
+            raise ValueError(
+                f"Unsupported protobuf wire type {wire_type} in ONNX file.")
+        if next_position > end:
+            raise EOFError("Unexpected end of ONNX file.")
+        yield field_number, wire_type, position, value_offset, value
+        position = next_position
+
+
+def find_field(f: BinaryIO, start: int, end: int, field: int) -> tuple[int, int, int]:
+    '''
+    Find the first length delimited field of a message.
+    Return (field offset, value offset, value length).
+    '''
+    for field_number, wire_type, field_offset, value_offset, value in iter_fields(f, start, end):
+        if field_number == field and wire_type == WIRE_LENGTH_DELIMITED:
+            return field_offset, value_offset, value
+    raise ValueError(f"Field {field} not found in ONNX file.")
+
+
+def read_tensor_external_data(f: BinaryIO, start: int, end: int) -> Optional[OnnxExternalTensor]:
+    '''
+    Read external data of a TensorProto stored between `start` and `end` of file.
+    Return None if tensor data is stored inside the ONNX file. Tensor data is skipped.
+    '''
+    name = ""
+    entries: dict[str, str] = {}
+    is_external = False
+    for field_number, wire_type, _, value_offset, value in iter_fields(f, start, end):
+        if field_number == TENSOR_DATA_LOCATION and wire_type == WIRE_VARINT:
+            is_external = value == onnx.TensorProto.EXTERNAL
+        elif field_number == TENSOR_NAME and wire_type == WIRE_LENGTH_DELIMITED:
+            f.seek(value_offset)
+            name = f.read(value).decode("utf-8")
+        elif field_number == TENSOR_EXTERNAL_DATA and wire_type == WIRE_LENGTH_DELIMITED:
+            f.seek(value_offset)
+            entry = onnx.StringStringEntryProto.FromString(f.read(value))
+            entries[entry.key] = entry.value
+
+    if not is_external:
+        return None
+
+    # Location must stay inside the model directory
+    location = entries.get("location", "")
+    if not location or os.path.isabs(location) or ".." in location.replace("\\", "/").split("/"):
+        raise ValueError(
+            f"External data location `{location}` of tensor {name} is not valid.")
+
+    return {
+        "name": name,
+        "location": location,
+        "offset": int(entries.get("offset", 0)),
+        "length": int(entries["length"]) if "length" in entries else None
+    }
+
+
+def read_onnx_external_data(path: str) -> list[OnnxExternalTensor]:
+    '''
+    Read external data references of ONNX graph initializers, without reading tensor data.
+    '''
+    tensors: list[OnnxExternalTensor] = []
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        _, graph_offset, graph_length = find_field(
+            f, 0, f.tell(), MODEL_GRAPH)
+        for field_number, wire_type, _, value_offset, value in iter_fields(f, graph_offset, graph_offset + graph_length):
+            if field_number != GRAPH_INITIALIZER or wire_type != WIRE_LENGTH_DELIMITED:
+                continue
+            tensor = read_tensor_external_data(
+                f, value_offset, value_offset + value)
+            if tensor is not None:
+                tensors.append(tensor)
+    return tensors
+
+
+def read_onnx_metadata(path: str) -> OnnxMetadata:
+    '''
+    Read ONNX model signature, opset imports, external data references and initializers size
+    in one pass. Tensor data is skipped.
+    '''
+    metadata: OnnxMetadata = {
+        "input": [],
+        "output": [],
+        "opset": {},
+        "external_data": [],
+        "initializer_bytes": 0
+    }
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        graph_range = None
+        for field_number, wire_type, _, value_offset, value in iter_fields(f, 0, f.tell()):
+            if wire_type != WIRE_LENGTH_DELIMITED:
+                continue
+            if field_number == MODEL_OPSET_IMPORT:
+                f.seek(value_offset)
+                opset = onnx.OperatorSetIdProto.FromString(f.read(value))
+                metadata["opset"][opset.domain or "ai.onnx"] = opset.version
+            elif field_number == MODEL_GRAPH and graph_range is None:
+                graph_range = (value_offset, value_offset + value)
+        if graph_range is None:
+            raise ValueError(f"Field {MODEL_GRAPH} not found in ONNX file.")
+
+        for field_number, wire_type, _, value_offset, value in iter_fields(f, *graph_range):
+            if wire_type != WIRE_LENGTH_DELIMITED:
+                continue
+            if field_number in (GRAPH_INPUT, GRAPH_OUTPUT):
+                f.seek(value_offset)
+                metadata["input" if field_number == GRAPH_INPUT else "output"].append(
+                    onnx.ValueInfoProto.FromString(f.read(value)))
+            elif field_number == GRAPH_INITIALIZER:
+                tensor = read_tensor_external_data(
+                    f, value_offset, value_offset + value)
+                if tensor is None:
+                    metadata["initializer_bytes"] += value
+                    continue
+                metadata["external_data"].append(tensor)
+                if tensor["length"] is not None:
+                    metadata["initializer_bytes"] += tensor["length"]
+                else:
+                    metadata["initializer_bytes"] += os.path.getsize(os.path.join(
+                        os.path.dirname(path), tensor["location"])) - tensor["offset"]
+    return metadata
+
+
+def get_external_data_locations(tensors: list[OnnxExternalTensor]) -> list[str]:
+    '''
+    Get unique external data files of tensors, in order of appearance.
+    '''
+    return list(dict.fromkeys(tensor["location"] for tensor in tensors))
+
+
+# Rewrite handler of a graph field.
+# Called with (file, value offset, value length, index of the field occurrence, from 1).
+# Return new value bytes, or None to keep the field unchanged.
+GraphFieldHandler = Callable[[BinaryIO, int, int, int], Optional[bytes]]
+
+
+def patch_batch_axis(f: BinaryIO, offset: int, length: int, index: int) -> bytes:
+    '''
+    Rewrite handler of graph inputs and outputs. Make the first dimension dynamic.
+    '''
+    f.seek(offset)
+    layer = onnx.ValueInfoProto.FromString(f.read(length))
+    layer.type.tensor_type.shape.dim[
+        0].dim_param = f"{layer.name}_dynamic_axes_{index}"
+    return layer.SerializeToString()
+
+
+def rewrite_onnx_graph(source: str, destination: str, handlers: dict[int, GraphFieldHandler]):
+    '''
+    Write ONNX model with graph fields rewritten by handlers.
+    Only fields given to handlers are rewritten,
+    other bytes (Eg: initializers) are streamed from source to destination.
+    '''
+    with open(source, "rb") as f, open(destination, "wb", buffering=0) as out:
+        f.seek(0, 2)
+        size = f.tell()
+        header_offset, graph_offset, graph_length = find_field(
+            f, 0, size, MODEL_GRAPH)
+
+        # Collect graph pieces, as byte ranges of source or rewritten bytes
+        pieces: list[Union[bytes, tuple[int, int]]] = []
+        indexes = {field_number: 0 for field_number in handlers}
+        for field_number, wire_type, field_offset, value_offset, value in iter_fields(f, graph_offset, graph_offset + graph_length):
+            end = value_offset + (value if wire_type != WIRE_VARINT else 0)
+            if wire_type != WIRE_LENGTH_DELIMITED or field_number not in handlers:
+                pieces.append((field_offset, end - field_offset))
+                continue
+
+            indexes[field_number] += 1
+            data = handlers[field_number](
+                f, value_offset, value, indexes[field_number])
+            if data is None:
+                pieces.append((field_offset, end - field_offset))
+            else:
+                pieces.append(encode_length_delimited(field_number, data))
+
+        # Write model fields before graph, graph header, graph pieces, then fields after graph
+        src_fd = f.fileno()
+        dst_fd = out.fileno()
+        copy_range(src_fd, dst_fd, 0, header_offset)
+        out.write(encode_length_delimited(MODEL_GRAPH, sum(
+            len(piece) if isinstance(piece, bytes) else piece[1] for piece in pieces)))
+        for piece in pieces:
+            if isinstance(piece, bytes):
+                out.write(piece)
+            else:
+                copy_range(src_fd, dst_fd, *piece)
+        copy_range(src_fd, dst_fd, graph_offset +
+                   graph_length, size - graph_offset - graph_length)
+
+
+class ExternalDataConsolidator:
+    '''
+    External Data Consolidator Class.
+    Rewrite handler of graph initializers, which copies external tensor data into one file.
+    Each tensor is aligned, so the file can be memory mapped.
+    '''
+
+    def __init__(self, model_directory: str, data_path: str):
+        self.__model_directory = model_directory
+        self.__data_path = data_path
+        self.__location = os.path.basename(data_path)
+        self.__file = None
+        self.__sources: dict[str, int] = {}
+
+    def __enter__(self):
+        self.__file = open(self.__data_path, "wb", buffering=0)
+        return self
+
+    def __exit__(self, *args):
+        self.__file.close()
+        for fd in self.__sources.values():
+            os.close(fd)
+
+    def __get_source(self, location: str) -> int:
+        '''
+        Get file descriptor of an external data file. Each file is opened once.
+        '''
+        if location not in self.__sources:
+            self.__sources[location] = os.open(
+                os.path.join(self.__model_directory, location), os.O_RDONLY)
+        return self.__sources[location]
+
+    def rewrite_tensor(self, f: BinaryIO, offset: int, length: int, index: int) -> Optional[bytes]:
+        '''
+        Copy external data of a tensor and point the tensor to the consolidated file.
+        '''
+        external_tensor = read_tensor_external_data(f, offset, offset + length)
+        if external_tensor is None:
+            return None
+
+        # Get tensor data range in source file
+        source_fd = self.__get_source(external_tensor["location"])
+        data_length = external_tensor["length"]
+        if data_length is None:
+            data_length = os.fstat(source_fd).st_size - \
+                external_tensor["offset"]
+
+        # Pad consolidated file to alignment
+        position = self.__file.tell()
+        padding = -position % EXTERNAL_DATA_ALIGNMENT
+        if padding:
+            self.__file.write(b"\0" * padding)
+            position += padding
+        copy_range(source_fd, self.__file.fileno(),
+                   external_tensor["offset"], data_length)
+
+        # Rewrite tensor external data entries
+        f.seek(offset)
+        tensor = onnx.TensorProto.FromString(f.read(length))
+        del tensor.external_data[:]
+        for key, value in (("location", self.__location), ("offset", str(position)), ("length", str(data_length))):
+            entry = tensor.external_data.add()
+            entry.key = key
+            entry.value = value
+        return tensor.SerializeToString()
@@ -0,0 +1,209 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import errno
+import shutil
+import ctypes
+import ctypes.util
+from ..utils._constants import PLACEMENT_MODES
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request to clone a file on copy-on-write filesystems (Linux, Eg: btrfs, xfs)
+FICLONE = 0x40049409
+
+# renameat2 arguments to swap two paths atomically (Linux)
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+# Errors meaning the method is not supported for these files, so next method is tried
+UNSUPPORTED_ERRORS = (errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTSUP,
+                      errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EMLINK, errno.EBADF)
+
+
+def remove_file(path: str):
+    '''
+    Remove a file or link if exists.
+    Used before writing a file, so linked source files are never written through.
+    '''
+    if os.path.lexists(path):
+        os.unlink(path)
+
+
+def _reflink(source: str, destination: str):
+    '''
+    Clone file blocks. Data is shared until one of files is modified.
+    '''
+    if fcntl is None:
+        raise OSError(errno.ENOTSUP, "Reflink is not supported.")
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(destination)
+            raise
+
+
+def _hardlink(source: str, destination: str):
+    '''
+    Link destination to the same inode of source.
+    '''
+    os.link(source, destination)
+
+
+def _kernel_copy(source: str, destination: str):
+    '''
+    Copy file inside kernel with copy_file_range or sendfile, without user space buffers.
+    '''
+    copy_range = getattr(os, "copy_file_range", None)
+    sendfile = getattr(os, "sendfile", None)
+    if copy_range is None and sendfile is None:
+        raise OSError(errno.ENOSYS, "Kernel copy is not supported.")
+
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        size = os.fstat(src.fileno()).st_size
+        offset = 0
+        try:
+            while offset < size:
+                if copy_range is not None:
+                    copied = copy_range(src.fileno(), dst.fileno(),
+                                        size - offset, offset, offset)
+                else:
+                    copied = sendfile(dst.fileno(), src.fileno(),
+                                      offset, size - offset)
+                if copied == 0:
+                    break
+                offset += copied
+        except OSError:
+            dst.close()
+            os.unlink(destination)
+            raise
+
+
+def place_file(source: str, destination: str, mode: str = "auto") -> str:
+    '''
+    Place a source file to destination without transformation. Return the method used.
+    - auto: Try reflink, hardlink, kernel copy, then fallback to normal copy.
+    - copy: Try reflink, kernel copy, then fallback to normal copy. Never share inode with source.
+    - symlink: Create symbolic link to absolute source path.
+    '''
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(
+            f"Placement mode {mode} is not supported. Supported modes: {PLACEMENT_MODES}")
+
+    remove_file(destination)
+
+    # Symbolic link is opt-in, link is resolved by the host of model repository
+    if mode == "symlink":
+        os.symlink(os.path.abspath(source), destination)
+        return "symlink"
+
+    # Try each method, fallback to the next one if not supported
+    methods = [("reflink", _reflink)]
+    if mode == "auto":
+        methods.append(("hardlink", _hardlink))
+    methods.append(("kernel_copy", _kernel_copy))
+
+    for method_name, method in methods:
+        try:
+            method(source, destination)
+            return method_name
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRORS:
+                raise
+
+    shutil.copyfile(source, destination)
+    return "copy"
+
+
+def link_tree(source: str, destination: str):
+    '''
+    Recreate a directory tree without copying file data when possible.
+    Files are placed with `auto` mode, symbolic links are recreated as they are.
+    '''
+    for root, _, files in os.walk(source):
+        destination_root = os.path.join(
+            destination, os.path.relpath(root, source))
+        os.makedirs(destination_root, exist_ok=True)
+        for file in files:
+            source_path = os.path.join(root, file)
+            destination_path = os.path.join(destination_root, file)
+            if os.path.islink(source_path):
+                os.symlink(os.readlink(source_path), destination_path)
+            else:
+                place_file(source_path, destination_path, "auto")
+
+
+def exchange_paths(first: str, second: str) -> bool:
+    '''
+    Swap two paths atomically with renameat2. Return False if not supported.
+    '''
+    library = ctypes.util.find_library("c")
+    if library is None:
+        return False
+    try:
+        renameat2 = ctypes.CDLL(library, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    result = renameat2(AT_FDCWD, os.fsencode(first),
+                       AT_FDCWD, os.fsencode(second), RENAME_EXCHANGE)
+    if result == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in UNSUPPORTED_ERRORS:
+        return False
+    raise OSError(error, os.strerror(error), second)
+
+
+def publish_directory(staging_path: str, path: str):
+    '''
+    Replace a directory with a staged directory, so readers see either the old or the new directory.
+    Directories are swapped atomically if supported, otherwise the old directory is
+    moved away just before the staged directory is moved in.
+    Staging directory must be on the same filesystem.
+    '''
+    if not os.path.exists(path):
+        os.rename(staging_path, path)
+        return
+
+    # Swap directories, then staging path holds the old directory
+    if exchange_paths(staging_path, path):
+        shutil.rmtree(staging_path)
+        return
+
+    old_path = staging_path + ".old"
+    shutil.rmtree(old_path, ignore_errors=True)
+    os.rename(path, old_path)
+    os.rename(staging_path, path)
+    shutil.rmtree(old_path)
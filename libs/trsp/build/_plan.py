@@ -0,0 +1,103 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import difflib
+from ..utils._abstract import PlanEntry
+from ..utils._utils import get_size_string
+from ..utils._constants import INFO_PREFIX, SUCCESS_PREFIX
+
+
+def get_field_names(lines: list[str]) -> list[str]:
+    '''
+    Get top-level config.pbtxt field of each line. Comments and blank lines have no field.
+    '''
+    fields: list[str] = []
+    current = ""
+    for line in lines:
+        if line.startswith("#") or not line.strip():
+            fields.append("")
+            continue
+        if not line[0].isspace() and line[0] not in "}]":
+            current = line.split(":")[0].split(" ")[0].split("[")[0].split("{")[0]
+        fields.append(current)
+    return fields
+
+
+def get_changed_fields(old_text: str, new_text: str) -> list[str]:
+    '''
+    Get top-level config.pbtxt fields whose lines are changed.
+    '''
+    old_lines, new_lines = old_text.splitlines(), new_text.splitlines()
+    old_fields, new_fields = get_field_names(
+        old_lines), get_field_names(new_lines)
+    changed: list[str] = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag == "equal":
+            continue
+        for field in old_fields[i1:i2] + new_fields[j1:j2]:
+            if field and field not in changed:
+                changed.append(field)
+    return changed
+
+
+def get_config_diff(old_text: str, new_text: str, name: str) -> str:
+    '''
+    Get unified diff of config.pbtxt of a model.
+    '''
+    return "".join(difflib.unified_diff(old_text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+                                        f"a/{name}/config.pbtxt", f"b/{name}/config.pbtxt"))
+
+
+def print_plan(entries: list[PlanEntry]):
+    '''
+    Print build plan with config.pbtxt diffs and bytes to be written.
+    '''
+    symbols = {"create": "+", "rewrite": "~",
+               "unchanged": "=", "retain": "=", "remove": "-"}
+    for entry in entries:
+        versions = ", ".join(f"{symbols[action]}{version}" for version,
+                             action in entry["versions"].items())
+        line = f"{symbols[entry['action']]} {entry['model']}: {entry['action']}"
+        if versions:
+            line += f". Versions: {versions}"
+        if entry["changed_fields"]:
+            line += f". Changed fields: {', '.join(entry['changed_fields'])}"
+        if entry["action"] in ("create", "rewrite"):
+            line += f". Write {get_size_string(entry['written_bytes'])}, link {get_size_string(entry['linked_bytes'])}"
+        print(INFO_PREFIX + line + ".")
+        if entry["diff"]:
+            print(entry["diff"], end="" if entry["diff"].endswith("\n") else "\n")
+
+    # Print summary
+    counts = {action: sum(1 for entry in entries if entry["action"] == action)
+              for action in ("create", "rewrite", "unchanged", "remove")}
+    print(SUCCESS_PREFIX +
+          f"Plan: {counts['create']} to create, {counts['rewrite']} to rewrite, {counts['unchanged']} unchanged, {counts['remove']} to remove. "
+          f"{get_size_string(sum(entry['written_bytes'] for entry in entries))} to write, "
+          f"{get_size_string(sum(entry['linked_bytes'] for entry in entries))} to link.")
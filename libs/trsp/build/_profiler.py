@@ -0,0 +1,189 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from ..utils._abstract import ProfileEvent
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def get_io_counters() -> tuple[int, int]:
+    '''
+    Get bytes read and written by current process. Return zeros if not supported.
+    '''
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def get_peak_rss() -> int:
+    '''
+    Get peak resident set size of current process in bytes. Return zero if not supported.
+    '''
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class BuildProfiler:
+    '''
+    Build Profiler Class.
+    Record wall time, bytes read and written, and peak memory of each build phase of each model.
+    '''
+
+    def __init__(self, enabled: bool = False):
+        self.__enabled = enabled
+        self.__events: list[ProfileEvent] = []
+
+    def is_enabled(self) -> bool:
+        '''
+        Check if profiler records phases.
+        '''
+        return self.__enabled
+
+    @contextmanager
+    def phase(self, model: str, name: str) -> Iterator[None]:
+        '''
+        Record a build phase of a model. Do nothing if profiler is disabled.
+        '''
+        if not self.__enabled:
+            yield
+            return
+
+        read_start, write_start = get_io_counters()
+        start = time.time()
+        start_counter = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start_counter
+            read_end, write_end = get_io_counters()
+            self.__events.append({
+                "model": model,
+                "phase": name,
+                "start": start,
+                "duration": duration,
+                "read_bytes": read_end - read_start,
+                "write_bytes": write_end - write_start,
+                "peak_rss": get_peak_rss(),
+                "pid": os.getpid()
+            })
+
+    def mark(self) -> int:
+        '''
+        Get position of next event. Used with `take_events`.
+        '''
+        return len(self.__events)
+
+    def take_events(self, mark: int) -> list[ProfileEvent]:
+        '''
+        Remove and return events recorded after `mark`.
+        Used to send events from worker processes to main process.
+        '''
+        events = self.__events[mark:]
+        del self.__events[mark:]
+        return events
+
+    def add_events(self, events: list[ProfileEvent]):
+        '''
+        Add events recorded by worker processes.
+        '''
+        self.__events.extend(events)
+
+    def get_report(self) -> dict:
+        '''
+        Get report of total time, bytes and peak memory by model and phase.
+        Models are sorted by total time, slowest first.
+        '''
+        models: dict[str, dict] = {}
+        for event in self.__events:
+            model = models.setdefault(
+                event["model"], {"seconds": 0.0, "read_bytes": 0, "write_bytes": 0, "peak_rss": 0, "phases": {}})
+            phase = model["phases"].setdefault(
+                event["phase"], {"seconds": 0.0, "read_bytes": 0, "write_bytes": 0, "peak_rss": 0})
+            for summary in (model, phase):
+                summary["seconds"] += event["duration"]
+                summary["read_bytes"] += event["read_bytes"]
+                summary["write_bytes"] += event["write_bytes"]
+                summary["peak_rss"] = max(
+                    summary["peak_rss"], event["peak_rss"])
+
+        start = min((event["start"] for event in self.__events), default=0)
+        end = max((event["start"] + event["duration"]
+                  for event in self.__events), default=0)
+        return {
+            "wall_seconds": end - start,
+            "peak_rss": max((event["peak_rss"] for event in self.__events), default=0),
+            "models": dict(sorted(models.items(), key=lambda item: item[1]["seconds"], reverse=True))
+        }
+
+    def get_chrome_trace(self) -> dict:
+        '''
+        Get events in Chrome trace format, one row per process.
+        Can be opened with chrome://tracing or https://ui.perfetto.dev.
+        '''
+        return {
+            "traceEvents": [
+                {
+                    "name": f"{event['model']}: {event['phase']}",
+                    "cat": event["phase"],
+                    "ph": "X",
+                    "ts": int(event["start"] * 1e6),
+                    "dur": int(event["duration"] * 1e6),
+                    "pid": 1,
+                    "tid": event["pid"],
+                    "args": {
+                        "model": event["model"],
+                        "read_bytes": event["read_bytes"],
+                        "write_bytes": event["write_bytes"],
+                        "peak_rss": event["peak_rss"]
+                    }
+                } for event in self.__events
+            ],
+            "displayTimeUnit": "ms"
+        }
+
+    def write(self, report_path: str, trace_path: str):
+        '''
+        Write JSON report and Chrome trace files.
+        '''
+        with open(report_path, "w") as f:
+            json.dump(self.get_report(), f, indent=2)
+        with open(trace_path, "w") as f:
+            json.dump(self.get_chrome_trace(), f)
@@ -0,0 +1,264 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import json
+import hashlib
+from typing import Optional
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from ._cache import MetadataCache
+from ..utils._abstract import PublishManifest, PublishResult
+from ..utils._utils import get_repository_files, get_empty_directories
+from ..utils._constants import S3_MANIFEST_FILE, S3_MULTIPART_SIZE, S3_KEEP_VERSIONS, S3_DELETE_BATCH
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+
+
+def parse_s3_url(url: str) -> tuple[str, str]:
+    '''
+    Get bucket and key prefix from s3 url. Eg: s3://bucket/path/to/repository.
+    '''
+    parsed = urlparse(url)
+    if parsed.scheme != "s3" or not parsed.netloc:
+        raise ValueError(
+            f"Invalid s3 url `{url}`. Eg: s3://bucket/path/to/repository.")
+    return parsed.netloc, parsed.path.strip("/")
+
+
+class S3Publisher:
+    '''
+    S3 Publisher Class.
+    Publish built model repository to S3 compatible storage.
+    Each version is published to its own key prefix, named by the version hash, and never changes after
+    the manifest object points to it. Servers started with a version prefix keep reading the same files.
+    Objects whose stored hash is unchanged are skipped, other files are copied inside storage if their hash
+    is in the current version, otherwise uploaded in parallel with multipart uploads.
+    The latest `keep` versions are kept. Older version prefixes recorded by manifests are deleted,
+    other objects under publish prefix are never deleted.
+    '''
+
+    def __init__(self, url: str, endpoint_url: Optional[str] = None, threads: Optional[int] = None, cache: Optional[MetadataCache] = None, keep: int = S3_KEEP_VERSIONS):
+        if keep < 1:
+            raise ValueError(
+                f"Number of kept versions must be at least 1, got {keep}.")
+        if boto3 is None:
+            raise ImportError(
+                "Package `boto3` is required to publish to s3. Install it with `pip install boto3`.")
+        self.__bucket, self.__prefix = parse_s3_url(url)
+        self.__endpoint_url = endpoint_url
+        self.__threads = threads or os.cpu_count()
+        self.__cache = cache
+        self.__keep = keep
+        # Files and parts of each file are transferred in parallel
+        self.__client = boto3.client("s3", endpoint_url=endpoint_url, config=Config(
+            max_pool_connections=self.__threads * self.__threads))
+        self.__transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_SIZE, multipart_chunksize=S3_MULTIPART_SIZE, max_concurrency=self.__threads)
+
+    def __get_key(self, *parts: str) -> str:
+        '''
+        Get object key under publish prefix.
+        '''
+        return "/".join(part for part in (self.__prefix, *parts) if part)
+
+    def __get_file_hash(self, path: str) -> str:
+        '''
+        Get sha256 hash of a local file, cached by file size and modified time if cache is provided.
+        '''
+        if self.__cache is not None:
+            return self.__cache.get_file_hash(path)
+        file_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(S3_MULTIPART_SIZE), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    def __list_objects(self, prefix: str) -> dict[str, int]:
+        '''
+        Get keys and sizes of objects under a key prefix.
+        '''
+        objects: dict[str, int] = {}
+        paginator = self.__client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.__bucket, Prefix=prefix + "/"):
+            for item in page.get("Contents", []):
+                objects[item["Key"]] = item["Size"]
+        return objects
+
+    def __get_object_hash(self, key: str) -> Optional[str]:
+        '''
+        Get sha256 hash stored in metadata of an object. Return None if not stored.
+        '''
+        response = self.__client.head_object(Bucket=self.__bucket, Key=key)
+        return response.get("Metadata", {}).get("sha256")
+
+    def __delete_objects(self, keys: list[str]) -> int:
+        '''
+        Delete objects in batches. Return number of deleted objects.
+        '''
+        for i in range(0, len(keys), S3_DELETE_BATCH):
+            self.__client.delete_objects(Bucket=self.__bucket, Delete={
+                "Objects": [{"Key": key} for key in keys[i:i + S3_DELETE_BATCH]], "Quiet": True})
+        return len(keys)
+
+    def get_repository_url(self, prefix: str) -> str:
+        '''
+        Get model repository url for Triton `--model-repository`.
+        Custom endpoints are written as s3://host:port/bucket/path, as required by Triton.
+        '''
+        path = f"{self.__bucket}/{prefix}"
+        if self.__endpoint_url is None:
+            return f"s3://{path}"
+        endpoint = self.__endpoint_url.rstrip("/")
+        if endpoint.startswith("http://"):
+            endpoint = endpoint[len("http://"):]
+        return f"s3://{endpoint}/{path}"
+
+    def get_manifest(self) -> Optional[PublishManifest]:
+        '''
+        Get manifest of published version. Return None if nothing is published.
+        '''
+        try:
+            response = self.__client.get_object(
+                Bucket=self.__bucket, Key=self.__get_key(S3_MANIFEST_FILE))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+        return json.loads(response["Body"].read())
+
+    def publish(self, model_repository: str) -> PublishResult:
+        '''
+        Publish model repository as a new version. Nothing is uploaded if files are unchanged.
+        '''
+        # Hash files, version is derived from file paths and hashes.
+        # Empty directories, Eg: versions of ensemble models, are published as empty objects ending with `/`.
+        directories = [f"{path}/" for path in get_empty_directories(model_repository) if "/" in path]
+        paths = sorted(get_repository_files(model_repository) + directories)
+        files = {
+            path: hashlib.sha256().hexdigest() if path in directories
+            else self.__get_file_hash(os.path.join(model_repository, path))
+            for path in paths
+        }
+        sizes = {path: 0 if path in directories else os.path.getsize(os.path.join(model_repository, path))
+                 for path in paths}
+        version = hashlib.sha256(json.dumps(
+            files, sort_keys=True).encode()).hexdigest()[:16]
+
+        # Skip if published version has the same files
+        manifest = self.get_manifest()
+        if manifest is not None and manifest["version"] == version:
+            return {"version": version, "url": self.get_repository_url(manifest["prefix"]),
+                    "uploaded_bytes": 0, "copied_bytes": 0, "skipped_bytes": 0, "deleted_objects": 0, "unchanged": True}
+
+        # Publish to prefix of the new version, so readers of published versions are not affected.
+        # Objects may be left by an interrupted publish, or the version may be published before.
+        current_prefix = manifest["prefix"] if manifest is not None else None
+        prefix = self.__get_key(version)
+        objects = self.__list_objects(prefix)
+
+        # Objects with the same size are compared by stored hash
+        def __is_published(path: str) -> bool:
+            key = f"{prefix}/{path}"
+            return objects.get(key) == sizes[path] and self.__get_object_hash(key) == files[path]
+
+        with ThreadPoolExecutor(max_workers=self.__threads) as pool:
+            published = {path for path, is_published in zip(
+                paths, pool.map(__is_published, paths)) if is_published}
+
+        # Files with a hash in current version are copied, others are uploaded once
+        sources: dict[str, str] = {}
+        if manifest is not None:
+            for path, file_hash in manifest["files"].items():
+                sources.setdefault(file_hash, f"{current_prefix}/{path}")
+        uploads: list[str] = []
+        copies: list[tuple[str, str]] = []
+        for path in paths:
+            if path in published:
+                continue
+            if files[path] in sources:
+                copies.append((path, sources[files[path]]))
+            else:
+                sources[files[path]] = f"{prefix}/{path}"
+                uploads.append(path)
+
+        def __upload(path: str) -> int:
+            if path in directories:
+                self.__client.put_object(Bucket=self.__bucket, Key=f"{prefix}/{path}", Body=b"",
+                                         Metadata={"sha256": files[path]})
+                return 0
+            self.__client.upload_file(os.path.join(model_repository, path), self.__bucket, f"{prefix}/{path}",
+                                      ExtraArgs={"Metadata": {"sha256": files[path]}}, Config=self.__transfer_config)
+            return sizes[path]
+
+        def __copy(copy: tuple[str, str]) -> int:
+            path, source_key = copy
+            self.__client.copy({"Bucket": self.__bucket, "Key": source_key}, self.__bucket, f"{prefix}/{path}",
+                               ExtraArgs={"Metadata": {"sha256": files[path]}, "MetadataDirective": "REPLACE"}, Config=self.__transfer_config)
+            return sizes[path]
+
+        # Copies may depend on files uploaded in this version
+        with ThreadPoolExecutor(max_workers=self.__threads) as pool:
+            uploaded_bytes = sum(pool.map(__upload, uploads))
+            copied_bytes = sum(pool.map(__copy, copies))
+
+        # Remove objects of files which are not in this version
+        keys = {f"{prefix}/{path}" for path in paths}
+        deleted_objects = self.__delete_objects(
+            sorted(key for key in objects if key not in keys))
+
+        # Record prefixes of previous versions, latest first, so only prefixes published by trsp are deleted
+        previous_prefixes: list[str] = []
+        if manifest is not None:
+            for previous_prefix in [current_prefix, *manifest.get("previous", [])]:
+                if previous_prefix != prefix and previous_prefix not in previous_prefixes:
+                    previous_prefixes.append(previous_prefix)
+        kept_prefixes = previous_prefixes[:self.__keep - 1]
+
+        # Switch manifest to new version after all files are published
+        new_manifest: PublishManifest = {
+            "version": version, "prefix": prefix, "files": files, "previous": kept_prefixes}
+        self.__client.put_object(Bucket=self.__bucket, Key=self.__get_key(S3_MANIFEST_FILE),
+                                 Body=json.dumps(new_manifest, indent=2).encode(), ContentType="application/json")
+
+        # Remove versions which are no longer kept
+        for stale_prefix in previous_prefixes[self.__keep - 1:]:
+            deleted_objects += self.__delete_objects(
+                sorted(self.__list_objects(stale_prefix)))
+
+        return {"version": version, "url": self.get_repository_url(prefix),
+                "uploaded_bytes": uploaded_bytes, "copied_bytes": copied_bytes,
+                "skipped_bytes": sum(sizes[path] for path in published),
+                "deleted_objects": deleted_objects, "unchanged": False}
@@ -0,0 +1,196 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+from typing import Any, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from ..utils._abstract import ModelConfig
+from ..utils._constants import WARNING_PREFIX
+
+
+def get_model_dependencies(models: dict[str, ModelConfig]) -> dict[str, list[str]]:
+    '''
+    Get dependencies of each model. Ensemble model depends on its step models.
+    '''
+    dependencies: dict[str, list[str]] = {}
+    for name, model_config in models.items():
+        dependencies[name] = []
+        if model_config["engine"] != "ensemble":
+            continue
+        for step in model_config["steps"]:
+            if step["model"] not in models:
+                raise ValueError(
+                    f"Model {step['model']} of ensemble model {name} not found in configuration models.")
+            if step["model"] not in dependencies[name]:
+                dependencies[name].append(step["model"])
+    return dependencies
+
+
+class BuildScheduler:
+    '''
+    Build Scheduler Class.
+    Run build jobs of models by dependency order. Independent jobs are run in a process pool.
+    If `max_memory` is provided, jobs are started only while sum of their estimated memory stays under it.
+    '''
+
+    def __init__(
+        self,
+        dependencies: dict[str, list[str]],
+        jobs: int = 1,
+        memory: Optional[dict[str, int]] = None,
+        max_memory: Optional[int] = None
+    ):
+        self.__dependencies = dependencies
+        self.__jobs = max(jobs, 1)
+        self.__memory = memory or {}
+        self.__max_memory = max_memory
+        self.__order = self.__sort_dependencies()
+
+    def __sort_dependencies(self) -> list[str]:
+        '''
+        Sort models so each model is placed after its dependencies.
+        Raise error if dependencies have a cycle.
+        '''
+        order: list[str] = []
+        visiting: set[str] = set()
+        visited: set[str] = set()
+
+        def __visit(name: str, path: list[str]):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(
+                    f"Models have circular dependency: {' -> '.join(path + [name])}.")
+            visiting.add(name)
+            for dependency in self.__dependencies[name]:
+                __visit(dependency, path + [name])
+            visiting.remove(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.__dependencies:
+            __visit(name, [])
+        return order
+
+    def get_order(self) -> list[str]:
+        '''
+        Get models sorted by dependency order.
+        '''
+        return list(self.__order)
+
+    def __get_memory(self, name: str) -> int:
+        '''
+        Get estimated memory of a model job in bytes.
+        '''
+        return self.__memory.get(name, 0)
+
+    def __select_jobs(self, ready: list[str], running: dict[Future, str]) -> list[str]:
+        '''
+        Select ready models to start, largest first.
+        A model which does not fit in memory budget is left for later, and smaller models fill the gap.
+        A model larger than the budget is started only when no other model is running.
+        '''
+        used = sum(self.__get_memory(name) for name in running.values())
+        slots = self.__jobs - len(running)
+        selected: list[str] = []
+
+        for name in sorted(ready, key=self.__get_memory, reverse=True):
+            if len(selected) >= slots:
+                break
+            memory = self.__get_memory(name)
+            if self.__max_memory is not None and used + memory > self.__max_memory and (running or selected):
+                continue
+            selected.append(name)
+            used += memory
+        return selected
+
+    def run(
+        self,
+        job: Callable[[str], Any],
+        is_local: Callable[[str], bool],
+        local_job: Callable[[str], Any],
+        on_complete: Callable[[str, Any], None]
+    ):
+        '''
+        Run build jobs.
+        `job` is run in worker process, `local_job` is run in main process for models accepted by `is_local`.
+        `on_complete` is called in main process with result of each model, before its dependents are started.
+        '''
+        # Run sequentially in main process if only one job is allowed
+        if self.__jobs == 1:
+            for name in self.__order:
+                on_complete(name, local_job(name)
+                            if is_local(name) else job(name))
+            return
+
+        # Warn about models which can not fit in memory budget
+        if self.__max_memory is not None:
+            for name in self.__order:
+                if not is_local(name) and self.__get_memory(name) > self.__max_memory:
+                    print(WARNING_PREFIX +
+                          f"Model {name} needs about {self.__get_memory(name) // 2**20} MiB, over memory budget. It will be built alone.")
+
+        completed: set[str] = set()
+        pending = list(self.__order)
+        running: dict[Future, str] = {}
+
+        with ProcessPoolExecutor(max_workers=self.__jobs) as pool:
+            try:
+                while pending or running:
+                    # Run local models whose dependencies are completed
+                    ready: list[str] = []
+                    for name in list(pending):
+                        if not all(dependency in completed for dependency in self.__dependencies[name]):
+                            continue
+                        if is_local(name):
+                            pending.remove(name)
+                            on_complete(name, local_job(name))
+                            completed.add(name)
+                        else:
+                            ready.append(name)
+
+                    # Local jobs may complete dependencies of other pending models
+                    if not ready and not running:
+                        continue
+
+                    # Start ready models which fit in free workers and memory budget
+                    for name in self.__select_jobs(ready, running):
+                        pending.remove(name)
+                        running[pool.submit(job, name)] = name
+
+                    # Wait for any running model
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        on_complete(name, future.result())
+                        completed.add(name)
+            except BaseException:
+                # Stop scheduling new models if any model failed
+                for future in running:
+                    future.cancel()
+                raise
@@ -0,0 +1,249 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import shutil
+import hashlib
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from ._onnx_stream import copy_range
+from ._checksums import load_checksums
+from ._placement import place_file, publish_directory
+from ..utils._abstract import SyncResult
+from ..utils._utils import get_repository_files, get_empty_directories
+from ..utils._constants import STAGING_DIR, SYNC_BLOCK_SIZE
+
+
+def get_directory_files(directory: str) -> list[str]:
+    '''
+    Get relative paths of files in directory. Return empty list if directory does not exist.
+    '''
+    paths: list[str] = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            paths.append(os.path.relpath(os.path.join(
+                root, file), directory).replace(os.sep, "/"))
+    return paths
+
+
+def get_block_hash(fd: int, offset: int, length: int) -> bytes:
+    '''
+    Get hash of a block of file.
+    '''
+    return hashlib.blake2b(os.pread(fd, length, offset), digest_size=16).digest()
+
+
+def get_block_matches(source_fd: int, source_size: int, target_fd: int, target_size: int, block_size: int) -> list[Optional[int]]:
+    '''
+    Find blocks of source file which are unchanged in target file.
+    Return offset of each source block in target file, or None if the block changed.
+    Blocks are compared at the same offset, and at the same offset from end of file,
+    so blocks after a resized region (Eg: a rewritten ONNX header) are still matched.
+    '''
+    block_count = (source_size + block_size - 1) // block_size
+    matches: list[Optional[int]] = [None] * block_count
+    shifts = [0] if source_size == target_size else [
+        0, source_size - target_size]
+
+    for index in range(block_count):
+        offset = index * block_size
+        length = min(block_size, source_size - offset)
+        source_hash = None
+        for shift in shifts:
+            target_offset = offset - shift
+            if target_offset < 0 or target_offset + length > target_size:
+                continue
+            source_hash = source_hash or get_block_hash(
+                source_fd, offset, length)
+            if get_block_hash(target_fd, target_offset, length) == source_hash:
+                matches[index] = target_offset
+                break
+    return matches
+
+
+def sync_file(source: str, target: Optional[str], destination: str, block_size: int = SYNC_BLOCK_SIZE) -> tuple[int, bool]:
+    '''
+    Write source file to destination, reusing unchanged blocks of target file.
+    Only changed blocks are read from source, unchanged blocks are copied inside target filesystem.
+    Return number of bytes transferred from source, and whether file is unchanged.
+    '''
+    source_size = os.path.getsize(source)
+    if target is None:
+        place_file(source, destination, "copy")
+        return source_size, False
+
+    target_size = os.path.getsize(target)
+    with open(source, "rb") as source_file, open(target, "rb") as target_file:
+        source_fd, target_fd = source_file.fileno(), target_file.fileno()
+        matches = get_block_matches(
+            source_fd, source_size, target_fd, target_size, block_size)
+
+        # Link unchanged file
+        if source_size == target_size and all(match == index * block_size for index, match in enumerate(matches)):
+            place_file(target, destination, "auto")
+            return 0, True
+
+        # Write changed blocks from source, copy unchanged blocks from target
+        transferred = 0
+        with open(destination, "wb") as destination_file:
+            destination_fd = destination_file.fileno()
+            for index, match in enumerate(matches):
+                offset = index * block_size
+                length = min(block_size, source_size - offset)
+                if match is None:
+                    os.write(destination_fd, os.pread(
+                        source_fd, length, offset))
+                    transferred += length
+                else:
+                    copy_range(target_fd, destination_fd, match, length)
+        return transferred, False
+
+
+def get_unchanged_paths(source: str, target: str, paths: list[str]) -> set[str]:
+    '''
+    Find files of a model directory which are unchanged in target, from checksum manifests of both directories.
+    A file is unchanged if source file still matches source manifest, target file has the expected size,
+    and chunk hashes of both manifests are equal. No file data is read.
+    '''
+    source_manifest = load_checksums(source)
+    target_manifest = load_checksums(target)
+    if source_manifest is None or target_manifest is None \
+            or source_manifest["algorithm"] != target_manifest["algorithm"] \
+            or source_manifest["chunk_size"] != target_manifest["chunk_size"]:
+        return set()
+
+    unchanged: set[str] = set()
+    for path in paths:
+        source_entry = source_manifest["files"].get(path)
+        target_entry = target_manifest["files"].get(path)
+        if source_entry is None or target_entry is None or source_entry["chunks"] != target_entry["chunks"]:
+            continue
+        try:
+            source_info = os.stat(os.path.join(source, path))
+            target_size = os.path.getsize(os.path.join(target, path))
+        except OSError:
+            continue
+        if source_info.st_size == source_entry["size"] == target_size == target_entry["size"] \
+                and source_info.st_mtime_ns == source_entry["mtime_ns"]:
+            unchanged.add(path)
+    return unchanged
+
+
+def sync_model(source: str, target: str, staging: str, paths: list[str], block_size: int = SYNC_BLOCK_SIZE) -> SyncResult:
+    '''
+    Sync a model directory to target. New model directory is written to staging directory,
+    then replaces target model directory at once. Target is not modified if model is unchanged.
+    Files which are unchanged by checksum manifests are linked from target without reading their data,
+    other files are compared by blocks.
+    `paths` are relative paths of files in model directory. Empty directories are synced too, Eg: ensemble versions.
+    '''
+    model = os.path.basename(source)
+    target_paths = set(get_directory_files(target))
+    unchanged_paths = get_unchanged_paths(source, target, paths)
+    directories = get_empty_directories(source)
+    shutil.rmtree(staging, ignore_errors=True)
+
+    transferred = 0
+    total = 0
+    changed = set(paths) != target_paths or directories != get_empty_directories(target)
+    for directory in directories:
+        os.makedirs(os.path.join(staging, directory), exist_ok=True)
+    for path in paths:
+        source_path = os.path.join(source, path)
+        target_path = os.path.join(target, path) if path in target_paths else None
+        staging_path = os.path.join(staging, path)
+        os.makedirs(os.path.dirname(staging_path), exist_ok=True)
+        total += os.path.getsize(source_path)
+
+        if path in unchanged_paths:
+            place_file(target_path, staging_path, "auto")
+            continue
+        file_transferred, unchanged = sync_file(
+            source_path, target_path, staging_path, block_size)
+        transferred += file_transferred
+        changed = changed or not unchanged
+        if not unchanged:
+            shutil.copymode(source_path, staging_path)
+
+    # Keep target model directory if nothing changed
+    if not changed:
+        shutil.rmtree(staging)
+        return {"model": model, "status": "unchanged", "transferred_bytes": 0, "total_bytes": total}
+
+    status = "updated" if os.path.isdir(target) else "created"
+    publish_directory(staging, target)
+    return {"model": model, "status": status, "transferred_bytes": transferred, "total_bytes": total}
+
+
+def sync_repository(
+    source: str,
+    target: str,
+    models: Optional[list[str]] = None,
+    threads: Optional[int] = None,
+    block_size: int = SYNC_BLOCK_SIZE,
+    delete: bool = False
+) -> list[SyncResult]:
+    '''
+    Sync models of built model repository to target directory. Models are synced in parallel threads.
+    If `delete` is True, models in target which are not in source are removed.
+    '''
+    # Group files by model
+    model_paths: dict[str, list[str]] = {}
+    for path in get_repository_files(source):
+        model, relative_path = path.split("/", 1)
+        model_paths.setdefault(model, []).append(relative_path)
+    for model in models or []:
+        if model not in model_paths:
+            raise ValueError(f"Model {model} not found in {source}.")
+    selected_models = sorted(models or model_paths)
+
+    os.makedirs(target, exist_ok=True)
+    staging_directory = os.path.join(target, STAGING_DIR)
+
+    def __sync(model: str) -> SyncResult:
+        return sync_model(os.path.join(source, model), os.path.join(target, model),
+                          os.path.join(staging_directory, model), model_paths[model], block_size)
+
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as pool:
+        results = list(pool.map(__sync, selected_models))
+
+    # Remove models which are not in source
+    if delete:
+        for model in sorted(os.listdir(target)):
+            if model.startswith(".") or model in model_paths or not os.path.isdir(os.path.join(target, model)):
+                continue
+            shutil.rmtree(os.path.join(target, model))
+            results.append({"model": model, "status": "deleted",
+                           "transferred_bytes": 0, "total_bytes": 0})
+
+    try:
+        os.rmdir(staging_directory)
+    except OSError:
+        pass
+    return results
@@ -0,0 +1,304 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Callable, Optional
+from ._build_pbtxt import BuildProtoBufTxt
+from ._onnx_stream import read_onnx_external_data, get_external_data_locations
+from ..utils._abstract import TritonConfig
+from ..utils._utils import get_absolute_path
+from ..utils._constants import (
+    INFO_PREFIX,
+    ERROR_PREFIX,
+    WARNING_PREFIX,
+    SUCCESS_PREFIX,
+    WATCH_POLL_INTERVAL,
+    WATCH_DEBOUNCE
+)
+
+# Inotify events of a file which is written, replaced, created or deleted
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# Header of an inotify event: wd, mask, cookie, name length
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def get_watched_paths(config_path: str, config: TritonConfig) -> list[str]:
+    '''
+    Get configuration file and every source file referenced by models.
+    '''
+    paths = [get_absolute_path(config_path)]
+    for model_config in config["models"].values():
+        for version in model_config.get("versions", []):
+            if model_config["engine"] == "onnx":
+                model_path = get_absolute_path(version["path"])
+                paths.append(model_path)
+                # External data files of model
+                try:
+                    for location in get_external_data_locations(read_onnx_external_data(model_path)):
+                        paths.append(os.path.join(
+                            os.path.dirname(model_path), location))
+                except (OSError, ValueError, EOFError):
+                    pass
+            elif model_config["engine"] == "python":
+                paths.append(get_absolute_path(version["module"]["path"]))
+    return list(dict.fromkeys(paths))
+
+
+class FileWatcher:
+    '''
+    File Watcher Class.
+    Wait for changes of files. Use inotify on Linux, fallback to polling file stats.
+    '''
+
+    def __init__(self, paths: list[str]):
+        self.__paths: set[str] = set()
+        self.__stats: dict[str, Optional[tuple[int, int]]] = {}
+        self.__directories: dict[int, str] = {}
+        self.__libc = None
+        self.__fd = self.__init_inotify()
+        self.set_paths(paths)
+
+    def __init_inotify(self) -> Optional[int]:
+        '''
+        Initialize inotify. Return None if not supported.
+        '''
+        library = ctypes.util.find_library("c")
+        if library is None:
+            return None
+        try:
+            libc = ctypes.CDLL(library, use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        self.__libc = libc
+        return fd
+
+    def __get_stat(self, path: str) -> Optional[tuple[int, int]]:
+        '''
+        Get modified time and size of a file. Return None if not exists.
+        '''
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_inotify(self) -> bool:
+        '''
+        Check if inotify is used.
+        '''
+        return self.__fd is not None
+
+    def set_paths(self, paths: list[str]):
+        '''
+        Set watched files. Parent directories are watched, so replaced files are detected.
+        Stats of files which are already watched are kept from the last poll,
+        so files changed since then, eg: during a build, are detected by the next poll.
+        '''
+        self.__paths = set(paths)
+        self.__stats = {path: self.__stats[path] if path in self.__stats else self.__get_stat(
+            path) for path in self.__paths}
+        if self.__fd is None:
+            return
+        for directory in {os.path.dirname(path) for path in self.__paths}:
+            if directory in self.__directories.values():
+                continue
+            wd = self.__libc.inotify_add_watch(
+                self.__fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self.__directories[wd] = directory
+
+    def __read_events(self) -> set[str]:
+        '''
+        Read pending inotify events. Return changed watched files.
+        '''
+        changed: set[str] = set()
+        while True:
+            try:
+                data = os.read(self.__fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if wd not in self.__directories:
+                    continue
+                path = os.path.join(self.__directories[wd], os.fsdecode(name))
+                if path in self.__paths:
+                    changed.add(path)
+
+    def __poll(self) -> set[str]:
+        '''
+        Compare file stats with previous stats. Return changed watched files.
+        '''
+        changed: set[str] = set()
+        for path in self.__paths:
+            stat = self.__get_stat(path)
+            if stat != self.__stats[path]:
+                self.__stats[path] = stat
+                changed.add(path)
+        return changed
+
+    def wait(self) -> set[str]:
+        '''
+        Block until watched files change. Return changed files.
+        Changes in a short time are grouped, so a file written by chunks triggers once.
+        '''
+        while True:
+            if self.__fd is not None:
+                select.select([self.__fd], [], [])
+                changed = self.__read_events()
+            else:
+                time.sleep(WATCH_POLL_INTERVAL)
+                changed = self.__poll()
+            if not changed:
+                continue
+
+            # Group following changes
+            time.sleep(WATCH_DEBOUNCE)
+            changed |= self.__read_events() if self.__fd is not None else self.__poll()
+            return changed
+
+    def close(self):
+        '''
+        Close inotify file descriptor.
+        '''
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+
+class TritonRepositoryClient:
+    '''
+    Triton Repository Client Class.
+    Load and unload models with Triton model repository API. Server must run with `--model-control-mode=explicit`.
+    '''
+
+    def __init__(self, server_url: str, timeout: float = 300):
+        self.__server_url = server_url.rstrip("/")
+        if "://" not in self.__server_url:
+            self.__server_url = "http://" + self.__server_url
+        self.__timeout = timeout
+
+    def load_model(self, name: str):
+        '''
+        Load or reload a model.
+        '''
+        self.__post(name, "load")
+
+    def unload_model(self, name: str):
+        '''
+        Unload a model.
+        '''
+        self.__post(name, "unload")
+
+    def __post(self, name: str, action: str):
+        '''
+        Send a model repository request of a model.
+        '''
+        url = f"{self.__server_url}/v2/repository/models/{urllib.parse.quote(name)}/{action}"
+        request = urllib.request.Request(url, data=b"", method="POST")
+        with urllib.request.urlopen(request, timeout=self.__timeout):
+            pass
+
+
+def watch_build(config_path: str, load_config: Callable[[], TritonConfig], jobs: int = 1, server_url: Optional[str] = None, max_memory: Optional[int] = None):
+    '''
+    Watch configuration file and model files. Rebuild changed models and reload them on server.
+    Models removed from configuration are unloaded from server.
+    '''
+    client = TritonRepositoryClient(server_url) if server_url else None
+    config = load_config()
+    models = list(config["models"])
+    watcher = FileWatcher(get_watched_paths(config_path, config))
+    print(INFO_PREFIX +
+          f"Watching for changes ({'inotify' if watcher.is_inotify() else 'polling'}). Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            changed = watcher.wait()
+            print(INFO_PREFIX +
+                  f"Changed: {', '.join(sorted(os.path.basename(path) for path in changed))}")
+
+            # Reload configuration and rebuild. Unchanged models are skipped by manifest.
+            try:
+                config = load_config()
+                watcher.set_paths(get_watched_paths(config_path, config))
+                built_models = BuildProtoBufTxt(
+                    config, jobs=jobs, max_memory=max_memory).build()
+            except Exception as e:
+                print(ERROR_PREFIX + str(e))
+                continue
+            removed_models = [
+                name for name in models if name not in config["models"]]
+            models = list(config["models"])
+
+            # Reload built models on server, steps before ensembles
+            if client is None:
+                continue
+            for name in built_models:
+                try:
+                    client.load_model(name)
+                    print(SUCCESS_PREFIX + f"Model {name} reloaded.")
+                except (urllib.error.URLError, OSError) as e:
+                    print(WARNING_PREFIX +
+                          f"Failed to reload model {name}. {e}")
+
+            # Unload removed models, after ensembles which used them are reloaded
+            for name in removed_models:
+                try:
+                    client.unload_model(name)
+                    print(SUCCESS_PREFIX + f"Model {name} unloaded.")
+                except (urllib.error.URLError, OSError) as e:
+                    print(WARNING_PREFIX +
+                          f"Failed to unload model {name}. {e}")
+    except KeyboardInterrupt:
+        print(INFO_PREFIX + "Stopped watching.")
+    finally:
+        watcher.close()
@@ -0,0 +1,103 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import argparse
+from ..build._bundle import BundleReader
+from ..utils._constants import ERROR_PREFIX, INFO_PREFIX, SUCCESS_PREFIX
+
+
+# Define argument parser
+parser = argparse.ArgumentParser(
+    description='Triton Server Model Repository Bundle Module.')
+
+
+def main():
+    '''
+    Main function for extracting model repository bundle.
+    '''
+    # Add arguments -----------------------------------------------------------
+    # Bundle path. Eg: build/model_repository.trsp.zst
+    parser.add_argument('bundle', type=str,
+                        help='Path to the bundle created by `trsp-build --bundle`')
+
+    # Destination directory. Eg: /models (default: current directory)
+    parser.add_argument('-o', '--output', type=str, default=os.getcwd(),
+                        help='Directory to extract models to')
+
+    # Models to extract. Eg: model_a model_b (default: all models)
+    parser.add_argument('--models', type=str, nargs='+',
+                        help='Names of models to extract. All models are extracted if not provided.')
+
+    # Number of threads. Eg: 8 (default: all CPU cores)
+    parser.add_argument('--threads', type=int,
+                        help='Number of threads to verify and extract files.')
+
+    # List models. Eg: False (default: False)
+    parser.add_argument('--list', action='store_true',
+                        help='List models in bundle.')
+
+    # Verify only. Eg: False (default: False)
+    parser.add_argument('--verify', action='store_true',
+                        help='Verify checksums of files in bundle without extracting them.')
+
+    # Parse arguments --------------------------------------------------------
+    args = parser.parse_args()
+
+    try:
+        reader = BundleReader(args.bundle)
+
+        # List models in bundle
+        if args.list:
+            for model in reader.get_models():
+                print(model)
+            return
+
+        # Verify bundle without extracting
+        if args.verify:
+            corrupted = reader.verify(args.models, args.threads)
+            if corrupted:
+                print(ERROR_PREFIX +
+                      f"Corrupted files: {', '.join(corrupted)}.")
+                return
+            print(SUCCESS_PREFIX + "Bundle verified.")
+            return
+
+        # Extract models
+        print(INFO_PREFIX + "Extracting bundle...")
+        models = reader.extract(args.output, args.models, args.threads)
+        print(SUCCESS_PREFIX +
+              f"Extracted models: {', '.join(models)}. Output: {args.output}")
+    except Exception as e:
+        print(ERROR_PREFIX + str(e))
+
+
+# Run main function if module is run directly
+if __name__ == '__main__':
+    main()
@@ -52,7 +52,10 @@ def main():
     # Get model repository path
     folders = os.listdir(build_directory)
     model_repository = None
-    for folder in folders:
+    for folder in sorted(folders):
+        # Skip content-addressed store and staging directories
+        if folder.startswith("."):
+            continue
         if os.path.isdir(os.path.join(build_directory, folder)):
             model_repository = folder
             break
@@ -0,0 +1,93 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import argparse
+from ..build._sync import sync_repository
+from ..utils._utils import get_size_bytes, get_size_string
+from ..utils._constants import ERROR_PREFIX, INFO_PREFIX, SUCCESS_PREFIX, SYNC_BLOCK_SIZE
+
+
+# Define argument parser
+parser = argparse.ArgumentParser(
+    description='Triton Server Model Repository Sync Module.')
+
+
+def main():
+    '''
+    Main function for syncing built model repository to a deployment target.
+    '''
+    # Add arguments -----------------------------------------------------------
+    # Built model repository. Eg: build/model_repository
+    parser.add_argument('source', type=str,
+                        help='Path to the built model repository')
+
+    # Target directory. Eg: /mnt/serving/models
+    parser.add_argument('target', type=str,
+                        help='Path to the target model repository. Local path or mounted remote filesystem.')
+
+    # Models to sync. Eg: model_a model_b (default: all models)
+    parser.add_argument('--models', type=str, nargs='+',
+                        help='Names of models to sync. All models are synced if not provided.')
+
+    # Number of threads. Eg: 8 (default: all CPU cores)
+    parser.add_argument('--threads', type=int,
+                        help='Number of models synced in parallel.')
+
+    # Block size of checksums. Eg: 1M (default: 128K)
+    parser.add_argument('--block-size', type=get_size_bytes, default=SYNC_BLOCK_SIZE,
+                        help='Size of compared blocks. Eg: 64K, 1M.')
+
+    # Delete models which are not in source. Eg: False (default: False)
+    parser.add_argument('--delete', action='store_true',
+                        help='Remove models in target which are not in source.')
+
+    # Parse arguments --------------------------------------------------------
+    args = parser.parse_args()
+
+    try:
+        print(INFO_PREFIX + "Syncing model repository...")
+        results = sync_repository(args.source, args.target, args.models,
+                                  args.threads, args.block_size, args.delete)
+    except Exception as e:
+        print(ERROR_PREFIX + str(e))
+        return
+
+    # Report transferred bytes of each model
+    for result in results:
+        print(INFO_PREFIX +
+              f"Model {result['model']} {result['status']}. {get_size_string(result['transferred_bytes'])} transferred of {get_size_string(result['total_bytes'])}.")
+    transferred = sum(result["transferred_bytes"] for result in results)
+    total = sum(result["total_bytes"] for result in results)
+    print(SUCCESS_PREFIX +
+          f"Sync completed. {get_size_string(transferred)} transferred of {get_size_string(total)}. Target: {args.target}")
+
+
+# Run main function if module is run directly
+if __name__ == '__main__':
+    main()
@@ -94,6 +94,19 @@ class PythonModuleConfig(TypedDict):
     finalize: Optional[str]
 
 
+class CalibrationConfig(TypedDict):
+    '''
+    {
+        "path": str, # directory of .npy or .npz files
+        "method": str, # minmax, entropy, percentile or distribution
+        "window": int # number of samples held in memory
+    }
+    '''
+    path: str
+    method: Optional[str]
+    window: Optional[int]
+
+
 class VersionConfig(TypedDict):
     '''
     {
@@ -143,6 +156,14 @@ class ModelConfig(TypedDict):
         "max_batch_size": int,
         "versions": List[VersionConfig],
         "dynamic_batching": bool,
+        "external_data": str,
+        "optimize": str, # basic, extended or all
+        "quantize": str, # dynamic or static
+        "calibration": CalibrationConfig,
+        "precision": str, # fp16 or mixed
+        "precision_block_list": List[str], # operators kept in float32
+        "format": str, # onnx or ort
+        "retention": Union[str, int], # declared or number of kept versions
         "max_queue_delay_microseconds": int,
         "instance_group": InstanceGroupConfig,
         "requirements": List[str],
@@ -154,6 +175,14 @@ class ModelConfig(TypedDict):
     max_batch_size: int
     versions: List[VersionConfig]
     dynamic_batching: Optional[bool]
+    external_data: Optional[str]
+    optimize: Optional[str]
+    quantize: Optional[str]
+    calibration: Optional[CalibrationConfig]
+    precision: Optional[str]
+    precision_block_list: Optional[List[str]]
+    format: Optional[str]
+    retention: Optional[Union[str, int]]
     dtype: Optional[str]
     max_queue_delay_microseconds: Optional[int]
     instance_group: Optional[List[InstanceGroupConfig]]
@@ -174,6 +203,8 @@ class TritonConfig(TypedDict):
     model_repository: str
     models: Dict[str, ModelConfig]
     requirements: Optional[List[str]]
+    placement: Optional[str]
+    cas: Optional[bool]
 
 
 class FormatedTensors(TypedDict):
@@ -205,20 +236,26 @@ class FormatedTritonConfig(TypedDict):
     {
         "name": str,
         "backend": str,
+        "default_model_filename": str,
         "max_batch_size": int,
         "input": List[FormatedTensors],
         "output": List[FormatedTensors],
         "dynamic_batching": Dict,
-        "instance_group": Dict
+        "version_policy": Dict,
+        "instance_group": Dict,
+        "parameters": List[Dict] # {"key": str, "value": {"string_value": str}}
     }
     '''
     name: str
     backend: str
+    default_model_filename: str
     max_batch_size: int
     input: List[FormatedTensors]
     output: List[FormatedTensors]
     dynamic_batching: Dict
+    version_policy: Dict
     instance_group: Dict
+    parameters: List[Dict]
 
 
 class EnsembleSchedulingInputOutputMap(TypedDict):
@@ -254,3 +291,245 @@ class EnsembleSchedulingConfig(TypedDict):
     }
     '''
     step: List[EnsembleSchedulingStep]
+
+
+class QuantizationReport(TypedDict):
+    '''
+    {
+        "version": int,
+        "source_bytes": int,
+        "quantized_bytes": int,
+        "source_latency_ms": float, # None if latency can not be measured
+        "quantized_latency_ms": float
+    }
+    '''
+    version: int
+    source_bytes: int
+    quantized_bytes: int
+    source_latency_ms: Optional[float]
+    quantized_latency_ms: Optional[float]
+
+
+class ManifestModelEntry(TypedDict):
+    '''
+    {
+        "fingerprint": str,
+        "tensors": {
+            "input": List[Dict[str, str]],
+            "output": List[Dict[str, str]]
+        },
+        "quantization": List[QuantizationReport]
+    }
+    '''
+    fingerprint: str
+    tensors: Dict[str, List[Dict[str, str]]]
+    quantization: Optional[List[QuantizationReport]]
+
+
+class OnnxExternalTensor(TypedDict):
+    '''
+    {
+        "name": str,
+        "location": str,
+        "offset": int,
+        "length": Optional[int]
+    }
+    '''
+    name: str
+    location: str
+    offset: int
+    length: Optional[int]
+
+
+class OnnxMetadata(TypedDict):
+    '''
+    {
+        "input": List[onnx.ValueInfoProto],
+        "output": List[onnx.ValueInfoProto],
+        "opset": Dict[str, int],
+        "external_data": List[OnnxExternalTensor],
+        "initializer_bytes": int
+    }
+    '''
+    input: List[Any]
+    output: List[Any]
+    opset: Dict[str, int]
+    external_data: List[OnnxExternalTensor]
+    initializer_bytes: int
+
+
+class ProfileEvent(TypedDict):
+    '''
+    {
+        "model": str,
+        "phase": str,
+        "start": float,
+        "duration": float,
+        "read_bytes": int,
+        "write_bytes": int,
+        "peak_rss": int,
+        "pid": int
+    }
+    '''
+    model: str
+    phase: str
+    start: float
+    duration: float
+    read_bytes: int
+    write_bytes: int
+    peak_rss: int
+    pid: int
+
+
+class BuildResult(TypedDict):
+    '''
+    {
+        "tensors": FormatedInputOutputTensors,
+        "profile": List[ProfileEvent],
+        "quantization": List[QuantizationReport]
+    }
+    '''
+    tensors: FormatedInputOutputTensors
+    profile: List[ProfileEvent]
+    quantization: Optional[List[QuantizationReport]]
+
+
+class BundleEntry(TypedDict):
+    '''
+    {
+        "path": str,
+        "size": int,
+        "mode": int,
+        "sha256": str,
+        "chunks": List[List[int]] # [offset, length] of compressed frames
+    }
+    '''
+    path: str
+    size: int
+    mode: int
+    sha256: str
+    chunks: List[List[int]]
+
+
+class SyncResult(TypedDict):
+    '''
+    {
+        "model": str,
+        "status": str, # created, updated, unchanged or deleted
+        "transferred_bytes": int,
+        "total_bytes": int
+    }
+    '''
+    model: str
+    status: str
+    transferred_bytes: int
+    total_bytes: int
+
+
+class PublishManifest(TypedDict):
+    '''
+    {
+        "version": str,
+        "prefix": str, # key prefix of published version
+        "files": Dict[str, str], # relative path: sha256
+        "previous": List[str] # key prefixes of kept previous versions, latest first
+    }
+    '''
+    version: str
+    prefix: str
+    files: Dict[str, str]
+    previous: List[str]
+
+
+class PublishResult(TypedDict):
+    '''
+    {
+        "version": str,
+        "url": str,
+        "uploaded_bytes": int,
+        "copied_bytes": int,
+        "skipped_bytes": int, # already published in version prefix
+        "deleted_objects": int,
+        "unchanged": bool
+    }
+    '''
+    version: str
+    url: str
+    uploaded_bytes: int
+    copied_bytes: int
+    skipped_bytes: int
+    deleted_objects: int
+    unchanged: bool
+
+
+class PlanEntry(TypedDict):
+    '''
+    {
+        "model": str,
+        "action": str, # create, rewrite, unchanged or remove
+        "versions": Dict[str, str], # version: create, rewrite, retain or remove
+        "changed_fields": List[str],
+        "diff": str,
+        "written_bytes": int,
+        "linked_bytes": int
+    }
+    '''
+    model: str
+    action: str
+    versions: Dict[str, str]
+    changed_fields: List[str]
+    diff: str
+    written_bytes: int
+    linked_bytes: int
+
+
+class ChecksumEntry(TypedDict):
+    '''
+    {
+        "size": int,
+        "mtime_ns": int,
+        "chunks": List[str] # hash of each chunk
+    }
+    '''
+    size: int
+    mtime_ns: int
+    chunks: List[str]
+
+
+class ChecksumManifest(TypedDict):
+    '''
+    {
+        "algorithm": str,
+        "chunk_size": int,
+        "files": Dict[str, ChecksumEntry]
+    }
+    '''
+    algorithm: str
+    chunk_size: int
+    files: Dict[str, ChecksumEntry]
+
+
+class VerifyIssue(TypedDict):
+    '''
+    {
+        "path": str,
+        "reason": str # missing, size, hash or no_checksums
+    }
+    '''
+    path: str
+    reason: str
+
+
+class OciResult(TypedDict):
+    '''
+    {
+        "digest": str, # digest of image manifest
+        "layers": int,
+        "written_layers": int,
+        "written_bytes": int
+    }
+    '''
+    digest: str
+    layers: int
+    written_layers: int
+    written_bytes: int
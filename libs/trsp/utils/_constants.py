@@ -38,3 +38,63 @@ INFO_PREFIX = "\033[94mINFO: \033[0m"
 TRITON_PRESEVED_KEYWORDS = [
     "model", "config", "triton_python_backend_utils", "pb_utils", "TritonPythonModel"]
 BUILD_DIR = "build"
+MANIFEST_FILE = ".trsp-manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+PLACEMENT_MODES = ["auto", "copy", "symlink"]
+EXTERNAL_DATA_MODES = ["keep", "consolidate"]
+OPTIMIZE_LEVELS = ["basic", "extended", "all"]
+QUANTIZE_MODES = ["dynamic", "static"]
+CALIBRATION_METHODS = ["minmax", "entropy", "percentile", "distribution"]
+CALIBRATION_WINDOW = 8
+PRECISION_MODES = ["fp16", "mixed"]
+MODEL_FORMATS = ["onnx", "ort"]
+ORT_MODEL_FILE = "model.ort"
+# Session config entries of ORT format models, passed by Triton onnxruntime backend
+ORT_SESSION_PARAMETERS = {
+    "session.load_model_format": "ORT",
+    "session.use_ort_model_bytes_for_initializers": "1"
+}
+# ONNX TensorProto data types
+ONNX_DTYPES = {
+    1: "float32",
+    2: "uint8",
+    3: "int8",
+    4: "uint16",
+    5: "int16",
+    6: "int32",
+    7: "int64",
+    8: "string",
+    9: "bool",
+    10: "float16",
+    11: "float64",
+    12: "uint32",
+    13: "uint64",
+    16: "bfloat16"
+}
+QUANTIZED_MODEL_SUFFIX = "_int8"
+LATENCY_RUNS = 20
+EXTERNAL_DATA_FILE = "model.onnx.data"
+EXTERNAL_DATA_ALIGNMENT = 4096
+CAS_DIR = ".cas"
+WATCH_POLL_INTERVAL = 1.0
+WATCH_DEBOUNCE = 0.2
+CACHE_FILE = ".trsp-cache.sqlite"
+STAGING_DIR = ".staging"
+PROFILE_REPORT_FILE = "trsp-profile.json"
+PROFILE_TRACE_FILE = "trsp-trace.json"
+MEMORY_JOB_OVERHEAD = 64 * 1024 * 1024
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+BUNDLE_SUFFIX = ".trsp.zst"
+BUNDLE_MAGIC = b"TRSPBDL1"
+BUNDLE_CHUNK_SIZE = 4 * 1024 * 1024
+BUNDLE_LEVEL = 3
+SYNC_BLOCK_SIZE = 128 * 1024
+S3_MANIFEST_FILE = "trsp-current.json"
+S3_MULTIPART_SIZE = 64 * 1024 * 1024
+S3_KEEP_VERSIONS = 2
+S3_DELETE_BATCH = 1000
+CHECKSUM_FILE = ".trsp-checksums.json"
+CHECKSUM_CHUNK_SIZE = 64 * 1024 * 1024
+OCI_SUFFIX = ".oci"
+OCI_MODELS_DIR = "models"
+OCI_LAYER_CACHE_FILE = ".trsp-layers.json"
@@ -35,7 +35,7 @@ def get_pip_install(requirements: list[str]):
     return '\n'.join(f'RUN pip install {requirement}' for requirement in requirements)
 
 
-def get_docker_template(requirements: list[str]): return f'''# Dockerfile for Deploy Triton Server.
+def get_docker_template(requirements: list[str], model_repository: str = "/models"): return f'''# Dockerfile for Deploy Triton Server.
 # Auto generated by `trsp` module. Developed by Ming-doan.
 # ------------------------------
 
@@ -54,6 +54,6 @@ EXPOSE 8001
 EXPOSE 8002
 
 # Run the server
-CMD ["tritonserver", "--model-repository=/models"]
+CMD ["tritonserver", "--model-repository={model_repository}"]
 
 '''
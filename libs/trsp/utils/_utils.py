@@ -28,8 +28,9 @@ SOFTWARE.
 '''
 
 import os
+import hashlib
 from ._abstract import TritonEnum, PythonModuleConfig, FormatedTritonConfig, FormatedInputOutputTensors
-from ._constants import TRITON_PRESEVED_KEYWORDS
+from ._constants import TRITON_PRESEVED_KEYWORDS, HASH_CHUNK_SIZE, SIZE_UNITS
 
 
 def get_absolute_path(path: str) -> str:
@@ -57,6 +58,71 @@ def get_absolute_path(path: str) -> str:
     return os.path.join(os.getcwd(), path)
 
 
+def get_file_hash(path: str) -> str:
+    '''
+    Get sha256 hash of a file. File is read by chunks.
+    '''
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_repository_files(model_repository: str) -> list[str]:
+    '''
+    Get relative paths of files in model directories, sorted.
+    Files at root of model repository, eg: build manifest, are not included.
+    '''
+    paths: list[str] = []
+    for root, directories, files in os.walk(model_repository, followlinks=True):
+        directories.sort()
+        for file in files:
+            path = os.path.relpath(os.path.join(
+                root, file), model_repository).replace(os.sep, "/")
+            if "/" in path:
+                paths.append(path)
+    return sorted(paths)
+
+
+def get_empty_directories(directory: str) -> list[str]:
+    '''
+    Get relative paths of empty sub directories, sorted. Return empty list if directory does not exist.
+    Eg: version directories of ensemble models, which are required by Triton Server but hold no files.
+    '''
+    paths: list[str] = []
+    for root, directories, files in os.walk(directory, followlinks=True):
+        if not directories and not files and root != directory:
+            paths.append(os.path.relpath(
+                root, directory).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def get_size_bytes(size: str) -> int:
+    '''
+    Get number of bytes from a size string. Eg: 512M, 8G, 1.5GiB, 1048576.
+    '''
+    value = size.strip().upper().removesuffix("IB").removesuffix("B")
+    unit = value[-1] if value and value[-1] in SIZE_UNITS else ""
+    try:
+        number = float(value[:len(value) - len(unit)])
+    except ValueError:
+        raise ValueError(f"Invalid size `{size}`. Eg: 512M, 8G.")
+    if number <= 0:
+        raise ValueError(f"Size `{size}` must be positive.")
+    return int(number * SIZE_UNITS[unit])
+
+
+def get_size_string(size: int) -> str:
+    '''
+    Get readable size string from number of bytes. Eg: 12.0 KiB, 1.50 GiB.
+    '''
+    for unit in ["", "Ki", "Mi", "Gi"]:
+        if size < 1024 or unit == "Gi":
+            return f"{size} B" if unit == "" else f"{size:.2f} {unit}B"
+        size /= 1024
+
+
 def dictionary_to_string(dictionary: FormatedTritonConfig, indent: int = 0, tab: int = 2) -> str:
     '''
     Convert dictionary to pretty string.
@@ -129,6 +195,10 @@ def get_dtype_string(dtype: str) -> str:
         return TritonEnum("TYPE_FP32")
     if dtype == "float64":
         return TritonEnum("TYPE_FP64")
+    if dtype == "float16":
+        return TritonEnum("TYPE_FP16")
+    if dtype == "bfloat16":
+        return TritonEnum("TYPE_BF16")
     if dtype == "int32":
         return TritonEnum("TYPE_INT32")
     if dtype == "int64":
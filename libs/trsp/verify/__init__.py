@@ -0,0 +1,98 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import sys
+import argparse
+from ..build._checksums import verify_repository, repair_files
+from ..utils._constants import ERROR_PREFIX, INFO_PREFIX, SUCCESS_PREFIX, CHECKSUM_FILE
+
+
+# Define argument parser
+parser = argparse.ArgumentParser(
+    description='Triton Server Model Repository Verify Module.')
+
+
+def main():
+    '''
+    Main function for verifying deployed model repository.
+    Exit with status 1 if any file is mismatched and not repaired.
+    '''
+    # Add arguments -----------------------------------------------------------
+    # Model repository path. Eg: /models
+    parser.add_argument('model_repository', type=str,
+                        help='Path to the deployed model repository')
+
+    # Models to verify. Eg: model_a model_b (default: all models)
+    parser.add_argument('--models', type=str, nargs='+',
+                        help='Names of models to verify. All models are verified if not provided.')
+
+    # Number of processes. Eg: 8 (default: all CPU cores)
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Number of processes to hash files.')
+
+    # Repair from source repository. Eg: /mnt/build/model_repository
+    parser.add_argument('--repair', type=str,
+                        help='Path to a source model repository, eg: the build directory. Mismatched files are replaced with its files.')
+
+    # Parse arguments --------------------------------------------------------
+    args = parser.parse_args()
+
+    try:
+        print(INFO_PREFIX + "Verifying model repository...")
+        issues = verify_repository(
+            args.model_repository, args.models, args.jobs)
+        for issue in issues:
+            if issue["reason"] == "no_checksums":
+                print(ERROR_PREFIX +
+                      f"Model {issue['path']} has no {CHECKSUM_FILE}.")
+            else:
+                print(ERROR_PREFIX +
+                      f"File {issue['path']} is mismatched ({issue['reason']}).")
+
+        # Repair mismatched files if provided
+        if issues and args.repair:
+            repaired = repair_files(
+                args.model_repository, args.repair, issues)
+            for path in repaired:
+                print(SUCCESS_PREFIX + f"File {path} is repaired.")
+            issues = [issue for issue in issues if issue["path"]
+                      not in repaired]
+    except Exception as e:
+        print(ERROR_PREFIX + str(e))
+        sys.exit(1)
+
+    if issues:
+        print(ERROR_PREFIX + f"{len(issues)} files are mismatched.")
+        sys.exit(1)
+    print(SUCCESS_PREFIX + "Model repository verified.")
+
+
+# Run main function if module is run directly
+if __name__ == '__main__':
+    main()
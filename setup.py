@@ -20,6 +20,12 @@ setup(
         "pyyaml",
         "onnx",
     ],
+    extras_require={
+        "bundle": ["zstandard"],
+        "s3": ["boto3"],
+        "xxhash": ["xxhash"],
+        "onnxruntime": ["onnxruntime"],
+    },
     classifiers=[
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3.9",
@@ -30,6 +36,9 @@ setup(
         "console_scripts": [
             "trsp-build = trsp.build:main",
             "trsp-run = trsp.run:main",
+            "trsp-unbundle = trsp.bundle:main",
+            "trsp-sync = trsp.sync:main",
+            "trsp-verify = trsp.verify:main",
         ]
     },
 )
@@ -0,0 +1,152 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import sys
+from typing import Callable, Optional
+import numpy as np
+import onnx
+import yaml
+import pytest
+from onnx import helper, numpy_helper, TensorProto
+
+# Test the working tree, not the installed package
+sys.path.insert(0, os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "libs"))
+
+from trsp.build._file_config import FileConfig  # noqa: E402
+from trsp.build._build_pbtxt import BuildProtoBufTxt  # noqa: E402
+
+
+def make_onnx_model(path: str, size: int = 4, layers: int = 1, batch: int = 1, external_data: Optional[str] = None, seed: int = 0) -> str:
+    '''
+    Write a model of chained MatMul layers, each with a size x size float32 weight.
+    - external_data `single`: weights are stored in `<model>.data`.
+    - external_data `split`: each weight is stored in its own file, named by the weight.
+    '''
+    rng = np.random.default_rng(seed)
+    nodes, weights = [], []
+    for i in range(layers):
+        nodes.append(helper.make_node(
+            "MatMul", ["x" if i == 0 else f"h{i}", f"W{i}"], ["y" if i == layers - 1 else f"h{i + 1}"]))
+        weights.append(numpy_helper.from_array(
+            rng.random((size, size), dtype=np.float32), f"W{i}"))
+    graph = helper.make_graph(nodes, "graph",
+                              [helper.make_tensor_value_info(
+                                  "x", TensorProto.FLOAT, [batch, size])],
+                              [helper.make_tensor_value_info(
+                                  "y", TensorProto.FLOAT, [batch, size])],
+                              weights)
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+
+    if external_data is None:
+        onnx.save(model, path)
+    else:
+        onnx.save(model, path, save_as_external_data=True, all_tensors_to_one_file=external_data == "single",
+                  location=os.path.basename(path) + ".data", size_threshold=0)
+    return path
+
+
+def get_initializers(path: str) -> dict[str, np.ndarray]:
+    '''
+    Load initializers of a model, with its external data.
+    '''
+    model = onnx.load(path)
+    return {tensor.name: numpy_helper.to_array(tensor) for tensor in model.graph.initializer}
+
+
+def get_tree(directory: str, exclude: tuple[str, ...] = ()) -> dict[str, Optional[bytes]]:
+    '''
+    Get content of each file in directory, and None for each empty directory. Keyed by relative path.
+    '''
+    tree: dict[str, Optional[bytes]] = {}
+    for root, directories, files in os.walk(directory):
+        path = os.path.relpath(root, directory)
+        if not directories and not files and root != directory:
+            tree[path] = None
+        for file in files:
+            if file in exclude:
+                continue
+            with open(os.path.join(root, file), "rb") as f:
+                tree[os.path.normpath(os.path.join(path, file))] = f.read()
+    return tree
+
+
+def get_repository_config(**models) -> dict:
+    '''
+    Get configuration of two ONNX models and an ensemble of them. Model configs are updated by `models`.
+    '''
+    config = {
+        "model_repository": "repo",
+        "models": {
+            "a": {"engine": "onnx", "max_batch_size": 0, "versions": [{"version": 1, "path": "a.onnx"}]},
+            "b": {"engine": "onnx", "max_batch_size": 0, "versions": [{"version": 1, "path": "b.onnx"}]},
+            "ens": {"engine": "ensemble", "max_batch_size": 0, "steps": [
+                {"model": "a", "version": "latest"},
+                {"model": "b", "version": "latest"}
+            ]}
+        }
+    }
+    for name, model_config in models.items():
+        config["models"][name].update(model_config)
+    return config
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch) -> str:
+    '''
+    Run test in a temporary directory. Model paths and build directory are relative to it.
+    '''
+    monkeypatch.chdir(tmp_path)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def repository(build) -> str:
+    '''
+    Build a model repository of two ONNX models and an ensemble of them. Return its path.
+    '''
+    make_onnx_model("a.onnx", size=64, seed=0)
+    make_onnx_model("b.onnx", size=64, seed=1)
+    build(get_repository_config())
+    return "build/repo"
+
+
+@pytest.fixture
+def build(workspace) -> Callable[..., list[str]]:
+    '''
+    Write configuration file, load it, then build model repository. Return names of built models.
+    '''
+    def __build(config: dict, **kwargs) -> list[str]:
+        with open(os.path.join(workspace, "config.yaml"), "w") as f:
+            yaml.safe_dump(config, f)
+        return BuildProtoBufTxt(FileConfig(os.path.join(workspace, "config.yaml")).get_config(), **kwargs).build()
+    return __build
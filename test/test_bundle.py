@@ -0,0 +1,80 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import pytest
+from conftest import get_tree
+
+pytest.importorskip("zstandard")
+from trsp.build._bundle import write_bundle, BundleReader  # noqa: E402
+
+
+def test_bundle_round_trip(repository, workspace):
+    write_bundle(repository, "repo.trsp.zst")
+    reader = BundleReader("repo.trsp.zst")
+    assert reader.get_models() == ["a", "b", "ens"]
+    assert reader.verify() == []
+
+    assert reader.extract("deployed") == ["a", "b", "ens"]
+    assert get_tree("deployed") == get_tree(
+        repository, exclude=(".trsp-manifest.json",))
+    assert os.path.isdir("deployed/ens/1")
+
+
+def test_extract_selected_models(repository, workspace):
+    write_bundle(repository, "repo.trsp.zst")
+    assert BundleReader("repo.trsp.zst").extract(
+        "deployed", models=["b"]) == ["b"]
+    assert os.listdir("deployed") == ["b"]
+
+    with pytest.raises(ValueError, match="missing"):
+        BundleReader("repo.trsp.zst").extract("deployed", models=["missing"])
+
+
+def test_corrupted_chunk_is_detected(repository, workspace):
+    write_bundle(repository, "repo.trsp.zst")
+    reader = BundleReader("repo.trsp.zst")
+    reader.extract("deployed")
+    before = get_tree("deployed")
+
+    # Flip a byte in the middle of the first chunk of model a
+    entry = next(entry for entry in reader.get_entries(
+        ["a"]) if entry["path"] == "a/1/model.onnx")
+    offset, length = entry["chunks"][0]
+    with open("repo.trsp.zst", "r+b") as f:
+        f.seek(offset + length // 2)
+        value = f.read(1)
+        f.seek(offset + length // 2)
+        f.write(bytes([value[0] ^ 0xFF]))
+
+    assert reader.verify() == ["a/1/model.onnx"]
+    with pytest.raises(ValueError):
+        reader.extract("deployed", models=["a"])
+    # Existing models are kept if extraction failed
+    assert get_tree("deployed") == before
@@ -0,0 +1,127 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import pickle
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from trsp.build import _cache
+from trsp.build._cache import MetadataCache
+from conftest import make_onnx_model
+
+
+@pytest.fixture
+def calls(monkeypatch) -> dict[str, int]:
+    '''
+    Count files hashed and ONNX models parsed by metadata cache.
+    '''
+    counts = {"hash": 0, "parse": 0}
+    get_file_hash, read_onnx_metadata = _cache.get_file_hash, _cache.read_onnx_metadata
+
+    def __get_file_hash(path: str) -> str:
+        counts["hash"] += 1
+        return get_file_hash(path)
+
+    def __read_onnx_metadata(path: str):
+        counts["parse"] += 1
+        return read_onnx_metadata(path)
+
+    monkeypatch.setattr(_cache, "get_file_hash", __get_file_hash)
+    monkeypatch.setattr(_cache, "read_onnx_metadata", __read_onnx_metadata)
+    return counts
+
+
+def get_hash(cache: MetadataCache, path: str) -> str:
+    '''
+    Get hash of a file in a worker process.
+    '''
+    return cache.get_file_hash(path)
+
+
+def test_cache_hits_across_instances(workspace, calls):
+    make_onnx_model("model.onnx")
+    metadata = MetadataCache("build/cache.sqlite").get_onnx_metadata("model.onnx")
+    assert calls == {"hash": 1, "parse": 1}
+
+    # Entries are read from cache file
+    cache = MetadataCache("build/cache.sqlite")
+    assert cache.get_onnx_metadata("model.onnx") == metadata
+    assert cache.get_onnx_metadata("model.onnx") == metadata
+    assert calls == {"hash": 1, "parse": 1}
+    assert [tensor.name for tensor in metadata["input"]] == ["x"]
+
+
+def test_cache_is_invalidated_by_mtime_and_size(workspace, calls):
+    make_onnx_model("model.onnx", seed=0)
+    digest = MetadataCache("build/cache.sqlite").get_file_hash("model.onnx")
+
+    # Same size, new content and modified time
+    stat = os.stat("model.onnx")
+    make_onnx_model("model.onnx", seed=1)
+    os.utime("model.onnx", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert os.path.getsize("model.onnx") == stat.st_size
+    changed_digest = MetadataCache("build/cache.sqlite").get_file_hash("model.onnx")
+    assert changed_digest != digest
+    assert calls["hash"] == 2
+
+    # New size, same modified time
+    stat = os.stat("model.onnx")
+    make_onnx_model("model.onnx", size=8)
+    os.utime("model.onnx", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    metadata = MetadataCache("build/cache.sqlite").get_onnx_metadata("model.onnx")
+    assert calls == {"hash": 3, "parse": 1}
+    assert metadata["input"][0].type.tensor_type.shape.dim[1].dim_value == 8
+
+
+def test_cache_is_shared_with_worker_processes(workspace, calls):
+    make_onnx_model("model.onnx")
+    cache = MetadataCache("build/cache.sqlite")
+    cache.get_file_hash("model.onnx")
+    make_onnx_model("other.onnx", seed=1)
+
+    # Connection is not pickled, worker opens its own and writes new entries
+    assert pickle.loads(pickle.dumps(cache))._MetadataCache__connection is None
+    with ProcessPoolExecutor(1) as pool:
+        digests = list(pool.map(get_hash, [cache, cache], [
+                       "model.onnx", "other.onnx"]))
+    assert calls["hash"] == 1
+
+    assert MetadataCache("build/cache.sqlite").get_file_hash(
+        "other.onnx") == digests[1]
+    assert calls["hash"] == 1
+
+
+def test_read_only_cache_writes_nothing(workspace, calls):
+    make_onnx_model("model.onnx")
+    cache = MetadataCache("build/cache.sqlite", read_only=True)
+    cache.get_onnx_metadata("model.onnx")
+    cache.get_onnx_metadata("model.onnx")
+
+    assert calls == {"hash": 1, "parse": 1}
+    assert not os.path.exists("build")
@@ -0,0 +1,89 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import onnx
+import pytest
+from conftest import make_onnx_model
+
+
+def get_config(models: dict) -> dict:
+    '''
+    Get configuration with content-addressed store enabled.
+    '''
+    return {"model_repository": "repo", "cas": True, "models": models}
+
+
+def get_objects() -> list[str]:
+    '''
+    Get hashes of stored files.
+    '''
+    return sorted(file for _, _, files in os.walk("build/.cas/sha256") for file in files)
+
+
+def test_same_file_is_stored_once(build):
+    make_onnx_model("model.onnx", size=64)
+    build(get_config({
+        name: {"engine": "onnx", "max_batch_size": 0, "versions": [
+            {"version": 1, "path": "model.onnx"}, {"version": 2, "path": "model.onnx"}]}
+        for name in ["a", "b"]
+    }))
+
+    assert len(get_objects()) == 1
+    for path in ["build/repo/a/2/model.onnx", "build/repo/b/1/model.onnx"]:
+        assert os.path.samefile("build/repo/a/1/model.onnx", path)
+
+
+@pytest.mark.parametrize("model_config", [
+    {"max_batch_size": 0},
+    {"max_batch_size": 4, "dynamic_batching": True},
+    {"max_batch_size": 4, "dynamic_batching": True, "external_data": "consolidate"}
+])
+def test_external_data_is_not_hardlinked(build, model_config):
+    make_onnx_model("model.onnx", size=64, layers=2, external_data="single")
+    build(get_config({"m": {"engine": "onnx", **model_config,
+                            "versions": [{"version": 1, "path": "model.onnx"}]}}))
+
+    for file in os.listdir("build/repo/m/1"):
+        if file != "model.onnx":
+            assert os.stat(f"build/repo/m/1/{file}").st_nlink == 1
+    onnx.load("build/repo/m/1/model.onnx")
+
+
+def test_unused_files_are_collected(build):
+    make_onnx_model("a.onnx", seed=0)
+    make_onnx_model("b.onnx", seed=1)
+    models = {name: {"engine": "onnx", "max_batch_size": 0, "versions": [{"version": 1, "path": f"{name}.onnx"}]}
+              for name in ["a", "b"]}
+    build(get_config(models))
+    assert len(get_objects()) == 2
+
+    del models["b"]
+    build(get_config(models))
+    assert len(get_objects()) == 1
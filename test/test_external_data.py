@@ -0,0 +1,80 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+from trsp.build._onnx_stream import read_onnx_external_data
+from trsp.utils._constants import EXTERNAL_DATA_FILE, EXTERNAL_DATA_ALIGNMENT
+from conftest import make_onnx_model, get_initializers
+
+
+def get_config(external_data: str) -> dict:
+    '''
+    Get configuration of a model with external data, with dynamic batch axis.
+    '''
+    return {
+        "model_repository": "repo",
+        "models": {
+            "m": {
+                "engine": "onnx",
+                "max_batch_size": 4,
+                "dynamic_batching": True,
+                "external_data": external_data,
+                "versions": [{"version": 1, "path": "model.onnx"}]
+            }
+        }
+    }
+
+
+def test_keep_places_external_data_files(build):
+    make_onnx_model("model.onnx", size=64, layers=2, external_data="split")
+    build(get_config("keep"))
+
+    assert sorted(os.listdir("build/repo/m/1")) == ["W0", "W1", "model.onnx"]
+    for name in ["W0", "W1"]:
+        assert os.stat(f"build/repo/m/1/{name}").st_nlink == 1
+    initializers = get_initializers("build/repo/m/1/model.onnx")
+    for name, array in get_initializers("model.onnx").items():
+        assert (initializers[name] == array).all()
+
+
+def test_consolidate_writes_one_aligned_data_file(build):
+    make_onnx_model("model.onnx", size=64, layers=3, external_data="split")
+    build(get_config("consolidate"))
+
+    assert sorted(os.listdir("build/repo/m/1")) == [
+        "model.onnx", EXTERNAL_DATA_FILE]
+    assert os.stat(f"build/repo/m/1/{EXTERNAL_DATA_FILE}").st_nlink == 1
+    tensors = read_onnx_external_data("build/repo/m/1/model.onnx")
+    assert {tensor["location"] for tensor in tensors} == {EXTERNAL_DATA_FILE}
+    assert all(tensor["offset"] %
+               EXTERNAL_DATA_ALIGNMENT == 0 for tensor in tensors)
+
+    initializers = get_initializers("build/repo/m/1/model.onnx")
+    for name, array in get_initializers("model.onnx").items():
+        assert (initializers[name] == array).all()
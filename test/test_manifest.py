@@ -0,0 +1,84 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import shutil
+from conftest import make_onnx_model, get_repository_config as get_config
+
+
+def test_unchanged_models_are_skipped(build):
+    make_onnx_model("a.onnx")
+    make_onnx_model("b.onnx", seed=1)
+    assert build(get_config()) == ["a", "b", "ens"]
+    config_mtime = os.stat("build/repo/a/config.pbtxt").st_mtime_ns
+
+    assert build(get_config()) == []
+    assert os.stat("build/repo/a/config.pbtxt").st_mtime_ns == config_mtime
+
+
+def test_changed_source_rebuilds_model_and_dependents(build):
+    make_onnx_model("a.onnx")
+    make_onnx_model("b.onnx", seed=1)
+    build(get_config())
+
+    make_onnx_model("a.onnx", seed=2)
+    assert build(get_config()) == ["a", "ens"]
+
+
+def test_changed_config_rebuilds_model(build):
+    make_onnx_model("a.onnx")
+    make_onnx_model("b.onnx", seed=1)
+    build(get_config())
+
+    assert build(get_config(b={"max_batch_size": 4, "dynamic_batching": True})) == [
+        "b", "ens"]
+    with open("build/repo/b/config.pbtxt") as f:
+        assert "max_batch_size: 4" in f.read()
+
+
+def test_modified_output_is_rebuilt(build):
+    make_onnx_model("a.onnx")
+    make_onnx_model("b.onnx", seed=1)
+    build(get_config())
+
+    shutil.rmtree("build/repo/b")
+    assert build(get_config()) == ["b"]
+    assert os.path.isfile("build/repo/b/1/model.onnx")
+
+
+def test_removed_model_is_pruned(build):
+    make_onnx_model("a.onnx")
+    make_onnx_model("b.onnx", seed=1)
+    build(get_config())
+
+    config = get_config()
+    del config["models"]["ens"]
+    del config["models"]["b"]
+    assert build(config) == []
+    assert sorted(os.listdir("build/repo")) == [".trsp-manifest.json", "a"]
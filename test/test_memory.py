@@ -0,0 +1,98 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import pytest
+from trsp.build import _build_pbtxt
+from trsp.build._scheduler import BuildScheduler
+from trsp.build._profiler import BuildProfiler
+from trsp.utils._constants import MEMORY_JOB_OVERHEAD
+from conftest import make_onnx_model, get_repository_config
+
+
+@pytest.fixture
+def budgets(monkeypatch) -> list[dict]:
+    '''
+    Record estimated memory and memory budget given to build scheduler.
+    '''
+    recorded: list[dict] = []
+
+    class RecordingScheduler(BuildScheduler):
+        def __init__(self, dependencies, jobs=1, memory=None, max_memory=None):
+            recorded.append({"memory": memory, "max_memory": max_memory})
+            super().__init__(dependencies, jobs, memory, max_memory)
+
+    monkeypatch.setattr(_build_pbtxt, "BuildScheduler", RecordingScheduler)
+    return recorded
+
+
+def get_model_times(profiler: BuildProfiler, name: str) -> tuple[float, float]:
+    '''
+    Get start and end time of model phases recorded by worker processes.
+    '''
+    events = [event for event in profiler.get_chrome_trace()["traceEvents"]
+              if event["args"]["model"] == name and event["tid"] != os.getpid()]
+    return min(event["ts"] for event in events), max(event["ts"] + event["dur"] for event in events)
+
+
+def test_memory_estimate_of_models(build, budgets):
+    pytest.importorskip("onnxruntime")
+    make_onnx_model("a.onnx", size=256)
+    make_onnx_model("b.onnx", size=64, seed=1)
+    build(get_repository_config(b={"optimize": "basic"}), max_memory=2**30)
+
+    # Streamed models need fixed buffers only, transformed models are held in memory
+    memory = budgets[0]["memory"]
+    assert budgets[0]["max_memory"] == 2**30
+    assert set(memory) == {"a", "b"}
+    assert memory["a"] == MEMORY_JOB_OVERHEAD
+    assert memory["b"] == MEMORY_JOB_OVERHEAD + \
+        2 * os.path.getsize("b.onnx")
+
+
+def test_no_estimate_without_memory_budget(build, budgets):
+    make_onnx_model("a.onnx")
+    make_onnx_model("b.onnx", seed=1)
+    build(get_repository_config(), jobs=2)
+    assert budgets[0] == {"memory": {}, "max_memory": None}
+
+
+def test_memory_budget_builds_models_one_by_one(build, budgets):
+    make_onnx_model("a.onnx", size=256, layers=4)
+    make_onnx_model("b.onnx", size=256, layers=4, seed=1)
+    profiler = BuildProfiler(enabled=True)
+    built_models = build(get_repository_config(), jobs=2,
+                         profiler=profiler, max_memory=MEMORY_JOB_OVERHEAD)
+
+    assert sorted(built_models) == ["a", "b", "ens"]
+    assert os.path.isfile("build/repo/ens/config.pbtxt")
+    # Two workers are available, but only one job fits in memory budget
+    first, second = sorted([get_model_times(profiler, "a"),
+                           get_model_times(profiler, "b")])
+    assert first[1] <= second[0]
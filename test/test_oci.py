@@ -0,0 +1,99 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import json
+import hashlib
+import tarfile
+from trsp.build import _oci
+from trsp.build._oci import write_oci_layout
+from conftest import get_repository_config
+
+
+def get_manifest(layout: str) -> dict:
+    '''
+    Get image manifest of the tagged image of a layout.
+    '''
+    with open(os.path.join(layout, "index.json")) as f:
+        digest = json.load(f)["manifests"][0]["digest"]
+    with open(os.path.join(layout, "blobs", *digest.split(":"))) as f:
+        return json.load(f)
+
+
+def test_layout_blobs_match_digests(repository):
+    result = write_oci_layout(repository, "repo.oci")
+    manifest = get_manifest("repo.oci")
+    assert result["layers"] == len(manifest["layers"])
+
+    names: list[str] = []
+    for layer in manifest["layers"]:
+        path = os.path.join("repo.oci", "blobs", *layer["digest"].split(":"))
+        with open(path, "rb") as f:
+            assert "sha256:" + \
+                hashlib.sha256(f.read()).hexdigest() == layer["digest"]
+        with tarfile.open(path) as tar:
+            names.extend(tar.getnames())
+    assert "models/a/1/model.onnx" in names
+    assert "models/ens/1" in names
+
+
+def test_unchanged_layers_keep_digests(repository, build):
+    first = write_oci_layout(repository, "repo.oci")
+    assert write_oci_layout(repository, "repo.oci") == {
+        **first, "written_layers": 0, "written_bytes": 0}
+    layers = get_manifest("repo.oci")["layers"]
+
+    build(get_repository_config(b={"max_batch_size": 4}))
+    result = write_oci_layout(repository, "repo.oci")
+    changed = [old["digest"] != new["digest"]
+               for old, new in zip(layers, get_manifest("repo.oci")["layers"])]
+    assert result["written_layers"] == sum(changed) > 0
+    assert not all(changed)
+
+
+def test_unchanged_layers_are_not_packed_again(repository, monkeypatch):
+    write_oci_layout(repository, "repo.oci")
+
+    # Config layers are keyed by their files, although checksum manifest does not list itself
+    packed: list[tuple[str, str]] = []
+    write_layer = _oci.write_layer
+
+    def __write_layer(model_repository, model, group, paths, blobs_path):
+        packed.append((model, group))
+        return write_layer(model_repository, model, group, paths, blobs_path)
+
+    monkeypatch.setattr(_oci, "write_layer", __write_layer)
+    write_oci_layout(repository, "repo.oci")
+    assert packed == []
+
+    # Edited config.pbtxt is packed again
+    with open(os.path.join(repository, "a", "config.pbtxt"), "a") as f:
+        f.write("\n")
+    write_oci_layout(repository, "repo.oci")
+    assert packed == [("a", "config")]
@@ -0,0 +1,121 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import numpy as np
+import onnx
+import pytest
+from conftest import make_onnx_model
+
+ort = pytest.importorskip("onnxruntime")
+
+
+def get_config(**model_config) -> dict:
+    '''
+    Get configuration of a model with ONNX Runtime stages.
+    '''
+    return {
+        "model_repository": "repo",
+        "models": {
+            "m": {"engine": "onnx", "max_batch_size": 0, **model_config,
+                  "versions": [{"version": 1, "path": "model.onnx"}]}
+        }
+    }
+
+
+def run_model(path: str, dtype=np.float32) -> np.ndarray:
+    '''
+    Run a model with ONNX Runtime on a constant input.
+    '''
+    session = ort.InferenceSession(path)
+    return session.run(None, {"x": np.full((1, 64), 0.5, dtype=dtype)})[0]
+
+
+def read_config(name: str) -> str:
+    '''
+    Read config.pbtxt of a built model.
+    '''
+    with open(f"build/repo/{name}/config.pbtxt") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("external_data", [None, "single"])
+def test_optimize(build, external_data):
+    make_onnx_model("model.onnx", size=64, layers=2,
+                    external_data=external_data)
+    build(get_config(optimize="extended"))
+
+    assert np.allclose(run_model("build/repo/m/1/model.onnx"),
+                       run_model("model.onnx"), atol=1e-4)
+
+
+def test_dynamic_quantization_adds_sibling_model(build):
+    make_onnx_model("model.onnx", size=64, layers=2)
+    assert build(get_config(quantize="dynamic")) == ["m", "m_int8"]
+
+    assert os.path.getsize("build/repo/m_int8/1/model.onnx") < os.path.getsize(
+        "build/repo/m/1/model.onnx")
+    assert np.allclose(run_model("build/repo/m_int8/1/model.onnx"),
+                       run_model("model.onnx"), rtol=0.02)
+
+
+def test_static_quantization_with_calibration(build):
+    make_onnx_model("model.onnx", size=64, layers=2)
+    os.makedirs("calibration")
+    for i in range(5):
+        np.save(f"calibration/{i}.npy",
+                np.random.default_rng(i).random((1, 64), dtype=np.float32))
+    build(get_config(quantize="static", calibration={
+          "path": "calibration", "window": 2}))
+
+    assert "QuantizeLinear" in {
+        node.op_type for node in onnx.load("build/repo/m_int8/1/model.onnx").graph.node}
+    assert np.allclose(run_model("build/repo/m_int8/1/model.onnx"),
+                       run_model("model.onnx"), rtol=0.02)
+
+
+def test_fp16_precision_updates_config_types(build):
+    make_onnx_model("model.onnx", size=64, layers=2)
+    build(get_config(precision="fp16"))
+
+    assert "TYPE_FP16" in read_config("m")
+    assert np.allclose(run_model("build/repo/m/1/model.onnx", np.float16),
+                       run_model("model.onnx"), rtol=0.01)
+
+
+def test_ort_format(build):
+    make_onnx_model("model.onnx", size=64, layers=2, external_data="single")
+    build(get_config(format="ort"))
+
+    assert os.listdir("build/repo/m/1") == ["model.ort"]
+    config = read_config("m")
+    assert 'default_model_filename: "model.ort"' in config
+    assert "session.load_model_format" in config
+    assert np.allclose(run_model("build/repo/m/1/model.ort"),
+                       run_model("model.onnx"), atol=1e-4)
@@ -0,0 +1,87 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import onnx
+from trsp.build._onnx_stream import read_onnx_metadata, rewrite_onnx_graph, patch_batch_axis, GRAPH_INPUT, GRAPH_OUTPUT
+from conftest import make_onnx_model, get_initializers
+
+
+def test_metadata_matches_loaded_model(workspace):
+    path = make_onnx_model("model.onnx", size=8, layers=2)
+    model = onnx.load(path)
+    metadata = read_onnx_metadata(path)
+
+    assert metadata["input"] == list(model.graph.input)
+    assert metadata["output"] == list(model.graph.output)
+    assert metadata["opset"] == {"ai.onnx": 13}
+    assert metadata["external_data"] == []
+    assert metadata["initializer_bytes"] >= 2 * 8 * 8 * 4
+
+
+def test_metadata_lists_external_data_without_loading_it(workspace):
+    path = make_onnx_model("model.onnx", size=8, layers=2,
+                           external_data="single")
+    metadata = read_onnx_metadata(path)
+
+    assert [tensor["name"] for tensor in metadata["external_data"]] == [
+        "W0", "W1"]
+    assert {tensor["location"]
+            for tensor in metadata["external_data"]} == {"model.onnx.data"}
+    assert [tensor["length"]
+            for tensor in metadata["external_data"]] == [8 * 8 * 4] * 2
+    assert metadata["initializer_bytes"] == 2 * 8 * 8 * 4
+
+
+def test_patch_batch_axis_round_trip(workspace):
+    path = make_onnx_model("model.onnx", size=8, layers=2)
+    rewrite_onnx_graph(path, "patched.onnx", {
+                       GRAPH_INPUT: patch_batch_axis, GRAPH_OUTPUT: patch_batch_axis})
+
+    # Same bytes as the model patched and serialized by protobuf
+    expected = onnx.load(path)
+    for layer in list(expected.graph.input) + list(expected.graph.output):
+        layer.type.tensor_type.shape.dim[0].dim_param = f"{layer.name}_dynamic_axes_1"
+    with open("patched.onnx", "rb") as f:
+        assert f.read() == expected.SerializeToString()
+
+    patched = onnx.load("patched.onnx")
+    onnx.checker.check_model(patched)
+    assert patched.graph.input[0].type.tensor_type.shape.dim[0].dim_param == "x_dynamic_axes_1"
+    assert patched.graph.input[0].type.tensor_type.shape.dim[1].dim_value == 8
+
+
+def test_patch_keeps_external_data_references(workspace):
+    path = make_onnx_model("model.onnx", size=8, layers=2,
+                           external_data="single")
+    rewrite_onnx_graph(path, "patched.onnx", {
+                       GRAPH_INPUT: patch_batch_axis, GRAPH_OUTPUT: patch_batch_axis})
+
+    initializers = get_initializers("patched.onnx")
+    for name, array in get_initializers(path).items():
+        assert (initializers[name] == array).all()
@@ -0,0 +1,110 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+from trsp.build._placement import place_file
+from conftest import make_onnx_model, get_repository_config
+
+
+def get_python_config(placement: str = "auto") -> dict:
+    '''
+    Get configuration of a python model.
+    '''
+    return {
+        "model_repository": "repo",
+        "placement": placement,
+        "models": {
+            "p": {
+                "engine": "python",
+                "max_batch_size": 0,
+                "versions": [{"version": 1, "module": {"path": "my_logic.py", "execute": "my_logic"}}],
+                "tensor": {
+                    "input": [{"dims": [1, 4], "dtype": "float32"}],
+                    "output": [{"dims": [1, 4], "dtype": "float32"}]
+                }
+            }
+        }
+    }
+
+
+def test_place_file_modes(workspace):
+    source = make_onnx_model("source.onnx")
+
+    place_file(source, "auto.onnx", "auto")
+    place_file(source, "copy.onnx", "copy")
+    place_file(source, "symlink.onnx", "symlink")
+
+    for path in ["auto.onnx", "copy.onnx", "symlink.onnx"]:
+        with open(path, "rb") as f, open(source, "rb") as s:
+            assert f.read() == s.read()
+    assert not os.path.samefile(source, "copy.onnx")
+    assert os.readlink("symlink.onnx") == os.path.abspath(source)
+
+
+def test_python_module_is_not_linked_to_source(build):
+    with open("my_logic.py", "w") as f:
+        f.write("def my_logic(args, inputs):\n    return (inputs[0],)\n")
+    build(get_python_config("auto"))
+
+    module_path = "build/repo/p/1/my_logic.py"
+    assert os.stat(module_path).st_nlink == 1
+
+    # Editing source in place does not change built repository
+    with open("my_logic.py", "a") as f:
+        f.write("# edited\n")
+    with open(module_path) as f:
+        assert "# edited" not in f.read()
+
+
+def test_onnx_model_is_not_linked_to_source(build):
+    make_onnx_model("a.onnx", size=64)
+    make_onnx_model("b.onnx", size=64, seed=1)
+    build(get_repository_config())
+
+    model_path = "build/repo/a/1/model.onnx"
+    assert not os.path.samefile("a.onnx", model_path)
+    with open(model_path, "rb") as f:
+        built = f.read()
+
+    # Overwriting source in place does not change built repository
+    with open("a.onnx", "r+b") as f:
+        f.seek(-16, os.SEEK_END)
+        f.write(bytes(16))
+    with open(model_path, "rb") as f:
+        assert f.read() == built
+
+
+def test_onnx_model_is_linked_to_store(build):
+    make_onnx_model("a.onnx", size=64)
+    make_onnx_model("b.onnx", size=64, seed=1)
+    build({**get_repository_config(), "cas": True})
+
+    model_path = "build/repo/a/1/model.onnx"
+    assert not os.path.samefile("a.onnx", model_path)
+    assert os.stat(model_path).st_nlink == 2
@@ -0,0 +1,104 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import gc
+import os
+import yaml
+from trsp.build._plan import print_plan
+from trsp.build._file_config import FileConfig
+from trsp.build._build_pbtxt import BuildProtoBufTxt
+from trsp.utils._constants import INFO_PREFIX
+from conftest import make_onnx_model, get_tree, get_repository_config
+
+
+def get_plan(config: dict) -> list:
+    '''
+    Write configuration file, load it, then plan build.
+    '''
+    with open("config.yaml", "w") as f:
+        yaml.safe_dump(config, f)
+    return BuildProtoBufTxt(FileConfig("config.yaml").get_config()).plan()
+
+
+def get_stats(directory: str) -> dict[str, tuple[int, int]]:
+    '''
+    Get size and modified time of each file in directory.
+    '''
+    stats = {}
+    for root, _, files in os.walk(directory):
+        for file in files:
+            path = os.path.join(root, file)
+            stats[path] = (os.path.getsize(path), os.stat(path).st_mtime_ns)
+    return stats
+
+
+def test_plan_of_new_repository_writes_nothing(workspace):
+    make_onnx_model("a.onnx", size=64)
+    make_onnx_model("b.onnx", size=64, seed=1)
+    entries = get_plan(get_repository_config())
+
+    assert {entry["model"]: entry["action"] for entry in entries} == {
+        "a": "create", "b": "create", "ens": "create"}
+    assert entries[0]["versions"] == {"1": "create"}
+    assert entries[0]["written_bytes"] > 0
+    assert not os.path.exists("build")
+
+
+def test_plan_reports_changes_against_manifest(repository, capsys):
+    # Close metadata cache of the build, which checkpoints its journal
+    gc.collect()
+    tree, stats = get_tree("build"), get_stats("build")
+
+    # a is unchanged, b is changed, c is added and ens is removed
+    make_onnx_model("c.onnx")
+    config = get_repository_config(b={"max_batch_size": 4})
+    del config["models"]["ens"]
+    config["models"]["c"] = {"engine": "onnx", "max_batch_size": 0,
+                             "versions": [{"version": 1, "path": "c.onnx"}]}
+    entries = {entry["model"]: entry for entry in get_plan(config)}
+
+    assert {name: entry["action"] for name, entry in entries.items()} == {
+        "a": "unchanged", "b": "rewrite", "c": "create", "ens": "remove"}
+    assert entries["a"]["written_bytes"] == 0 and entries["a"]["diff"] == ""
+    assert entries["b"]["changed_fields"] == ["max_batch_size"]
+    assert "-max_batch_size: 0\n+max_batch_size: 4\n" in entries["b"]["diff"]
+    assert entries["b"]["diff"].startswith(
+        "--- a/b/config.pbtxt\n+++ b/b/config.pbtxt\n")
+
+    # Symbols of printed actions
+    capsys.readouterr()
+    print_plan(list(entries.values()))
+    lines = [line[len(INFO_PREFIX):] for line in capsys.readouterr().out.splitlines()
+             if line.startswith(INFO_PREFIX)]
+    assert sorted(line.split(":")[0] for line in lines) == [
+        "+ c", "- ens", "= a", "~ b"]
+
+    # Build directory is unchanged
+    assert get_tree("build") == tree
+    assert get_stats("build") == stats
@@ -0,0 +1,107 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import sys
+import json
+import yaml
+from trsp.build._profiler import BuildProfiler
+from conftest import make_onnx_model, get_repository_config
+
+PHASE_FIELDS = {"seconds", "read_bytes", "write_bytes", "peak_rss"}
+
+
+def get_event(model: str, phase: str, start: float, duration: float, pid: int) -> dict:
+    '''
+    Get a profile event with 1 byte read and written per second.
+    '''
+    return {"model": model, "phase": phase, "start": start, "duration": duration,
+            "read_bytes": int(duration), "write_bytes": int(duration), "peak_rss": pid, "pid": pid}
+
+
+def test_report_sums_phases_by_model():
+    profiler = BuildProfiler(enabled=True)
+    profiler.add_events([
+        get_event("a", "onnx_save", 10.0, 1.0, 1),
+        get_event("a", "onnx_save", 11.0, 2.0, 1),
+        get_event("b", "pbtxt_write", 12.0, 4.0, 2)
+    ])
+    report = profiler.get_report()
+
+    assert report["wall_seconds"] == 6.0
+    assert report["peak_rss"] == 2
+    # Slowest model first
+    assert list(report["models"]) == ["b", "a"]
+    assert report["models"]["a"]["phases"]["onnx_save"] == {
+        "seconds": 3.0, "read_bytes": 3, "write_bytes": 3, "peak_rss": 1}
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = BuildProfiler()
+    with profiler.phase("a", "onnx_save"):
+        pass
+    assert profiler.get_report() == {
+        "wall_seconds": 0, "peak_rss": 0, "models": {}}
+
+
+def test_profile_command_writes_report_and_trace(workspace, monkeypatch):
+    from trsp.build import main
+
+    make_onnx_model("a.onnx", size=64)
+    make_onnx_model("b.onnx", size=64, seed=1)
+    with open("config.yaml", "w") as f:
+        yaml.safe_dump(get_repository_config(), f)
+    monkeypatch.setattr(
+        sys, "argv", ["trsp-build", "-f", "config.yaml", "--profile", "-j", "2"])
+    main()
+
+    # Report has totals of each phase of each model
+    with open("build/trsp-profile.json") as f:
+        report = json.load(f)
+    assert report["wall_seconds"] > 0
+    assert set(report["models"]) == {"a", "b", "ens"}
+    for model in report["models"].values():
+        assert PHASE_FIELDS <= set(model)
+        for phase in model["phases"].values():
+            assert set(phase) == PHASE_FIELDS
+    assert {"fingerprint", "create_folders", "onnx_save", "pbtxt_write", "publish"} <= set(
+        report["models"]["a"]["phases"])
+
+    # Trace has a complete event of each phase, models built by workers are on their own rows
+    with open("build/trsp-trace.json") as f:
+        trace = json.load(f)
+    events = trace["traceEvents"]
+    assert isinstance(events, list) and events
+    for event in events:
+        assert event["ph"] == "X"
+        assert isinstance(event["ts"], int) and isinstance(
+            event["dur"], int) and event["dur"] >= 0
+        assert event["name"] == f"{event['args']['model']}: {event['cat']}"
+    assert {(event["args"]["model"], event["cat"]) for event in events} == {
+        (name, phase) for name, model in report["models"].items() for phase in model["phases"]}
+    assert len({event["tid"] for event in events}) >= 2
@@ -0,0 +1,170 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import json
+import shutil
+import pytest
+from conftest import get_repository_config
+
+pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+import boto3  # noqa: E402
+from trsp.build._publish import S3Publisher  # noqa: E402
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    '''
+    Run a moto stand-in of S3 storage with a bucket. Return its client.
+    '''
+    for name in ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"]:
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket="bucket")
+        yield client
+
+
+def get_keys(client, prefix: str = "") -> list[str]:
+    '''
+    Get keys of objects in bucket.
+    '''
+    response = client.list_objects_v2(Bucket="bucket", Prefix=prefix)
+    return sorted(item["Key"] for item in response.get("Contents", []))
+
+
+def get_published(client) -> tuple[dict, dict[str, bytes]]:
+    '''
+    Get manifest and content of published files.
+    '''
+    manifest = json.loads(client.get_object(
+        Bucket="bucket", Key="repo/trsp-current.json")["Body"].read())
+    files = {path: client.get_object(Bucket="bucket", Key=f"{manifest['prefix']}/{path}")["Body"].read()
+             for path in manifest["files"] if not path.endswith("/")}
+    return manifest, files
+
+
+def get_files(repository: str, manifest: dict) -> dict[str, bytes]:
+    '''
+    Get content of local files listed in manifest.
+    '''
+    files = {}
+    for path in manifest["files"]:
+        if not path.endswith("/"):
+            with open(f"{repository}/{path}", "rb") as f:
+                files[path] = f.read()
+    return files
+
+
+def test_publish_and_skip_unchanged(repository, s3):
+    publisher = S3Publisher("s3://bucket/repo")
+    result = publisher.publish(repository)
+    assert not result["unchanged"]
+    assert result["url"] == f"s3://bucket/repo/{result['version']}"
+
+    manifest, files = get_published(s3)
+    assert manifest["prefix"] == f"repo/{result['version']}"
+    assert files == get_files(repository, manifest)
+    # Empty version directory of ensemble is published as a directory object
+    assert f"repo/{result['version']}/ens/1/" in get_keys(s3)
+
+    result = publisher.publish(repository)
+    assert result["unchanged"]
+    assert result["uploaded_bytes"] == 0 and result["copied_bytes"] == 0
+
+
+def test_publish_never_changes_published_versions(repository, build, s3):
+    publisher = S3Publisher("s3://bucket/repo")
+    first = publisher.publish(repository)
+    first_prefix = f"repo/{first['version']}/"
+    first_objects = {key: s3.get_object(Bucket="bucket", Key=key)["Body"].read()
+                     for key in get_keys(s3, first_prefix)}
+
+    # New version copies unchanged files inside storage, to its own prefix
+    build(get_repository_config(b={"max_batch_size": 4}))
+    second = publisher.publish(repository)
+    assert second["url"] == f"s3://bucket/repo/{second['version']}"
+    assert second["copied_bytes"] > 0
+
+    manifest, files = get_published(s3)
+    assert manifest["prefix"] == f"repo/{second['version']}"
+    assert manifest["previous"] == [first_prefix.rstrip("/")]
+    assert files == get_files(repository, manifest)
+    # Files of previous version are unchanged, servers started with it keep serving it
+    assert {key: s3.get_object(Bucket="bucket", Key=key)["Body"].read()
+            for key in get_keys(s3, first_prefix)} == first_objects
+
+
+def test_publish_skips_objects_of_interrupted_publish(repository, s3):
+    publisher = S3Publisher("s3://bucket/repo")
+    publisher.publish(repository)
+
+    # Publish is interrupted before manifest is written
+    s3.delete_object(Bucket="bucket", Key="repo/trsp-current.json")
+    result = publisher.publish(repository)
+    assert result["uploaded_bytes"] == 0 and result["copied_bytes"] == 0
+    assert result["skipped_bytes"] > 0
+
+
+def test_publish_deletes_versions_recorded_by_manifest(repository, build, s3):
+    s3.put_object(Bucket="bucket",
+                  Key="repo/0123456789abcdef/a/config.pbtxt", Body=b"")
+    s3.put_object(Bucket="bucket", Key="repo/notes.txt", Body=b"")
+    publisher = S3Publisher("s3://bucket/repo", keep=2)
+    versions = [publisher.publish(repository)["version"]]
+    for max_batch_size in [4, 8]:
+        build(get_repository_config(b={"max_batch_size": max_batch_size}))
+        versions.append(publisher.publish(repository)["version"])
+
+    # Oldest version is deleted, the latest two are kept
+    manifest, _ = get_published(s3)
+    assert manifest["previous"] == [f"repo/{versions[1]}"]
+    assert get_keys(s3, f"repo/{versions[0]}/") == []
+    assert get_keys(s3, f"repo/{versions[1]}/") != []
+    # Objects which are not published by trsp are kept
+    assert get_keys(s3, "repo/0123456789abcdef/") == [
+        "repo/0123456789abcdef/a/config.pbtxt"]
+    assert "repo/notes.txt" in get_keys(s3)
+
+
+def test_publish_keeps_republished_version(repository, build, s3):
+    publisher = S3Publisher("s3://bucket/repo", keep=1)
+    first = publisher.publish(repository)
+    shutil.copytree(repository, "previous")
+    build(get_repository_config(b={"max_batch_size": 4}))
+    publisher.publish(repository)
+    assert get_keys(s3, f"repo/{first['version']}/") == []
+
+    # Publishing a previous version again, eg: a rollback, restores its prefix
+    result = publisher.publish("previous")
+    assert result["version"] == first["version"]
+    manifest, files = get_published(s3)
+    assert manifest["previous"] == []
+    assert files == get_files("previous", manifest)
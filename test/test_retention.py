@@ -0,0 +1,126 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import hashlib
+from typing import Optional
+from conftest import make_onnx_model
+
+
+def get_config(versions: list[int], retention: Optional[int] = None, paths: Optional[dict[int, str]] = None, **models) -> dict:
+    '''
+    Get configuration of model `m` with declared versions. Other models are added by `models`.
+    '''
+    model_config = {"engine": "onnx", "max_batch_size": 0,
+                    "versions": [{"version": version, "path": (paths or {}).get(version, "m.onnx")} for version in versions]}
+    if retention is not None:
+        model_config["retention"] = retention
+    return {"model_repository": "repo", "models": {"m": model_config, **models}}
+
+
+def get_versions(name: str = "m") -> list[int]:
+    '''
+    Get built versions of a model.
+    '''
+    return sorted(int(directory) for directory in os.listdir(f"build/repo/{name}") if directory.isdigit())
+
+
+def get_config_string(name: str = "m") -> str:
+    '''
+    Get built config.pbtxt of a model.
+    '''
+    with open(f"build/repo/{name}/config.pbtxt") as f:
+        return f.read()
+
+
+def test_declared_prunes_old_versions_and_removed_models(build):
+    make_onnx_model("m.onnx")
+    other = {"engine": "onnx", "max_batch_size": 0,
+             "versions": [{"version": 1, "path": "m.onnx"}]}
+    build(get_config([1, 2], other=other))
+    assert get_versions() == [1, 2]
+
+    build(get_config([3]))
+    assert get_versions() == [3]
+    assert not os.path.exists("build/repo/other")
+    assert "version_policy" not in get_config_string()
+
+
+def test_retention_keeps_latest_undeclared_versions(build):
+    make_onnx_model("m.onnx")
+    for version in [1, 2, 3]:
+        build(get_config([version], retention=3))
+    assert get_versions() == [1, 2, 3]
+
+    # Oldest version is removed when the model would have more than 3 versions
+    build(get_config([4], retention=3))
+    assert get_versions() == [2, 3, 4]
+
+    # Declared versions count towards retention
+    build(get_config([5, 6], retention=3))
+    assert get_versions() == [4, 5, 6]
+
+
+def test_retained_version_keeps_its_files(build):
+    make_onnx_model("m1.onnx", seed=1)
+    make_onnx_model("m2.onnx", seed=2)
+    build(get_config([1], retention=2, paths={1: "m1.onnx"}))
+    build(get_config([2], retention=2, paths={2: "m2.onnx"}))
+
+    for version in [1, 2]:
+        with open(f"m{version}.onnx", "rb") as source, open(f"build/repo/m/{version}/model.onnx", "rb") as built:
+            assert source.read() == built.read()
+
+
+def test_version_policy_lists_declared_versions(build):
+    make_onnx_model("m.onnx")
+    build(get_config([1], retention=3))
+    build(get_config([2, 3], retention=3))
+
+    assert get_versions() == [1, 2, 3]
+    assert "version_policy {\n  specific {\n    versions: [2, 3]\n  }\n}" in get_config_string()
+
+
+def test_pruned_versions_are_collected_from_store(build):
+    make_onnx_model("m1.onnx", size=64, seed=1)
+    make_onnx_model("m2.onnx", size=64, seed=2)
+    with open("m1.onnx", "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+
+    def __is_stored() -> bool:
+        return any(digest in files for _, _, files in os.walk("build/.cas"))
+
+    build({**get_config([1], retention=2, paths={1: "m1.onnx"}), "cas": True})
+    build({**get_config([2], retention=2, paths={2: "m2.onnx"}), "cas": True})
+    assert __is_stored()
+
+    # Stored file of pruned version is removed
+    build({**get_config([3], paths={3: "m2.onnx"}), "cas": True})
+    assert get_versions() == [3]
+    assert not __is_stored()
@@ -0,0 +1,109 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import time
+import functools
+import pytest
+from trsp.build._scheduler import BuildScheduler, get_model_dependencies
+
+
+def record_job(directory: str, name: str) -> str:
+    '''
+    Build job run in worker process. Record start and end time of model.
+    '''
+    start = time.monotonic()
+    time.sleep(0.2)
+    with open(os.path.join(directory, name), "w") as f:
+        f.write(f"{start} {time.monotonic()}")
+    return name
+
+
+def get_times(directory: str, name: str) -> tuple[float, float]:
+    '''
+    Get recorded start and end time of model.
+    '''
+    with open(os.path.join(directory, name)) as f:
+        start, end = f.read().split()
+    return float(start), float(end)
+
+
+def test_order_places_dependencies_first():
+    scheduler = BuildScheduler(
+        {"ens": ["a", "b"], "b": ["a"], "a": [], "c": []})
+    order = scheduler.get_order()
+    assert sorted(order) == ["a", "b", "c", "ens"]
+    assert order.index("a") < order.index("b") < order.index("ens")
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError, match="circular dependency: a -> b -> a"):
+        BuildScheduler({"a": ["b"], "b": ["a"]})
+
+
+def test_ensemble_with_unknown_step_is_rejected():
+    models = {"ens": {"engine": "ensemble", "max_batch_size": 0, "steps": [
+        {"model": "missing", "version": "latest"}]}}
+    with pytest.raises(ValueError, match="missing"):
+        get_model_dependencies(models)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_dependents_complete_after_dependencies(tmp_path, jobs):
+    dependencies = {"a": [], "b": [], "c": ["a"], "ens": ["b", "c"]}
+    completed: list[str] = []
+    BuildScheduler(dependencies, jobs).run(
+        functools.partial(record_job, str(tmp_path)),
+        lambda name: name == "ens",
+        lambda name: name,
+        lambda name, result: completed.append(result))
+
+    assert sorted(completed) == ["a", "b", "c", "ens"]
+    for name, names in dependencies.items():
+        for dependency in names:
+            assert completed.index(dependency) < completed.index(name)
+    if jobs > 1:
+        # Independent models run at the same time
+        assert get_times(tmp_path, "a")[0] < get_times(tmp_path, "b")[1]
+
+
+def test_memory_budget_limits_concurrent_jobs(tmp_path):
+    dependencies = {"large_1": [], "large_2": [], "small": []}
+    memory = {"large_1": 600, "large_2": 600, "small": 100}
+    BuildScheduler(dependencies, 3, memory, max_memory=1000).run(
+        functools.partial(record_job, str(tmp_path)),
+        lambda name: False,
+        lambda name: name,
+        lambda name, result: None)
+
+    # Large models never overlap, the small model fills the gap
+    first, second = sorted([get_times(tmp_path, "large_1"),
+                           get_times(tmp_path, "large_2")])
+    assert first[1] <= second[0]
+    assert get_times(tmp_path, "small")[0] < first[1]
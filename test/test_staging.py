@@ -0,0 +1,96 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import pytest
+from trsp.build import _placement
+from trsp.build._placement import publish_directory
+from conftest import make_onnx_model, get_tree, get_repository_config
+
+
+def make_directory(path: str, content: bytes) -> str:
+    '''
+    Make a directory with one file.
+    '''
+    os.makedirs(path)
+    with open(os.path.join(path, "file"), "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_publish_directory_moves_new_directory(workspace):
+    make_directory("staging", b"new")
+    publish_directory("staging", "published")
+
+    assert get_tree("published") == {"file": b"new"}
+    assert not os.path.exists("staging")
+
+
+@pytest.mark.parametrize("exchange", [True, False])
+def test_publish_directory_replaces_directory(workspace, monkeypatch, exchange):
+    if not exchange:
+        monkeypatch.setattr(_placement, "exchange_paths",
+                            lambda first, second: False)
+    make_directory("published", b"old")
+    make_directory("staging", b"new")
+    publish_directory("staging", "published")
+
+    assert get_tree("published") == {"file": b"new"}
+    assert sorted(os.listdir()) == ["published"]
+
+
+def test_successful_build_swaps_model_directory(repository, build):
+    inode = os.stat(os.path.join(repository, "a")).st_ino
+    with open(os.path.join(repository, "a", "1", "model.onnx"), "rb") as served:
+        previous = served.read()
+        make_onnx_model("a.onnx", size=64, seed=2)
+        assert build(get_repository_config()) == ["a", "ens"]
+
+        # Open files keep reading previous model, new model is published as a new directory
+        served.seek(0)
+        assert served.read() == previous
+
+    assert os.stat(os.path.join(repository, "a")).st_ino != inode
+    with open("a.onnx", "rb") as f:
+        assert get_tree(os.path.join(repository, "a"))["1/model.onnx"] == f.read()
+    assert not os.path.exists("build/.staging")
+
+
+def test_failed_build_keeps_previous_repository(repository, build):
+    previous = get_tree(repository)
+
+    # Model b fails after its staging directory is created
+    with open("bad.onnx", "wb") as f:
+        f.write(b"not an onnx model")
+    with pytest.raises(Exception):
+        build(get_repository_config(
+            b={"versions": [{"version": 1, "path": "bad.onnx"}]}))
+
+    assert get_tree(repository) == previous
+    assert not os.path.exists("build/.staging")
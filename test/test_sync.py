@@ -0,0 +1,105 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+from trsp.build import _sync
+from trsp.build._sync import sync_repository
+from conftest import get_tree, get_repository_config
+
+
+def get_status(results: list) -> dict[str, str]:
+    '''
+    Get sync status of each model.
+    '''
+    return {result["model"]: result["status"] for result in results}
+
+
+def test_sync_round_trip(repository):
+    results = sync_repository(repository, "target")
+    assert get_status(results) == {
+        "a": "created", "b": "created", "ens": "created"}
+    assert get_tree("target") == get_tree(
+        repository, exclude=(".trsp-manifest.json",))
+    assert os.path.isdir("target/ens/1")
+
+    results = sync_repository(repository, "target")
+    assert get_status(results) == {
+        "a": "unchanged", "b": "unchanged", "ens": "unchanged"}
+    assert sum(result["transferred_bytes"] for result in results) == 0
+
+
+def test_config_change_skips_unchanged_files_without_reading(repository, build, monkeypatch):
+    sync_repository(repository, "target")
+    build(get_repository_config(b={"max_batch_size": 4}))
+
+    # Files given to block comparison are read, others are linked from target
+    compared: list[str] = []
+    sync_file = _sync.sync_file
+
+    def __sync_file(source, *args, **kwargs):
+        compared.append(os.path.relpath(source, repository))
+        return sync_file(source, *args, **kwargs)
+
+    monkeypatch.setattr(_sync, "sync_file", __sync_file)
+    results = sync_repository(repository, "target")
+
+    assert get_status(results)["a"] == "unchanged"
+    assert get_status(results)["b"] == "updated"
+    assert "b/1/model.onnx" not in compared
+    assert "b/config.pbtxt" in compared
+    assert get_tree("target") == get_tree(
+        repository, exclude=(".trsp-manifest.json",))
+
+
+def test_changed_model_reuses_unchanged_blocks(repository, build):
+    sync_repository(repository, "target")
+    os.remove("target/a/.trsp-checksums.json")
+    # Batch axis rewrite changes model header, weights are unchanged
+    build(get_repository_config(
+        a={"max_batch_size": 4, "dynamic_batching": True}))
+
+    results = sync_repository(repository, "target", block_size=4096)
+    result = next(result for result in results if result["model"] == "a")
+    assert result["status"] == "updated"
+    assert result["transferred_bytes"] < result["total_bytes"] // 2
+    assert get_tree("target") == get_tree(
+        repository, exclude=(".trsp-manifest.json",))
+
+
+def test_delete_removes_models_not_in_source(repository, build):
+    sync_repository(repository, "target")
+    config = get_repository_config()
+    del config["models"]["ens"]
+    build(config)
+
+    sync_repository(repository, "target")
+    assert os.path.isdir("target/ens")
+    results = sync_repository(repository, "target", delete=True)
+    assert get_status(results)["ens"] == "deleted"
+    assert sorted(os.listdir("target")) == ["a", "b"]
@@ -0,0 +1,105 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import sys
+import shutil
+import pytest
+from trsp.build._checksums import verify_repository, repair_files
+from conftest import get_tree
+
+
+@pytest.fixture
+def deployed(repository) -> str:
+    '''
+    Copy built model repository to a deployment directory. Return its path.
+    '''
+    shutil.copytree(repository, "deployed")
+    return "deployed"
+
+
+def flip_byte(path: str, offset: int):
+    '''
+    Modify a byte of a file in place, without changing its size.
+    '''
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        value = f.read(1)
+        f.seek(offset)
+        f.write(bytes([value[0] ^ 0xFF]))
+
+
+def test_verify_detects_mismatched_files(deployed):
+    assert verify_repository(deployed, jobs=2) == []
+
+    flip_byte("deployed/a/1/model.onnx", os.path.getsize(
+        "deployed/a/1/model.onnx") // 2)
+    with open("deployed/b/config.pbtxt", "a") as f:
+        f.write("\n")
+    os.remove("deployed/b/1/model.onnx")
+    os.remove("deployed/ens/.trsp-checksums.json")
+
+    issues = verify_repository(deployed, jobs=2)
+    assert sorted(issues, key=lambda issue: issue["path"]) == [
+        {"path": "a/1/model.onnx", "reason": "hash"},
+        {"path": "b/1/model.onnx", "reason": "missing"},
+        {"path": "b/config.pbtxt", "reason": "size"},
+        {"path": "ens", "reason": "no_checksums"}
+    ]
+    assert verify_repository(deployed, models=["a"], jobs=2) == [
+        {"path": "a/1/model.onnx", "reason": "hash"}]
+
+
+def test_repair_replaces_mismatched_files(repository, deployed):
+    flip_byte("deployed/a/1/model.onnx", 0)
+    os.remove("deployed/b/1/model.onnx")
+
+    issues = verify_repository(deployed, jobs=2)
+    assert sorted(repair_files(deployed, repository, issues)) == [
+        "a/1/model.onnx", "b/1/model.onnx"]
+    assert verify_repository(deployed, jobs=2) == []
+    assert get_tree(deployed) == get_tree(repository)
+
+
+def test_repair_skips_source_which_does_not_match(repository, deployed):
+    flip_byte("deployed/a/1/model.onnx", 0)
+    flip_byte(os.path.join(repository, "a/1/model.onnx"), 1)
+
+    issues = verify_repository(deployed, jobs=2)
+    assert repair_files(deployed, repository, issues) == []
+
+
+def test_verify_command_exits_with_error(deployed, monkeypatch):
+    from trsp.verify import main
+
+    flip_byte("deployed/a/1/model.onnx", 0)
+    monkeypatch.setattr(sys, "argv", ["trsp-verify", deployed])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
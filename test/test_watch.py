@@ -0,0 +1,181 @@
+'''
+Triton Server Support for building model repository.
+----
+Author: Quang-Minh Doan (Vietnam)
+Github: https://github.com/Ming-doan/trsp
+----
+MIT License
+
+Copyright (c) 2024 Quang-Minh Doan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+'''
+
+import os
+import yaml
+import threading
+from typing import Callable
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from trsp.build._file_config import FileConfig
+from trsp.build import _watch
+from trsp.build._watch import FileWatcher, watch_build
+from conftest import make_onnx_model, get_repository_config
+
+
+class RepositoryHandler(BaseHTTPRequestHandler):
+    '''
+    Stand-in of Triton model repository API. Record paths of requests.
+    '''
+    requests: list[tuple[str, str]] = []
+
+    def do_POST(self):
+        self.requests.append((self.command, self.path))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    '''
+    Run repository API stand-in. Return its url.
+    '''
+    RepositoryHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RepositoryHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_changed_models_are_reloaded(build, server, monkeypatch, inotify):
+    make_onnx_model("a.onnx", seed=0)
+    make_onnx_model("b.onnx", seed=1)
+    build(get_repository_config())
+
+    if not inotify:
+        monkeypatch.setattr(
+            FileWatcher, "_FileWatcher__init_inotify", lambda self: None)
+
+    # Change model a once watching started, then stop after its rebuild
+    wait = FileWatcher.wait
+    calls: list[bool] = []
+
+    def __wait(self):
+        assert self.is_inotify() == inotify
+        calls.append(True)
+        if len(calls) > 1:
+            raise KeyboardInterrupt
+        threading.Timer(0.5, make_onnx_model, args=(
+            "a.onnx",), kwargs={"seed": 2}).start()
+        return wait(self)
+
+    monkeypatch.setattr(FileWatcher, "wait", __wait)
+    watch_build("config.yaml", lambda: FileConfig(
+        "config.yaml").get_config(), server_url=server)
+
+    # Step model is reloaded before its ensemble, unchanged model is not reloaded
+    assert RepositoryHandler.requests == [
+        ("POST", "/v2/repository/models/a/load"),
+        ("POST", "/v2/repository/models/ens/load")
+    ]
+
+
+def stop_after(monkeypatch, changes: int, change: Callable[[], None]):
+    '''
+    Run `change` once watching started, then stop after `changes` rebuilds.
+    '''
+    wait = FileWatcher.wait
+    calls: list[bool] = []
+
+    def __wait(self):
+        calls.append(True)
+        if len(calls) > changes:
+            raise KeyboardInterrupt
+        if len(calls) == 1:
+            threading.Timer(0.5, change).start()
+        return wait(self)
+
+    monkeypatch.setattr(FileWatcher, "wait", __wait)
+
+
+def test_polling_keeps_stats_of_watched_files(workspace, monkeypatch):
+    monkeypatch.setattr(
+        FileWatcher, "_FileWatcher__init_inotify", lambda self: None)
+    make_onnx_model("a.onnx", seed=0)
+    make_onnx_model("b.onnx", seed=1)
+    watcher = FileWatcher([os.path.abspath("a.onnx")])
+
+    # File changed before paths are set again is still detected
+    make_onnx_model("a.onnx", size=8)
+    watcher.set_paths([os.path.abspath("a.onnx"), os.path.abspath("b.onnx")])
+    assert watcher._FileWatcher__poll() == {os.path.abspath("a.onnx")}
+    assert watcher._FileWatcher__poll() == set()
+
+
+def test_files_changed_during_build_are_rebuilt(build, server, monkeypatch):
+    monkeypatch.setattr(
+        FileWatcher, "_FileWatcher__init_inotify", lambda self: None)
+    make_onnx_model("a.onnx", seed=0)
+    make_onnx_model("b.onnx", seed=1)
+    build(get_repository_config())
+
+    # Model b is changed while model a is rebuilt
+    builds: list[list[str]] = []
+
+    class ChangingBuild(_watch.BuildProtoBufTxt):
+        def build(self) -> list[str]:
+            built_models = super().build()
+            if not builds:
+                make_onnx_model("b.onnx", seed=3)
+            builds.append(built_models)
+            return built_models
+
+    monkeypatch.setattr(_watch, "BuildProtoBufTxt", ChangingBuild)
+    stop_after(monkeypatch, 2, lambda: make_onnx_model("a.onnx", seed=2))
+    watch_build("config.yaml", lambda: FileConfig(
+        "config.yaml").get_config(), server_url=server)
+
+    assert builds == [["a", "ens"], ["b", "ens"]]
+
+
+def test_removed_models_are_unloaded(build, server, monkeypatch):
+    make_onnx_model("a.onnx", seed=0)
+    make_onnx_model("b.onnx", seed=1)
+    build(get_repository_config())
+
+    def __remove_ensemble():
+        config = get_repository_config()
+        del config["models"]["ens"]
+        with open("config.yaml", "w") as f:
+            yaml.safe_dump(config, f)
+
+    stop_after(monkeypatch, 1, __remove_ensemble)
+    watch_build("config.yaml", lambda: FileConfig(
+        "config.yaml").get_config(), server_url=server)
+
+    assert not os.path.exists("build/repo/ens")
+    assert RepositoryHandler.requests == [
+        ("POST", "/v2/repository/models/ens/unload")]